@@ -0,0 +1,278 @@
+"""演员出演次数的近似 Top-K（Space-Saving 算法）
+
+每次爬取入库时用容量为 k 的 Space-Saving 摘要统计本次榜单中各演员的出演次数，按快照持久化
+（actor_topk_snapshots / actor_topk_counters 两张表）；查询最近 N 个快照的热门演员时在数据库中
+合并这 N 个摘要，只读取 N * k 行计数，不再扫描主表的全部 actors 字符串。
+
+误差界：
+    单个摘要（该快照共 m 次出演）中每个被记录演员的计数 c 满足 真实值 <= c <= 真实值 + error，
+    error <= 摘要中最小计数 min <= m / k；未被记录的演员真实值 <= min。
+    合并 N 个摘要后，演员的估计值取各快照 c（未记录的快照取该快照的 min）之和，为真实值的上界，
+    下界为各快照 c - error 之和，两者之差不超过 sum(min) <= M / k（M 为 N 个快照的出演总次数）。
+    因此真实出演次数超过 M / k 的演员一定会出现在候选中。一个快照内不同演员数不超过 k 时，该快照的计数是精确的。
+"""
+import hashlib
+import heapq
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from TextUtils import split_values  # 在 Utils 目录下运行的爬虫脚本
+except ImportError:
+    from Utils.TextUtils import split_values  # 以 Utils 包导入（接口服务）
+
+
+def actor_hash(actor: str) -> str:
+    """演员名的 MD5（与 MySQL MD5(actor) 相同），作计数表主键：名字再长、或在排序规则下相等的不同写法都不会冲突"""
+    return hashlib.md5(actor.encode('utf-8')).hexdigest()
+
+
+class SpaceSaving:
+    """Space-Saving 频繁项摘要：最多保留 capacity 个计数器
+
+    计数器已满时新出现的项替换当前计数最小的项，并继承其计数作为误差。
+    最小计数用带惰性删除的小顶堆维护，每次更新均摊 O(log capacity)。
+    """
+
+    def __init__(self, capacity: int = 200):
+        """
+        Args:
+            capacity: 计数器个数 k，误差上界为 总次数 / k
+        """
+        if capacity < 1:
+            raise ValueError("capacity 必须大于0")
+        self.capacity = capacity
+        self.counters = {}  # 项 -> [计数, 误差]
+        self.total = 0
+        self._heap = []  # (计数, 项)，计数与当前计数不一致的条目已过期
+
+    def update(self, item: str, weight: int = 1) -> None:
+        """累加一次出现"""
+        self.total += weight
+        counter = self.counters.get(item)
+        if counter is not None:
+            counter[0] += weight
+        elif len(self.counters) < self.capacity:
+            counter = self.counters[item] = [weight, 0]
+        else:
+            victim, floor = self._pop_min()
+            del self.counters[victim]
+            counter = self.counters[item] = [floor + weight, floor]
+        heapq.heappush(self._heap, (counter[0], item))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(count, key) for key, (count, _) in self.counters.items()]
+            heapq.heapify(self._heap)
+
+    def update_many(self, items: Iterable[str]) -> None:
+        """逐个累加"""
+        for item in items:
+            self.update(item)
+
+    def _pop_min(self) -> Tuple[str, int]:
+        """弹出当前计数最小的项"""
+        while True:
+            count, item = heapq.heappop(self._heap)
+            counter = self.counters.get(item)
+            if counter is not None and counter[0] == count:
+                return item, count
+
+    def min_count(self) -> int:
+        """未被记录的项真实计数的上界：计数器未满时为0，否则为最小计数"""
+        if len(self.counters) < self.capacity:
+            return 0
+        return min(count for count, _ in self.counters.values())
+
+    def top(self, limit: int = 50) -> List[Tuple[str, int, int]]:
+        """按计数降序的 (项, 计数, 误差)"""
+        items = sorted(self.counters.items(), key=lambda kv: (-kv[1][0], kv[1][1]))[:limit]
+        return [(item, count, error) for item, (count, error) in items]
+
+
+class ActorTopKStore:
+    """按快照持久化的演员 Space-Saving 摘要，支持合并最近 N 个快照查询热门演员
+
+    计数表以 (snapshot_id, actor_hash) 为主键，actor 列使用二进制排序规则，按名字原样区分演员
+    （与 SpaceSaving 在 Python 中的字典键一致），不受长度和大小写/全半角等排序规则等价的影响。
+    """
+
+    CREATE_SNAPSHOTS_SQL = """
+    CREATE TABLE IF NOT EXISTS actor_topk_snapshots (
+        snapshot_id INT PRIMARY KEY,
+        capacity INT NOT NULL,
+        total INT NOT NULL,
+        min_count INT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """
+    CREATE_COUNTERS_SQL = """
+    CREATE TABLE IF NOT EXISTS actor_topk_counters (
+        snapshot_id INT NOT NULL,
+        actor_hash CHAR(32) NOT NULL,
+        actor VARCHAR(1000) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+        `count` INT NOT NULL,
+        error INT NOT NULL,
+        PRIMARY KEY (snapshot_id, actor_hash)
+    )
+    """
+
+    def __init__(self, db_helper):
+        """
+        Args:
+            db_helper: MySqlHelper 实例
+        """
+        self.db_helper = db_helper
+
+    def initialize(self) -> None:
+        """建表，旧的以 (snapshot_id, actor VARCHAR(100)) 为主键的计数表改为按演员名哈希作主键"""
+        self.db_helper.execute(self.CREATE_SNAPSHOTS_SQL)
+        self.db_helper.execute(self.CREATE_COUNTERS_SQL)
+        self.db_helper.add_missing_columns('actor_topk_counters', {'actor_hash': 'CHAR(32) NULL'})
+        if self.db_helper.query_one(
+                "SELECT 1 AS found FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = DATABASE() "
+                "AND TABLE_NAME = 'actor_topk_counters' AND INDEX_NAME = 'PRIMARY' AND COLUMN_NAME = 'actor_hash'"):
+            return
+        # 旧表每个快照只有 k 行，一次性回填；旧主键下被截断或合并的演员无法还原，可用 rebuild 重新生成
+        migrated = self.db_helper.execute(
+            "UPDATE actor_topk_counters SET actor_hash = MD5(actor) WHERE actor_hash IS NULL"
+        ) and self.db_helper.execute(
+            "ALTER TABLE actor_topk_counters MODIFY actor_hash CHAR(32) NOT NULL, "
+            "MODIFY actor VARCHAR(1000) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL, "
+            "DROP PRIMARY KEY, ADD PRIMARY KEY (snapshot_id, actor_hash)"
+        )
+        if not migrated:
+            raise RuntimeError("迁移演员摘要计数表失败")
+
+    @staticmethod
+    def sketch_movies(movies: Iterable[tuple], sketch: SpaceSaving, actors_index: int = 6) -> Iterable[tuple]:
+        """边产出电影行边把演员计入摘要（入库时包装 movies 生成器，不额外遍历）"""
+        for movie in movies:
+            sketch.update_many(split_values(movie[actors_index]))
+            yield movie
+
+    def save(self, snapshot_id: int, sketch: SpaceSaving) -> None:
+        """保存一个快照的摘要（已存在时覆盖）"""
+        self.db_helper.execute("DELETE FROM actor_topk_counters WHERE snapshot_id = %s", (snapshot_id,))
+        stats = self.db_helper.bulk_insert(
+            "INSERT INTO actor_topk_counters (snapshot_id, actor_hash, actor, `count`, error) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            ((snapshot_id, actor_hash(actor), actor, count, error)
+             for actor, (count, error) in sketch.counters.items()),
+        )
+        if stats['failed_rows']:
+            raise RuntimeError(f"保存演员摘要失败 {stats['failed_rows']} 行")
+        self.db_helper.execute(
+            "REPLACE INTO actor_topk_snapshots (snapshot_id, capacity, total, min_count) VALUES (%s, %s, %s, %s)",
+            (snapshot_id, sketch.capacity, sketch.total, sketch.min_count())
+        )
+
+    def discard(self, snapshot_id: int) -> None:
+        """删除一个快照的摘要（入库失败撤销快照时使用）"""
+        for table in ('actor_topk_counters', 'actor_topk_snapshots'):
+            self.db_helper.execute(f"DELETE FROM {table} WHERE snapshot_id = %s", (snapshot_id,))
+
+    def complete_snapshots(self, snapshot_ids: List[int] = None) -> List[int]:
+        """主表中保存了完整榜单的豆瓣快照（带该快照编号的行数等于快照记录的 row_count），升序
+
+        追加入库模式的快照都是完整的；增量模式下每个快照只标记当次变化的行，不在结果中。
+
+        Args:
+            snapshot_ids: 只检查这些快照，为空时检查全部快照
+        """
+        sql = ("SELECT s.id FROM scrape_snapshots s JOIN douban_hot100_list m ON m.snapshot_id = s.id "
+               "WHERE s.source = 'douban' AND s.row_count > 0")
+        params = ()
+        if snapshot_ids is not None:
+            if not snapshot_ids:
+                return []
+            sql += f" AND s.id IN ({', '.join(['%s'] * len(snapshot_ids))})"
+            params = tuple(snapshot_ids)
+        rows = self.db_helper.query(sql + " GROUP BY s.id, s.row_count HAVING COUNT(*) = s.row_count ORDER BY s.id",
+                                    params)
+        if rows is None:
+            raise RuntimeError("读取快照行数失败")
+        return [row['id'] for row in rows]
+
+    def rebuild(self, capacity: int = 200, snapshot_ids: List[int] = None) -> int:
+        """由主表按快照重新生成摘要（用于启用前的历史快照），返回处理的快照数
+
+        只处理主表中保存了完整榜单的快照（complete_snapshots）：增量模式的快照只有当次变化的行，
+        由它生成的摘要会严重低估出演次数，这类快照（包括 snapshot_ids 中指定的）直接跳过。
+
+        Args:
+            capacity: 摘要容量
+            snapshot_ids: 要处理的快照编号（会覆盖已有摘要），为空时处理所有尚无摘要的完整快照
+        """
+        if snapshot_ids is None:
+            existing = self.db_helper.query("SELECT snapshot_id FROM actor_topk_snapshots")
+            if existing is None:
+                raise RuntimeError("读取已有演员摘要失败")
+            done = {row['snapshot_id'] for row in existing}
+            snapshot_ids = [snapshot_id for snapshot_id in self.complete_snapshots() if snapshot_id not in done]
+        else:
+            snapshot_ids = self.complete_snapshots(snapshot_ids)
+        for snapshot_id in snapshot_ids:
+            sketch = SpaceSaving(capacity)
+            rows = self.db_helper.query(
+                "SELECT actors FROM douban_hot100_list WHERE snapshot_id = %s", (snapshot_id,)
+            )
+            if rows is None:
+                raise RuntimeError(f"读取快照 {snapshot_id} 失败")
+            for row in rows:
+                sketch.update_many(split_values(row['actors']))
+            self.save(snapshot_id, sketch)
+        return len(snapshot_ids)
+
+    def prune(self, keep_last: int) -> None:
+        """只保留最近 keep_last 个快照的摘要"""
+        row = self.db_helper.query_one(
+            "SELECT MIN(snapshot_id) AS first_id FROM (SELECT snapshot_id FROM actor_topk_snapshots "
+            "ORDER BY snapshot_id DESC LIMIT %s) recent",
+            (keep_last,)
+        )
+        if row and row['first_id'] is not None:
+            for table in ('actor_topk_counters', 'actor_topk_snapshots'):
+                self.db_helper.execute(f"DELETE FROM {table} WHERE snapshot_id < %s", (row['first_id'],))
+
+    def top(self, limit: int = 50, last_snapshots: Optional[int] = None) -> Dict[str, Any]:
+        """合并最近 last_snapshots 个快照（为空时为全部快照）的摘要，返回热门演员
+
+        Returns:
+            {
+                'items': [{'actor', 'count': 出演次数估计（上界）, 'error': 与下界之差}, ...],
+                'snapshots': 参与合并的快照数,
+                'total': 这些快照的出演总次数 M,
+                'max_error': 任一演员估计值的最大误差 sum(min) <= M / k,
+            }
+        """
+        recent = "SELECT snapshot_id, total, min_count FROM actor_topk_snapshots ORDER BY snapshot_id DESC"
+        params = ()
+        if last_snapshots is not None:
+            recent += " LIMIT %s"
+            params = (max(1, int(last_snapshots)),)
+        meta = self.db_helper.query_one(
+            "SELECT COUNT(*) AS snapshots, MIN(snapshot_id) AS first_id, COALESCE(SUM(total), 0) AS total, "
+            f"COALESCE(SUM(min_count), 0) AS max_error FROM ({recent}) recent",
+            params
+        )
+        if meta is None:
+            raise RuntimeError("读取演员摘要失败")
+        result = {'items': [], 'snapshots': meta['snapshots'], 'total': int(meta['total']),
+                  'max_error': int(meta['max_error'])}
+        if not meta['snapshots']:
+            return result
+
+        # 估计值 = 记录了该演员的快照的计数之和 + 未记录该演员的快照的 min 之和
+        rows = self.db_helper.query(
+            "SELECT MIN(c.actor) AS actor, SUM(c.`count`) + %s - SUM(s.min_count) AS estimate, "
+            "SUM(c.`count` - c.error) AS lower_bound "
+            "FROM actor_topk_counters c JOIN actor_topk_snapshots s ON s.snapshot_id = c.snapshot_id "
+            "WHERE c.snapshot_id >= %s GROUP BY c.actor_hash ORDER BY estimate DESC, lower_bound DESC LIMIT %s",
+            (result['max_error'], meta['first_id'], int(limit))
+        )
+        if rows is None:
+            raise RuntimeError("查询演员摘要失败")
+        result['items'] = [
+            {'actor': row['actor'], 'count': int(row['estimate']),
+             'error': int(row['estimate']) - int(row['lower_bound'])}
+            for row in rows
+        ]
+        return result
@@ -0,0 +1,278 @@
+import asyncio
+from typing import List, Union, Dict, Tuple, Any, Optional
+
+try:
+    import aiomysql  # 可选依赖：pip install aiomysql
+except ImportError:
+    aiomysql = None
+
+
+class AsyncPoolTimeoutError(Exception):
+    """异步连接池在超时时间内没有可用连接"""
+
+
+def _require_aiomysql():
+    if aiomysql is None:
+        raise RuntimeError("异步数据库访问需要安装 aiomysql: pip install aiomysql")
+
+
+class AsyncMySqlPool:
+    """基于 asyncio 的 MySQL 连接池（aiomysql）
+
+    与 MySqlPool 对应：等待连接时让出事件循环而不是占用线程，
+    单个进程可以同时挂起成百上千个等待数据库的请求。
+    连接池必须在使用它的事件循环中创建，首次 acquire 时才建立连接。
+    """
+
+    def __init__(
+            self,
+            host: str = None,
+            user: str = None,
+            password: str = None,
+            database: str = None,
+            port: int = 3306,
+            charset: str = 'utf8mb4',
+            min_size: int = 1,
+            max_size: int = 10,
+            acquire_timeout: float = 10.0,
+            max_lifetime: float = 3600.0,
+    ):
+        """初始化连接池（不会预先建立连接）
+
+        Args:
+            host: 数据库主机地址
+            user: 数据库用户名
+            password: 数据库密码
+            database: 数据库名称
+            port: 数据库端口，默认为3306
+            charset: 字符集，默认为utf8mb4
+            min_size: 保持的最少连接数
+            max_size: 连接数上限
+            acquire_timeout: 借连接的最长等待秒数
+            max_lifetime: 单个连接的最长存活秒数，超过后归还时重建
+        """
+        self.connect_kwargs = {
+            'host': host,
+            'user': user,
+            'password': password,
+            'db': database,
+            'port': port,
+            'charset': charset,
+        }
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.max_lifetime = max_lifetime
+        self._pool = None
+        self._lock = None
+
+    async def open(self) -> None:
+        """建立底层连接池（可重复调用）"""
+        _require_aiomysql()
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._pool is None:
+                self._pool = await aiomysql.create_pool(
+                    minsize=self.min_size,
+                    maxsize=self.max_size,
+                    pool_recycle=self.max_lifetime,
+                    autocommit=False,
+                    **self.connect_kwargs,
+                )
+
+    async def acquire(self, timeout: float = None):
+        """借出一个可用连接
+
+        Args:
+            timeout: 最长等待秒数，默认使用 acquire_timeout
+
+        Returns:
+            aiomysql 连接对象
+        """
+        if self._pool is None:
+            await self.open()
+        timeout = self.acquire_timeout if timeout is None else timeout
+        try:
+            return await asyncio.wait_for(self._pool.acquire(), timeout)
+        except asyncio.TimeoutError:
+            raise AsyncPoolTimeoutError(f"{timeout}秒内未能获取数据库连接")
+
+    async def release(self, connection) -> None:
+        """归还连接，未结束的事务会被回滚"""
+        try:
+            await connection.rollback()
+        except Exception:
+            connection.close()
+        self._pool.release(connection)
+
+    async def close(self) -> None:
+        """关闭连接池并等待所有连接关闭"""
+        if self._pool is not None:
+            self._pool.close()
+            await self._pool.wait_closed()
+            self._pool = None
+
+    def stats(self) -> Dict[str, int]:
+        """连接池状态：总连接数、空闲连接数"""
+        if self._pool is None:
+            return {'size': 0, 'idle': 0, 'max_size': self.max_size}
+        return {'size': self._pool.size, 'idle': self._pool.freesize, 'max_size': self.max_size}
+
+
+class AsyncMySqlHelper:
+    """MySqlHelper 的 asyncio 版本，公开方法相同，均需 await
+
+    用法:
+        async with AsyncMySqlHelper(pool=pool) as db:
+            rows = await db.query("SELECT ...", params)
+    """
+
+    def __init__(
+            self,
+            host: Optional[str] = None,
+            user: Optional[str] = None,
+            password: Optional[str] = None,
+            database: Optional[str] = None,
+            port: int = 3306,
+            charset: str = 'utf8mb4',
+            dict_cursor: bool = True,
+            pool: Optional[AsyncMySqlPool] = None,
+    ):
+        """保存连接参数，进入 async with 或调用 connect 时才建立连接
+
+        Args:
+            host: 数据库主机地址（可选）
+            user: 数据库用户名（可选）
+            password: 数据库密码（可选）
+            database: 数据库名称（可选）
+            port: 数据库端口，默认为3306
+            charset: 字符集，默认为utf8mb4
+            dict_cursor: 是否以字典形式返回行，默认为True
+            pool: 异步连接池，传入时从池中借用连接（忽略上面的连接参数），close 时归还
+        """
+        self.connect_kwargs = {
+            'host': host,
+            'user': user,
+            'password': password,
+            'db': database,
+            'port': port,
+            'charset': charset,
+        }
+        self.dict_cursor = dict_cursor
+        self.pool = pool
+        self.connection = None
+        self.cursor = None
+
+    async def connect(self) -> 'AsyncMySqlHelper':
+        """建立连接（或从连接池借用）并创建游标"""
+        _require_aiomysql()
+        if self.pool is not None:
+            self.connection = await self.pool.acquire()
+        else:
+            self.connection = await aiomysql.connect(autocommit=False, **self.connect_kwargs)
+        self.cursor = await self.connection.cursor(aiomysql.DictCursor if self.dict_cursor else aiomysql.Cursor)
+        return self
+
+    async def __aenter__(self):
+        """支持异步上下文管理器"""
+        return await self.connect()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """退出上下文时自动关闭连接"""
+        await self.close()
+
+    # 底层核心方法
+    async def _execute(self, query: str, params=None, many: bool = False) -> bool:
+        """底层执行方法（私有方法）
+
+        Args:
+            query: SQL语句
+            params: 参数，可以是单条(tuple/dict)或多条(List)
+            many: 是否批量操作
+
+        Returns:
+            执行是否成功
+        """
+        try:
+            if many:
+                await self.cursor.executemany(query, params)
+            else:
+                await self.cursor.execute(query, params)
+            await self.connection.commit()
+            return True
+        except Exception as e:
+            print(f"操作执行失败: {e}")
+            await self.connection.rollback()
+            return False
+
+    async def _query(self, query: str, params=None, fetch_all: bool = True):
+        """底层查询方法（私有方法）
+
+        Args:
+            query: SQL查询语句
+            params: 查询参数
+            fetch_all: 是否获取所有结果
+
+        Returns:
+            查询结果或None(出错时)
+        """
+        try:
+            await self.cursor.execute(query, params)
+            return await self.cursor.fetchall() if fetch_all else await self.cursor.fetchone()
+        except Exception as e:
+            print(f"查询执行失败: {e}")
+            return None
+
+    # 公开方法
+    async def execute(self, query: str, params: Union[Tuple, Dict[str, Any]] = None) -> bool:
+        """执行单条SQL操作(增删改)"""
+        return await self._execute(query, params, many=False)
+
+    async def query(self, query: str, params: Union[Tuple, Dict[str, Any]] = None) -> Optional[List[Dict]]:
+        """执行查询并返回所有结果，出错时返回None"""
+        return await self._query(query, params, fetch_all=True)
+
+    async def query_one(self, query: str, params: Union[Tuple, Dict[str, Any]] = None) -> Optional[Dict]:
+        """执行查询并返回第一条结果，出错时返回None"""
+        return await self._query(query, params, fetch_all=False)
+
+    async def insert(self, query: str, params: Union[Tuple, Dict[str, Any]]) -> bool:
+        """插入单条数据"""
+        return await self.execute(query, params)
+
+    async def update(self, query: str, params: Union[Tuple, Dict[str, Any]]) -> bool:
+        """更新单条数据"""
+        return await self.execute(query, params)
+
+    async def delete(self, query: str, params: Union[Tuple, Dict[str, Any]]) -> bool:
+        """删除单条数据"""
+        return await self.execute(query, params)
+
+    async def execute_many(self, query: str, params_list: List[Union[Tuple, Dict[str, Any]]]) -> bool:
+        """批量执行SQL操作(增删改)"""
+        return await self._execute(query, params_list, many=True)
+
+    async def insert_many(self, query: str, params_list: List[Union[Tuple, Dict[str, Any]]]) -> bool:
+        """批量插入数据"""
+        return await self.execute_many(query, params_list)
+
+    async def update_many(self, query: str, params_list: List[Union[Tuple, Dict[str, Any]]]) -> bool:
+        """批量更新数据"""
+        return await self.execute_many(query, params_list)
+
+    async def delete_many(self, query: str, params_list: List[Union[Tuple, Dict[str, Any]]]) -> bool:
+        """批量删除数据"""
+        return await self.execute_many(query, params_list)
+
+    async def close(self) -> None:
+        """关闭数据库连接，连接来自连接池时归还给连接池"""
+        if self.cursor is not None:
+            await self.cursor.close()
+            self.cursor = None
+        if self.connection is not None:
+            if self.pool is not None:
+                await self.pool.release(self.connection)
+            else:
+                self.connection.close()
+            self.connection = None
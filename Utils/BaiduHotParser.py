@@ -0,0 +1,159 @@
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    # selectolax 1.0 起只保留 Lexbor 后端（原 selectolax.parser 的 Modest 后端已移除）
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser  # 可选依赖：pip install selectolax
+except ImportError:
+    SelectolaxParser = None
+
+try:
+    from lxml import etree  # 可选依赖：pip install lxml
+except ImportError:
+    etree = None
+
+from bs4 import BeautifulSoup
+
+# 百度热搜页面结构：每个热搜项是一个 category-wrap_iQLoo 块，
+# 其中第一个链接为热搜地址，c-single-text-ellipsis 为标题，hot-index_1Bl1a 为热度
+ITEM_CLASS = 'category-wrap_iQLoo'
+TITLE_CLASS = 'c-single-text-ellipsis'
+HOT_CLASS = 'hot-index_1Bl1a'
+
+HotItem = Tuple[int, str, str, str]  # (排名, 标题, 热度, 链接)
+
+
+def parse_with_bs4(html: str, limit: int = 100) -> List[HotItem]:
+    """BeautifulSoup + html.parser（纯 Python，无额外依赖）"""
+    soup = BeautifulSoup(html, 'html.parser')
+    hot_list = []
+    for index, item in enumerate(soup.find_all('div', class_=ITEM_CLASS)[:limit], 1):
+        title = item.find('div', class_=TITLE_CLASS).text.strip()
+        hot_score = item.find('div', class_=HOT_CLASS).text.strip()
+        link = item.find('a')['href']
+        hot_list.append((index, title, hot_score, link))
+    return hot_list
+
+
+def parse_with_selectolax(html: str, limit: int = 100) -> List[HotItem]:
+    """selectolax（C 实现的 Lexbor 解析器）：一次组合选择器查询按文档顺序取出热搜项及其中的链接、标题、热度节点，
+    单次遍历匹配结果完成提取，不再对每个热搜项分别查询
+
+    与 BeautifulSoup 路径的取值规则一致：链接取热搜项内第一个 a 的 href，
+    标题和热度取热搜项内第一个对应 div 的全部文本去掉首尾空白；热搜项之外的同名 div 不计入。
+    """
+    tree = SelectolaxParser(html)
+    selector = f'div.{ITEM_CLASS}, div.{ITEM_CLASS} a, div.{TITLE_CLASS}, div.{HOT_CLASS}'
+    hot_list = []
+    item_id, link, title, hot_score = None, None, None, None
+
+    for node in tree.css(selector):
+        if node.tag == 'div' and ITEM_CLASS in (node.attributes.get('class') or '').split():
+            if item_id is not None:
+                raise ValueError("热搜项缺少标题、热度或链接")
+            if len(hot_list) >= limit:
+                break
+            item_id, link, title, hot_score = node.mem_id, None, None, None
+            continue
+        if item_id is None:
+            continue
+        if node.tag == 'a':
+            if link is None:  # 只有热搜项内的 a 会被选中
+                link = node.attributes.get('href')
+        elif not _inside(node, item_id):
+            continue
+        elif title is None and TITLE_CLASS in (node.attributes.get('class') or '').split():
+            title = node.text().strip()
+        elif hot_score is None and HOT_CLASS in (node.attributes.get('class') or '').split():
+            hot_score = node.text().strip()
+        if link is not None and title is not None and hot_score is not None:
+            hot_list.append((len(hot_list) + 1, title, hot_score, link))
+            item_id = None
+    if item_id is not None:
+        raise ValueError("热搜项缺少标题、热度或链接")
+    return hot_list
+
+
+def _inside(node, ancestor_id) -> bool:
+    """node 是否位于 mem_id 为 ancestor_id 的节点之内（热搜项只有几层，逐级向上查找）"""
+    node = node.parent
+    while node is not None:
+        if node.mem_id == ancestor_id:
+            return True
+        node = node.parent
+    return False
+
+
+def parse_with_lxml(html: str, limit: int = 100, chunk_size: int = 64 * 1024) -> List[HotItem]:
+    """lxml 增量解析（libxml2）：分块喂入文档、单次顺序扫描，边解析边提取，取满 limit 条即停止
+
+    与 BeautifulSoup 路径的取值规则一致：链接取热搜项内第一个 a 的 href，
+    标题和热度取对应 div 下全部文本去掉首尾空白。
+    """
+    parser = etree.HTMLPullParser(events=('start', 'end'))
+    hot_list = []
+    item, link, title, hot_score = None, None, None, None
+
+    for offset in range(0, len(html), chunk_size):
+        parser.feed(html[offset:offset + chunk_size])
+        for event, element in parser.read_events():
+            if event == 'start':
+                if element.tag != 'div' and element.tag != 'a':
+                    continue
+                if item is None:
+                    if element.tag == 'div' and ITEM_CLASS in (element.get('class') or '').split():
+                        item, link, title, hot_score = element, None, None, None
+                elif element.tag == 'a' and link is None:
+                    link = element.get('href')
+                continue
+
+            if item is None:
+                continue
+            if element is item:
+                if title is None or hot_score is None or link is None:
+                    raise ValueError("热搜项缺少标题、热度或链接")
+                hot_list.append((len(hot_list) + 1, title, hot_score, link))
+                item = None
+                element.clear()  # 已提取的热搜项不再需要，释放其子树
+                if len(hot_list) >= limit:
+                    return hot_list
+            elif element.tag == 'div':
+                classes = (element.get('class') or '').split()
+                if title is None and TITLE_CLASS in classes:
+                    title = ''.join(element.itertext()).strip()
+                elif hot_score is None and HOT_CLASS in classes:
+                    hot_score = ''.join(element.itertext()).strip()
+    parser.close()
+    return hot_list
+
+
+# 按优先级（实测速度，见 benchmarks/results/baidu_parser.md）排列的解析后端，未安装依赖的后端不可用
+PARSERS: Dict[str, Tuple[Callable[[str, int], List[HotItem]], bool]] = {
+    'selectolax': (parse_with_selectolax, SelectolaxParser is not None),
+    'lxml': (parse_with_lxml, etree is not None),
+    'bs4': (parse_with_bs4, True),
+}
+
+
+def available_parsers() -> List[str]:
+    """当前环境可用的解析后端名称，按优先级排列"""
+    return [name for name, (_, available) in PARSERS.items() if available]
+
+
+def get_parser(name: Optional[str] = None) -> Callable[[str, int], List[HotItem]]:
+    """获取解析函数
+
+    Args:
+        name: 后端名称（selectolax / lxml / bs4），为空时使用可用的最快后端；
+            指定的后端未安装时回退到 bs4
+    """
+    if name is None:
+        name = available_parsers()[0]
+    parse, available = PARSERS.get(name, (None, False))
+    if not available:
+        return parse_with_bs4
+    return parse
+
+
+def parse_hot_list(html: str, limit: int = 100, parser: Optional[str] = None) -> List[HotItem]:
+    """解析百度热搜页面，返回 [(排名, 标题, 热度, 链接), ...]"""
+    return get_parser(parser)(html, limit)
@@ -0,0 +1,375 @@
+import json
+import os
+import random
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional
+
+
+class SystemClock:
+    """真实时钟"""
+
+    def time(self) -> float:
+        return time.time()
+
+    def sleep(self, seconds: float) -> None:
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def wait(self, event: threading.Event, timeout: float) -> bool:
+        """等待 event 最多 timeout 秒，返回 event 是否已被设置"""
+        return event.wait(max(0.0, timeout))
+
+
+class FakeClock:
+    """测试用时钟：sleep/wait 不真正等待，只把当前时间向前推进"""
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+        self.sleeps = []  # 每次 sleep/wait 的秒数，便于检查退避间隔
+        self._lock = threading.Lock()
+
+    def time(self) -> float:
+        with self._lock:
+            return self.now
+
+    def sleep(self, seconds: float) -> None:
+        with self._lock:
+            self.sleeps.append(seconds)
+            self.now += max(0.0, seconds)
+
+    def wait(self, event: threading.Event, timeout: float) -> bool:
+        if not event.is_set():
+            self.sleep(timeout)
+        return event.is_set()
+
+
+def retry(fn: Callable[[], Any], attempts: int = 5, base_delay: float = 1.0, max_delay: float = 60.0,
+          clock=None, rng: random.Random = None, on_retry: Callable[[int, Exception, float], None] = None) -> Any:
+    """调用 fn，失败时按指数退避加随机抖动重试
+
+    第 n 次失败后等待 uniform(0, min(max_delay, base_delay * 2**(n-1))) 秒（full jitter），
+    避免多个任务在同一时刻集中重试。
+
+    Args:
+        fn: 无参函数
+        attempts: 最多尝试次数
+        base_delay: 首次重试的退避上限（秒）
+        max_delay: 退避上限（秒）
+        clock: 时钟，默认 SystemClock
+        rng: 随机数生成器，便于测试时固定抖动
+        on_retry: 每次重试前调用 on_retry(第几次失败, 异常, 等待秒数)
+
+    Returns:
+        fn 的返回值；全部失败时抛出最后一次的异常
+    """
+    clock = clock or SystemClock()
+    rng = rng or random
+    for attempt in range(1, attempts + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= attempts:
+                raise
+            delay = rng.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+            if on_retry:
+                on_retry(attempt, e, delay)
+            clock.sleep(delay)
+
+
+class CheckpointStore:
+    """任务断点，每个任务一个 JSON 文件，写入时先写临时文件再替换，进程崩溃不会留下半个文件"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, f'{name}.json')
+
+    def load(self, name: str) -> Optional[Dict[str, Any]]:
+        """读取断点，不存在或已损坏时返回None"""
+        try:
+            with open(self._path(name), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, name: str, state: Dict[str, Any]) -> None:
+        """保存断点"""
+        path = self._path(name)
+        with self._lock:
+            tmp = f'{path}.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(tmp, path)
+
+    def clear(self, name: str) -> None:
+        """删除断点"""
+        try:
+            os.remove(self._path(name))
+        except FileNotFoundError:
+            pass
+
+
+class CrawlJob:
+    """定时爬取任务基类，子类实现 run(scheduler)"""
+
+    def __init__(self, name: str, interval: float, max_concurrency: int = 1, attempts: int = 5,
+                 base_delay: float = 1.0, max_delay: float = 60.0):
+        """
+        Args:
+            name: 任务名（同时用作断点文件名）
+            interval: 两次运行的间隔秒数（按开始时间计）
+            max_concurrency: 任务内部并发抓取的最大页数
+            attempts: 每页最多尝试次数
+            base_delay: 重试退避初始上限（秒）
+            max_delay: 重试退避上限（秒）
+        """
+        self.name = name
+        self.interval = interval
+        self.max_concurrency = max(1, max_concurrency)
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def retry(self, scheduler: 'CrawlScheduler', fn: Callable[[], Any], what: str) -> Any:
+        """按任务的重试参数调用 fn"""
+        return retry(
+            fn, self.attempts, self.base_delay, self.max_delay, scheduler.clock, scheduler.rng,
+            on_retry=lambda n, e, delay: scheduler.log(f"{self.name}: {what} 第{n}次失败（{e}），{delay:.1f}秒后重试"),
+        )
+
+    def run(self, scheduler: 'CrawlScheduler') -> Any:
+        raise NotImplementedError
+
+
+class DoubanCrawlJob(CrawlJob):
+    """豆瓣榜单爬取：逐页抓取（带重试），每完成一页写一次断点，全部完成后一次性入库
+
+    有页面重试耗尽时本次不入库，其余页面照常抓完并写入断点；
+    进程崩溃或抓取失败后重新运行时，从断点中恢复已完成的页面，只抓取剩余页面；
+    断点早于 interval 时视为过期，重新抓取全部页面。
+    """
+
+    def __init__(self, scraper, start_page: int = 1, end_page: int = 5, interval: float = 3600.0, **kwargs):
+        """
+        Args:
+            scraper: DoubanMovieScraper 实例
+            start_page: 起始页码
+            end_page: 结束页码
+            interval: 运行间隔秒数
+            kwargs: 传给 CrawlJob 的并发和重试参数
+        """
+        super().__init__(kwargs.pop('name', 'douban'), interval, **kwargs)
+        self.scraper = scraper
+        self.start_page = start_page
+        self.end_page = end_page
+
+    def _load_state(self, scheduler):
+        state = scheduler.checkpoints.load(self.name)
+        if (state and state.get('pages_range') == [self.start_page, self.end_page]
+                and scheduler.clock.time() - state.get('created_at', 0) < self.interval):
+            return state
+        return {'pages_range': [self.start_page, self.end_page], 'created_at': scheduler.clock.time(), 'pages': {}}
+
+    def run(self, scheduler):
+        state = self._load_state(scheduler)
+        done = state['pages']
+        pending = [p for p in range(self.start_page, self.end_page + 1) if str(p) not in done]
+        if done:
+            scheduler.log(f"{self.name}: 从断点恢复，已完成 {len(done)} 页，剩余 {len(pending)} 页")
+
+        def fetch(page):
+            return page, self.retry(scheduler, lambda: self.scraper.fetch_page(page, self.start_page), f"第{page}页")
+
+        # 某页重试耗尽时继续等待其他页并写断点，全部结束后再抛出，下次运行只需重抓失败的页
+        failed = {}
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            futures = {executor.submit(fetch, page): page for page in pending}
+            for future in as_completed(futures):
+                try:
+                    page, movies = future.result()
+                except Exception as e:
+                    failed[futures[future]] = e
+                    continue
+                done[str(page)] = movies
+                scheduler.checkpoints.save(self.name, state)
+        if failed:
+            pages = sorted(failed)
+            raise RuntimeError(
+                f"{len(pages)} 页抓取失败 {pages}（第{pages[0]}页: {failed[pages[0]]}），已完成的页面已写入断点"
+            ) from failed[pages[0]]
+
+        movies = [tuple(movie) for page in range(self.start_page, self.end_page + 1) for movie in done[str(page)]]
+        stats = self.scraper.store_to_database(movies)
+        scheduler.checkpoints.clear(self.name)
+        return stats
+
+
+class BaiduCrawlJob(CrawlJob):
+    """百度热搜爬取：抓取失败或结果为空时重试，成功后入库"""
+
+    def __init__(self, fetch: Callable[[], List], store: Callable[[List], Any], interval: float = 600.0,
+                 on_stored: List[Callable[[], None]] = None, **kwargs):
+        """
+        Args:
+            fetch: 抓取函数，如 baidu_hot100_01.get_baidu_hotsearch
+            store: 入库函数，如 baidu_hot100_01.store_hot_list，榜单未变化、没有写入时应返回None
+            interval: 运行间隔秒数
+            on_stored: 确有写入（store 返回非None）后依次调用的无参回调列表，例如 ApiNotifier
+            kwargs: 传给 CrawlJob 的重试参数
+        """
+        super().__init__(kwargs.pop('name', 'baidu'), interval, **kwargs)
+        self.fetch = fetch
+        self.store = store
+        self.on_stored = list(on_stored or [])
+
+    def run(self, scheduler):
+        def fetch():
+            hot_search = self.fetch()
+            if not hot_search:
+                raise RuntimeError("热搜列表为空")
+            return hot_search
+
+        hot_search = self.retry(scheduler, fetch, "抓取热搜")
+        if self.store(hot_search) is not None:
+            for callback in self.on_stored:
+                callback()
+        return {'row_count': len(hot_search)}
+
+
+class ApiNotifier:
+    """入库后通知接口服务检查数据版本（POST /api/cache-invalidate），用作爬虫的 on_stored 回调
+
+    通知失败只记录日志不抛出：数据已经入库，接口各 worker 仍会在 API_DATA_VERSION_TTL 秒内自行发现新版本
+    """
+
+    def __init__(self, url: str, token: Optional[str] = None, timeout: float = 5.0,
+                 logger: Callable[[str], None] = print):
+        """
+        Args:
+            url: 通知地址，如 http://127.0.0.1:5000/api/cache-invalidate
+            token: 登录接口签发的 token，放在 Authorization: Bearer 请求头中
+            timeout: 请求超时秒数
+            logger: 日志函数
+        """
+        self.url = url
+        self.token = token
+        self.timeout = timeout
+        self.log = logger
+
+    def __call__(self) -> bool:
+        """发送通知，返回是否成功"""
+        headers = {'Content-Type': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        request = urllib.request.Request(self.url, data=b'{}', headers=headers, method='POST')
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+            return True
+        except Exception as e:
+            self.log(f"通知接口数据已更新失败（{self.url}）: {e}")
+            return False
+
+
+class CrawlScheduler:
+    """按固定间隔运行多个爬取任务
+
+    - 同一任务不会重叠运行：上一次还没结束时跳过本次，下次按原间隔对齐
+    - 不同任务在各自线程中运行，互不阻塞
+    - 每次间隔加入 ±jitter 比例的随机偏移，避免多个实例同时请求
+    - 任务失败只记录日志，按原间隔继续调度
+    """
+
+    def __init__(self, jobs: List[CrawlJob], checkpoint_dir: str = '.crawl_checkpoints', clock=None,
+                 rng: random.Random = None, jitter: float = 0.1, threaded: bool = True,
+                 logger: Callable[[str], None] = print):
+        """
+        Args:
+            jobs: 任务列表
+            checkpoint_dir: 断点目录
+            clock: 时钟，测试时可传入 FakeClock
+            rng: 随机数生成器
+            jitter: 间隔随机偏移比例（0~1）
+            threaded: 为False时在调度线程内同步运行任务（便于测试）
+            logger: 日志函数
+        """
+        self.jobs = list(jobs)
+        self.checkpoints = CheckpointStore(checkpoint_dir)
+        self.clock = clock or SystemClock()
+        self.rng = rng or random.Random()
+        self.jitter = jitter
+        self.threaded = threaded
+        self.log = logger
+        self.history = []  # (任务名, 开始时间, 耗时, 是否成功, 结果或异常)
+        self._stop = threading.Event()
+        self._running = set()
+        self._lock = threading.Lock()
+        now = self.clock.time()
+        self._next_run = {job.name: now for job in self.jobs}
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(self.jobs))) if threaded else None
+
+    def _schedule_next(self, job: CrawlJob, started: float) -> None:
+        """按开始时间 + interval 安排下一次运行，已错过的周期直接跳过"""
+        interval = job.interval * (1 + self.rng.uniform(-self.jitter, self.jitter))
+        next_run = started + interval
+        now = self.clock.time()
+        if next_run <= now:
+            next_run += (int((now - next_run) // job.interval) + 1) * job.interval
+        self._next_run[job.name] = next_run
+
+    def _run_job(self, job: CrawlJob, started: float) -> None:
+        try:
+            result = job.run(self)
+            ok = True
+            self.log(f"{job.name}: 完成 {result}")
+        except Exception as e:
+            result, ok = e, False
+            self.log(f"{job.name}: 失败 {e}")
+        finally:
+            with self._lock:
+                self._running.discard(job.name)
+        self.history.append((job.name, started, self.clock.time() - started, ok, result))
+
+    def run_pending(self) -> List[str]:
+        """启动所有已到时间且未在运行的任务，返回本次启动的任务名"""
+        now = self.clock.time()
+        started = []
+        for job in self.jobs:
+            if now < self._next_run[job.name]:
+                continue
+            with self._lock:
+                if job.name in self._running:
+                    self._schedule_next(job, self._next_run[job.name])
+                    self.log(f"{job.name}: 上一次运行尚未结束，跳过本次")
+                    continue
+                self._running.add(job.name)
+            self._schedule_next(job, now)
+            started.append(job.name)
+            if self.threaded:
+                self._executor.submit(self._run_job, job, now)
+            else:
+                self._run_job(job, now)
+        return started
+
+    def seconds_until_next(self) -> float:
+        """距下一个任务到期的秒数"""
+        return max(0.0, min(self._next_run.values()) - self.clock.time()) if self._next_run else 60.0
+
+    def run_forever(self) -> None:
+        """持续调度直到调用 stop"""
+        while not self._stop.is_set():
+            self.run_pending()
+            if self.clock.wait(self._stop, self.seconds_until_next()):
+                break
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def stop(self) -> None:
+        """请求停止调度（正在运行的任务会执行完）"""
+        self._stop.set()
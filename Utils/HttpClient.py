@@ -0,0 +1,174 @@
+import gzip
+import http.client
+import threading
+import urllib.error
+import urllib.parse
+import zlib
+from typing import Dict, Optional
+
+try:
+    import brotli  # 可选依赖，安装后才声明支持 br 压缩
+except ImportError:
+    brotli = None
+
+
+class HttpResponse:
+    """HTTP 响应（已解压的响应体）"""
+
+    def __init__(self, url: str, status: int, headers: Dict[str, str], body: bytes, not_modified: bool = False):
+        """
+        Args:
+            url: 最终请求的地址（跟随重定向后）
+            status: 状态码，条件请求命中 304 时为 304
+            headers: 响应头（键为小写）
+            body: 解压后的响应体，304 时为上次缓存的响应体
+            not_modified: 是否为 304 未修改
+        """
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.not_modified = not_modified
+
+    def text(self, default_charset: str = 'utf-8') -> str:
+        """按 Content-Type 中的字符集解码响应体"""
+        charset = default_charset
+        for part in self.headers.get('content-type', '').split(';'):
+            key, _, value = part.strip().partition('=')
+            if key.lower() == 'charset' and value:
+                charset = value.strip('"')
+        return self.body.decode(charset)
+
+
+class HttpClient:
+    """爬虫共用的 HTTP 客户端
+
+    - 每个线程按 (协议, 主机, 端口) 复用 keep-alive 长连接
+    - 自动声明 Accept-Encoding（gzip/deflate，安装 brotli 时加 br）并透明解压
+    - 记录每个地址的 ETag/Last-Modified，下次请求带上 If-None-Match/If-Modified-Since，
+      服务端返回 304 时直接复用上次的响应体
+    """
+
+    REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+    MAX_REDIRECTS = 5
+
+    def __init__(self, timeout: float = 10.0, headers: Optional[Dict[str, str]] = None, conditional: bool = True):
+        """
+        Args:
+            timeout: 连接与读取的超时秒数
+            headers: 每个请求默认附带的请求头
+            conditional: 是否发送条件请求并缓存响应体
+        """
+        self.timeout = timeout
+        self.headers = dict(headers or {})
+        self.conditional = conditional
+        self.accept_encoding = 'gzip, deflate, br' if brotli else 'gzip, deflate'
+        self._local = threading.local()
+        self._validators = {}  # url -> (etag, last_modified, body)
+        self._validators_lock = threading.Lock()
+
+    def _connection(self, scheme: str, netloc: str, fresh: bool = False):
+        """取当前线程到该主机的长连接，fresh 为 True 时重建"""
+        connections = getattr(self._local, 'connections', None)
+        if connections is None:
+            connections = self._local.connections = {}
+        key = (scheme, netloc)
+        connection = connections.get(key)
+        if connection is not None and fresh:
+            connection.close()
+            connection = None
+        if connection is None:
+            connection_class = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+            connection = connection_class(netloc, timeout=self.timeout)
+            connections[key] = connection
+        return connection
+
+    def _decode(self, body: bytes, encoding: str) -> bytes:
+        """按 Content-Encoding 解压响应体"""
+        encoding = encoding.strip().lower()
+        if encoding in ('gzip', 'x-gzip'):
+            return gzip.decompress(body)
+        if encoding == 'deflate':
+            try:
+                return zlib.decompress(body)
+            except zlib.error:
+                return zlib.decompress(body, -zlib.MAX_WBITS)
+        if encoding == 'br' and brotli:
+            return brotli.decompress(body)
+        return body
+
+    def _send(self, url: str, headers: Dict[str, str]):
+        """发送一次 GET 请求并读完响应，连接已被服务端关闭时重连重试一次"""
+        parts = urllib.parse.urlsplit(url)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        for attempt in range(2):
+            connection = self._connection(parts.scheme, parts.netloc, fresh=attempt > 0)
+            try:
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                if attempt:
+                    raise
+                continue
+            except Exception:
+                connection.close()
+                raise
+            if response.will_close:
+                connection.close()
+            return response, {k.lower(): v for k, v in response.getheaders()}, body
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> HttpResponse:
+        """GET 请求
+
+        Args:
+            url: 请求地址
+            headers: 额外请求头，覆盖默认请求头
+
+        Returns:
+            HttpResponse，状态码 >= 400 时抛出 urllib.error.HTTPError
+        """
+        request_headers = {'Accept-Encoding': self.accept_encoding, 'Connection': 'keep-alive'}
+        request_headers.update(self.headers)
+        request_headers.update(headers or {})
+
+        for _ in range(self.MAX_REDIRECTS + 1):
+            cached = None
+            if self.conditional:
+                with self._validators_lock:
+                    cached = self._validators.get(url)
+                if cached:
+                    etag, last_modified, _ = cached
+                    if etag:
+                        request_headers['If-None-Match'] = etag
+                    if last_modified:
+                        request_headers['If-Modified-Since'] = last_modified
+            response, response_headers, body = self._send(url, request_headers)
+            request_headers.pop('If-None-Match', None)
+            request_headers.pop('If-Modified-Since', None)
+
+            if response.status in self.REDIRECT_STATUSES and 'location' in response_headers:
+                url = urllib.parse.urljoin(url, response_headers['location'])
+                continue
+            if response.status == 304 and cached:
+                return HttpResponse(url, 304, response_headers, cached[2], not_modified=True)
+            if response.status >= 400:
+                raise urllib.error.HTTPError(url, response.status, response.reason, response_headers, None)
+
+            body = self._decode(body, response_headers.get('content-encoding', ''))
+            etag = response_headers.get('etag')
+            last_modified = response_headers.get('last-modified')
+            if self.conditional and (etag or last_modified):
+                with self._validators_lock:
+                    self._validators[url] = (etag, last_modified, body)
+            return HttpResponse(url, response.status, response_headers, body)
+
+        raise urllib.error.HTTPError(url, 310, '重定向次数过多', {}, None)
+
+    def close(self) -> None:
+        """关闭当前线程持有的长连接"""
+        for connection in getattr(self._local, 'connections', {}).values():
+            connection.close()
+        self._local.connections = {}
@@ -1,21 +1,626 @@
-from typing import List, Union, Dict, Tuple
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, List, Optional, Union, Dict, Tuple, Iterable, Iterator, Callable
 
 import pymysql
+from pymysql.constants import FIELD_TYPE
+from pymysql.cursors import RE_INSERT_VALUES, SSCursor, SSDictCursor
+
+try:
+    import numpy as np  # 可选依赖：列式查询 query_columns 需要 pip install numpy
+except ImportError:
+    np = None
+
+
+class PoolTimeoutError(Exception):
+    """连接池在超时时间内没有可用连接"""
+
+
+class MySqlPool:
+    """线程安全的 MySQL 连接池
+
+    - 连接总数受 max_size 限制，借不到连接时最多等待 acquire_timeout 秒
+    - 借出前对空闲超过 ping_interval 的连接做 ping 健康检查，失效则重建
+    - 空闲超过 idle_timeout 的连接会被回收
+    - 存活超过 max_lifetime 的连接在归还或借出时关闭重建
+    """
+
+    def __init__(
+            self,
+            host: str = None,
+            user: str = None,
+            password: str = None,
+            database: str = None,
+            port: int = 3306,
+            charset: str = 'utf8mb4',
+            max_size: int = 10,
+            acquire_timeout: float = 10.0,
+            idle_timeout: float = 300.0,
+            max_lifetime: float = 3600.0,
+            ping_interval: float = 30.0,
+    ):
+        """初始化连接池（不会预先建立连接）
+
+        Args:
+            host: 数据库主机地址
+            user: 数据库用户名
+            password: 数据库密码
+            database: 数据库名称
+            port: 数据库端口，默认为3306
+            charset: 字符集，默认为utf8mb4
+            max_size: 连接数上限
+            acquire_timeout: 借连接的最长等待秒数
+            idle_timeout: 空闲连接的最长保留秒数
+            max_lifetime: 单个连接的最长存活秒数
+            ping_interval: 空闲超过该秒数的连接借出前需要 ping 检查
+        """
+        self.connect_kwargs = {
+            'host': host,
+            'user': user,
+            'password': password,
+            'database': database,
+            'port': port,
+            'charset': charset,
+        }
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.ping_interval = ping_interval
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # 元素为 (connection, last_used)，右端为最近归还
+        self._created_at = {}  # id(connection) -> 创建时间
+        self._size = 0
+        self._closed = False
+
+    def _connect(self):
+        """新建一个物理连接"""
+        connection = pymysql.connect(**self.connect_kwargs)
+        self._created_at[id(connection)] = time.monotonic()
+        return connection
+
+    def _discard(self, connection) -> None:
+        """关闭物理连接，忽略关闭过程中的错误"""
+        self._created_at.pop(id(connection), None)
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _expired(self, connection, now: float) -> bool:
+        """连接是否超过最长存活时间"""
+        return now - self._created_at.get(id(connection), now) > self.max_lifetime
+
+    def _evict_idle(self, now: float) -> list:
+        """取出空闲超时的连接（需持有锁），返回待关闭的连接"""
+        evicted = []
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            evicted.append(self._idle.popleft()[0])
+            self._size -= 1
+        return evicted
+
+    def acquire(self, timeout: float = None):
+        """借出一个可用连接
+
+        Args:
+            timeout: 最长等待秒数，默认使用 acquire_timeout
+
+        Returns:
+            pymysql 连接对象
+        """
+        timeout = self.acquire_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        connection, last_used = None, None
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeoutError("连接池已关闭")
+                now = time.monotonic()
+                evicted = self._evict_idle(now)
+                if self._idle:
+                    connection, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                remaining = deadline - now
+                if remaining <= 0:
+                    raise PoolTimeoutError(f"{timeout}秒内未能获取数据库连接")
+                self._cond.wait(remaining)
+        for stale in evicted:
+            self._discard(stale)
+
+        try:
+            if connection is not None:
+                now = time.monotonic()
+                if self._expired(connection, now):
+                    self._discard(connection)
+                    connection = None
+                elif now - last_used > self.ping_interval:
+                    try:
+                        connection.ping(reconnect=False)
+                    except Exception:
+                        self._discard(connection)
+                        connection = None
+            if connection is None:
+                connection = self._connect()
+            return connection
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, connection) -> None:
+        """归还连接，未结束的事务会被回滚
+
+        Args:
+            connection: 由 acquire 借出的连接
+        """
+        try:
+            # 结束事务，避免下一个使用者读到旧的一致性快照
+            connection.rollback()
+            healthy = True
+        except Exception:
+            healthy = False
+
+        now = time.monotonic()
+        with self._cond:
+            if healthy and not self._closed and not self._expired(connection, now):
+                self._idle.append((connection, now))
+                connection = None
+            else:
+                self._size -= 1
+            self._cond.notify()
+        if connection is not None:
+            self._discard(connection)
+
+    def close(self) -> None:
+        """关闭连接池及所有空闲连接，已借出的连接归还时关闭"""
+        with self._cond:
+            self._closed = True
+            idle = [connection for connection, _ in self._idle]
+            self._size -= len(idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for connection in idle:
+            self._discard(connection)
+
+    def reset_after_fork(self) -> None:
+        """fork 后在子进程中调用：丢弃从父进程继承的连接和锁
+
+        继承来的 socket 与父进程共享，这里只丢弃引用而不关闭，避免向服务端发送 COM_QUIT 影响父进程
+        """
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._created_at = {}
+        self._size = 0
+        self._closed = False
+
+    def stats(self) -> Dict[str, int]:
+        """连接池状态：总连接数、空闲连接数"""
+        with self._cond:
+            return {'size': self._size, 'idle': len(self._idle), 'max_size': self.max_size}
+
+
+class ReplicaRouter:
+    """主库 + 只读从库的连接路由
+
+    - 写操作始终使用主库连接池；读操作在健康的从库之间按 round_robin（轮询）或
+      least_latency（按查询耗时的指数滑动平均选最快）选择，没有健康从库时回退到主库
+    - 从库查询出现连接级错误时被剔除 eject_seconds 秒，到期后只放行一个试探请求（其他请求仍不选它），
+      试探成功才恢复流量，失败则剔除时间加倍（最长 max_eject_seconds）；试探请求没有结果时
+      eject_seconds 秒后再放行下一个
+    - check_health 主动 ping 所有从库，失败的剔除、恢复的放回；start_health_checks 在后台线程中定期执行
+    - read_from_primary() 上下文内（或 MySqlHelper(read_your_writes=True)）的读操作走主库，
+      用于刚写入后需要立即读到的请求
+    """
+
+    STRATEGIES = ('round_robin', 'least_latency')
+
+    def __init__(
+            self,
+            primary: MySqlPool,
+            replicas: List[MySqlPool] = None,
+            strategy: str = 'round_robin',
+            eject_seconds: float = 10.0,
+            max_eject_seconds: float = 300.0,
+            latency_decay: float = 0.2,
+    ):
+        """
+        Args:
+            primary: 主库连接池
+            replicas: 从库连接池列表
+            strategy: 从库选择策略，round_robin 或 least_latency
+            eject_seconds: 从库首次失败后的剔除秒数
+            max_eject_seconds: 连续失败时剔除秒数的上限
+            latency_decay: 耗时滑动平均中新样本的权重
+        """
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"不支持的从库选择策略: {strategy}")
+        self.primary = primary
+        self.replicas = list(replicas or [])
+        self.strategy = strategy
+        self.eject_seconds = eject_seconds
+        self.max_eject_seconds = max_eject_seconds
+        self.latency_decay = latency_decay
+        self._lock = threading.Lock()
+        self._next = 0
+        self._latency = {id(pool): 0.0 for pool in self.replicas}  # 查询耗时滑动平均
+        self._ejected_until = {}  # id(pool) -> 剔除截止时间
+        self._failures = {}  # id(pool) -> 连续失败次数
+        self._probing = {}  # id(pool) -> 试探请求的租约截止时间，期间不再放行其他请求
+        self._primary_reads = threading.local()
+        self._health_interval = None
+        self._health_stop = threading.Event()
+        self._health_thread = None
+
+    @classmethod
+    def from_config(cls, primary_config: Dict, replica_configs: List[Dict] = None, max_size: int = 10, **kwargs):
+        """按连接配置字典创建主库和各从库的连接池"""
+        return cls(
+            MySqlPool(**primary_config, max_size=max_size),
+            [MySqlPool(**config, max_size=max_size) for config in replica_configs or []],
+            **kwargs,
+        )
+
+    # 读一致性
+    def read_from_primary(self):
+        """上下文管理器：当前线程内的读操作改走主库（可嵌套）"""
+        router = self
+
+        class _PrimaryReads:
+            def __enter__(self):
+                router._primary_reads.depth = getattr(router._primary_reads, 'depth', 0) + 1
+
+            def __exit__(self, exc_type, exc_val, exc_tb):
+                router._primary_reads.depth -= 1
+
+        return _PrimaryReads()
+
+    def primary_reads_requested(self) -> bool:
+        """当前线程是否要求读主库"""
+        return getattr(self._primary_reads, 'depth', 0) > 0
+
+    # 从库选择与健康状态
+    def _healthy(self, now: float) -> list:
+        """未被剔除的从库"""
+        return [pool for pool in self.replicas if id(pool) not in self._ejected_until]
+
+    def _probe_candidate(self, now: float) -> Optional[MySqlPool]:
+        """剔除已到期、且没有试探请求在进行中的从库"""
+        for pool in self.replicas:
+            key = id(pool)
+            if self._ejected_until.get(key, now + 1) <= now and self._probing.get(key, 0) <= now:
+                return pool
+        return None
+
+    def choose_replica(self) -> Optional[MySqlPool]:
+        """选择一个从库，没有可用从库时返回None；剔除到期的从库只交给一个请求试探"""
+        with self._lock:
+            now = time.monotonic()
+            probe = self._probe_candidate(now)
+            if probe is not None:
+                self._probing[id(probe)] = now + self.eject_seconds
+                return probe
+            healthy = self._healthy(now)
+            if not healthy:
+                return None
+            if self.strategy == 'least_latency':
+                return min(healthy, key=lambda pool: self._latency[id(pool)])
+            self._next = (self._next + 1) % len(healthy)
+            return healthy[self._next]
+
+    def record_success(self, pool: MySqlPool, seconds: float) -> None:
+        """从库查询成功：更新耗时滑动平均并清除失败计数"""
+        with self._lock:
+            key = id(pool)
+            previous = self._latency.get(key, 0.0)
+            self._latency[key] = seconds if previous == 0.0 else (
+                previous + self.latency_decay * (seconds - previous))
+            if key in self._failures:
+                self._failures.pop(key)
+                self._ejected_until.pop(key, None)
+                self._probing.pop(key, None)
+
+    def record_failure(self, pool: MySqlPool) -> None:
+        """从库连接失败：剔除一段时间，连续失败时剔除时间加倍"""
+        with self._lock:
+            key = id(pool)
+            failures = self._failures.get(key, 0) + 1
+            self._failures[key] = failures
+            seconds = min(self.max_eject_seconds, self.eject_seconds * 2 ** (failures - 1))
+            self._ejected_until[key] = time.monotonic() + seconds
+            self._probing.pop(key, None)
+
+    def check_health(self) -> Dict[str, bool]:
+        """主动 ping 所有从库，失败的剔除、恢复的放回，返回 {host:port: 是否健康}
+
+        连接池已满（连接都在执行查询）时不 ping，也不改变健康状态
+        """
+        result = {}
+        for pool in self.replicas:
+            name = f"{pool.connect_kwargs['host']}:{pool.connect_kwargs['port']}"
+            try:
+                connection = pool.acquire(timeout=1.0)
+            except PoolTimeoutError:
+                with self._lock:
+                    result[name] = id(pool) not in self._ejected_until
+                continue
+            except Exception:
+                self.record_failure(pool)
+                result[name] = False
+                continue
+            try:
+                started = time.perf_counter()
+                connection.ping(reconnect=False)
+                self.record_success(pool, time.perf_counter() - started)
+                result[name] = True
+            except Exception:
+                self.record_failure(pool)
+                result[name] = False
+            finally:
+                pool.release(connection)
+        return result
+
+    def start_health_checks(self, interval: float = 5.0) -> None:
+        """启动后台线程，每 interval 秒执行一次 check_health（每个进程一个线程，重复调用无效）"""
+        if not self.replicas or (self._health_thread is not None and self._health_thread.is_alive()):
+            return
+        self._health_interval = interval
+        self._health_stop = threading.Event()
+        self._health_thread = threading.Thread(target=self._health_loop, name='replica-health', daemon=True)
+        self._health_thread.start()
+
+    def _health_loop(self) -> None:
+        stop = self._health_stop
+        while not stop.wait(self._health_interval):
+            try:
+                self.check_health()
+            except Exception as e:
+                print(f"从库健康检查失败: {e}")
+
+    def close(self) -> None:
+        """停止健康检查并关闭所有连接池"""
+        self._health_stop.set()
+        for pool in [self.primary] + self.replicas:
+            pool.close()
+
+    def reset_after_fork(self) -> None:
+        """fork 后在子进程中调用；父进程启动过健康检查时在子进程中重新启动（线程不会随 fork 复制）"""
+        for pool in [self.primary] + self.replicas:
+            pool.reset_after_fork()
+        self._lock = threading.Lock()
+        self._health_thread = None
+        if self._health_interval is not None:
+            self.start_health_checks(self._health_interval)
+
+    def stats(self) -> Dict[str, Any]:
+        """各连接池状态及从库健康情况"""
+        now = time.monotonic()
+        with self._lock:
+            replicas = [
+                dict(pool.stats(), host=pool.connect_kwargs['host'], port=pool.connect_kwargs['port'],
+                     healthy=id(pool) not in self._ejected_until,
+                     probing=self._probing.get(id(pool), 0) > now,
+                     latency_ms=round(self._latency[id(pool)] * 1000, 3))
+                for pool in self.replicas
+            ]
+        return {'primary': self.primary.stats(), 'replicas': replicas, 'strategy': self.strategy}
+
+
+# 列式查询结果中各 MySQL 字段类型对应的列类型
+_INT_FIELDS = {FIELD_TYPE.TINY, FIELD_TYPE.SHORT, FIELD_TYPE.LONG, FIELD_TYPE.LONGLONG, FIELD_TYPE.INT24,
+               FIELD_TYPE.YEAR}
+_FLOAT_FIELDS = {FIELD_TYPE.DECIMAL, FIELD_TYPE.NEWDECIMAL, FIELD_TYPE.FLOAT, FIELD_TYPE.DOUBLE}
+_DATE_FIELDS = {FIELD_TYPE.DATE, FIELD_TYPE.NEWDATE}
+_DATETIME_FIELDS = {FIELD_TYPE.DATETIME, FIELD_TYPE.TIMESTAMP}
+_STRING_FIELDS = {FIELD_TYPE.VARCHAR, FIELD_TYPE.VAR_STRING, FIELD_TYPE.STRING, FIELD_TYPE.TINY_BLOB,
+                  FIELD_TYPE.MEDIUM_BLOB, FIELD_TYPE.LONG_BLOB, FIELD_TYPE.BLOB, FIELD_TYPE.ENUM, FIELD_TYPE.SET,
+                  FIELD_TYPE.JSON}
+
+
+class DictionaryArray:
+    """字典编码的字符串列：dictionary 为按首次出现顺序排列的不同取值，codes[i] 为第 i 行取值的下标，NULL 为 -1
+
+    重复取值多的列（类型、地区组合）只保存一份字符串，按取值计数只需对 codes 做 bincount。
+    """
+
+    __slots__ = ('codes', 'dictionary')
+
+    def __init__(self, codes: 'np.ndarray', dictionary: List[str]):
+        self.codes = codes
+        self.dictionary = dictionary
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def value_counts(self) -> Tuple[List[str], 'np.ndarray']:
+        """各取值出现的行数（NULL 不计），按 dictionary 顺序"""
+        codes = self.codes[self.codes >= 0]
+        return self.dictionary, np.bincount(codes, minlength=len(self.dictionary))
+
+    def to_pylist(self, mask: 'np.ndarray' = None) -> List[Optional[str]]:
+        """解码为字符串列表，mask 为布尔数组时只取对应的行"""
+        codes = self.codes if mask is None else self.codes[mask]
+        dictionary = self.dictionary
+        return [dictionary[code] if code >= 0 else None for code in codes.tolist()]
+
+    @property
+    def nbytes(self) -> int:
+        """codes 数组与字典字符串占用的字节数"""
+        return self.codes.nbytes + sum(sys.getsizeof(value) for value in self.dictionary)
+
+
+class ColumnBatch:
+    """列式查询结果：列名 -> NumPy 数组或 DictionaryArray
+
+    - 整数列为 int64，含 NULL 时为 float64（NULL 为 NaN）；DECIMAL/FLOAT/DOUBLE 为 float64
+    - DATE 为 datetime64[D]、DATETIME/TIMESTAMP 为 datetime64[us]（NULL 为 NaT）
+    - 字符串列为 DictionaryArray（dictionary_encode=False 时为 object 数组），其他类型为 object 数组
+    """
+
+    def __init__(self, columns: Dict[str, Any], num_rows: int):
+        self.columns = columns
+        self.num_rows = num_rows
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple], description, dictionary_encode: bool = True,
+                  batch_size: int = 10000) -> 'ColumnBatch':
+        """由元组行和游标的 description 构建（query_columns 使用相同的转换）"""
+        if np is None:
+            raise RuntimeError("列式查询需要安装 numpy: pip install numpy")
+        builder = _ColumnBuilder(description, dictionary_encode)
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                builder.append(batch)
+                batch = []
+        builder.append(batch)
+        return builder.finish()
+
+    @property
+    def column_names(self) -> List[str]:
+        return list(self.columns)
+
+    def __getitem__(self, name: str):
+        return self.columns[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+    @property
+    def nbytes(self) -> int:
+        """各列占用的字节数之和（object 数组只计指针）"""
+        return sum(column.nbytes for column in self.columns.values())
+
+    def to_pylist(self) -> List[Dict[str, Any]]:
+        """转换为与 DictCursor 相同形式的字典列表（数值为 Python 数值，NULL 为 None）"""
+        names = list(self.columns)
+        decoded = []
+        for column in self.columns.values():
+            if isinstance(column, DictionaryArray):
+                decoded.append(column.to_pylist())
+            elif column.dtype.kind == 'f':
+                decoded.append([None if value != value else value for value in column.tolist()])
+            else:
+                decoded.append(column.tolist())
+        return [dict(zip(names, values)) for values in zip(*decoded)]
+
+
+class _ColumnBuilder:
+    """按批把游标返回的元组行转换为列数组，字符串列在各批之间共用同一个字典"""
+
+    def __init__(self, description, dictionary_encode: bool = True):
+        self.names = [column[0] for column in description]
+        self.kinds = []
+        for column in description:
+            type_code = column[1]
+            if type_code in _INT_FIELDS:
+                self.kinds.append('int')
+            elif type_code in _FLOAT_FIELDS:
+                self.kinds.append('float')
+            elif type_code in _DATE_FIELDS:
+                self.kinds.append('date')
+            elif type_code in _DATETIME_FIELDS:
+                self.kinds.append('datetime')
+            elif type_code in _STRING_FIELDS and dictionary_encode:
+                self.kinds.append('dict')
+            else:
+                self.kinds.append('object')
+        self.chunks = [[] for _ in self.names]
+        self.indexes = [{} for _ in self.names]  # 字符串列：取值 -> 字典下标
+        self.num_rows = 0
+
+    def append(self, rows: List[tuple]) -> None:
+        """追加一批元组行"""
+        count = len(rows)
+        if not count:
+            return
+        nan = float('nan')
+        for i, (kind, values) in enumerate(zip(self.kinds, zip(*rows))):
+            if kind == 'int':
+                if None in values:
+                    array = np.fromiter((nan if v is None else v for v in values), dtype=np.float64, count=count)
+                else:
+                    array = np.fromiter(values, dtype=np.int64, count=count)
+            elif kind == 'float':
+                array = np.fromiter((nan if v is None else float(v) for v in values), dtype=np.float64, count=count)
+            elif kind == 'date':
+                array = np.array(values, dtype='datetime64[D]')
+            elif kind == 'datetime':
+                array = np.array(values, dtype='datetime64[us]')
+            elif kind == 'dict':
+                index = self.indexes[i]
+                setdefault = index.setdefault
+                array = np.fromiter(
+                    (-1 if v is None else setdefault(v, len(index)) for v in values), dtype=np.int32, count=count
+                )
+            else:
+                array = np.empty(count, dtype=object)
+                array[:] = values
+            self.chunks[i].append(array)
+        self.num_rows += count
+
+    def finish(self) -> ColumnBatch:
+        """合并各批，生成 ColumnBatch"""
+        columns = {}
+        empty = {'int': np.int64, 'float': np.float64, 'date': 'datetime64[D]', 'datetime': 'datetime64[us]',
+                 'dict': np.int32, 'object': object}
+        for name, kind, chunks, index in zip(self.names, self.kinds, self.chunks, self.indexes):
+            array = np.concatenate(chunks) if chunks else np.empty(0, dtype=empty[kind])
+            columns[name] = DictionaryArray(array, list(index)) if kind == 'dict' else array
+        return ColumnBatch(columns, self.num_rows)
 
 
 class MySqlHelper:
     from typing import Optional, Any, Type
     from pymysql.cursors import Cursor, DictCursor
 
+    # 查询监听器，所有实例共享：callback(event, sql, rows, seconds, error)
+    # event 为 connect（建立/借用连接）、query（执行查询）、fetch（读取结果）、execute（增删改）
+    listeners = []
+
+    @classmethod
+    def add_listener(cls, callback: Callable) -> None:
+        """注册查询监听器（用于耗时统计、慢查询日志等）"""
+        if callback not in cls.listeners:
+            cls.listeners.append(callback)
+
+    @classmethod
+    def remove_listener(cls, callback: Callable) -> None:
+        """移除查询监听器"""
+        if callback in cls.listeners:
+            cls.listeners.remove(callback)
+
+    def _notify(self, event: str, sql: Optional[str], rows: int, seconds: float, error: Exception = None) -> None:
+        """通知监听器，监听器自身的异常不影响数据库操作"""
+        for callback in self.listeners:
+            try:
+                callback(event, sql, rows, seconds, error)
+            except Exception:
+                pass
+
     def __init__(
             self,
-            host: Optional[str],  # 允许 None
-            user: Optional[str],  # 允许 None
-            password: Optional[str],  # 允许 None
-            database: Optional[str],  # 允许 None
+            host: Optional[str] = None,  # 允许 None
+            user: Optional[str] = None,  # 允许 None
+            password: Optional[str] = None,  # 允许 None
+            database: Optional[str] = None,  # 允许 None
             port: int = 3306,
             charset: str = 'utf8mb4',
             cursor_class: Optional[Type[Cursor]] = DictCursor,  # 允许 None，默认 DictCursor
+            pool: Optional[MySqlPool] = None,
+            router: Optional[ReplicaRouter] = None,
+            read_your_writes: bool = False,
     ):
         """初始化数据库连接
 
@@ -27,8 +632,23 @@ class MySqlHelper:
             port: 数据库端口，默认为3306
             charset: 字符集，默认为utf8mb4
             cursor_class: 游标类型，默认为 DictCursor
+            pool: 连接池，传入时从池中借用连接（忽略上面的连接参数），close 时归还
+            router: 主从路由（ReplicaRouter），传入时忽略 pool 和连接参数：写操作使用主库，
+                读操作使用从库，连接在第一次使用时才借用；本对象执行过写操作后，后续读操作也走主库
+            read_your_writes: 为True时本对象的读操作全部走主库（仅 router 模式有效）
         """
-        self.connection = pymysql.connect(
+        self.pool = pool
+        self.router = router
+        self.read_your_writes = read_your_writes
+        self._target = None  # router 模式下当前使用的连接：'primary' 或 'replica'
+        self._cursor_class = cursor_class
+        self._reopen = False  # 连接被 _discard_connection 断开，下次操作时重新连接
+        if router is not None:
+            self._targets = {}  # 'primary'/'replica' -> (连接池, 连接, 游标)
+            self.connection = None
+            self.cursor = None
+            return
+        self._connect_args = dict(
             host=host,
             user=user,
             password=password,
@@ -37,7 +657,96 @@ class MySqlHelper:
             charset=charset,
             cursorclass=cursor_class,
         )
-        self.cursor = self.connection.cursor()
+        self._open()
+
+    def _open(self) -> None:
+        """建立连接（或从连接池借用）并创建游标（非 router 模式）"""
+        started = time.perf_counter()
+        if self.pool is not None:
+            self.connection = self.pool.acquire()
+        else:
+            self.connection = pymysql.connect(**self._connect_args)
+        self.cursor = self.connection.cursor(self._cursor_class)
+        self._reopen = False
+        if self.listeners:
+            self._notify('connect', None, 0, time.perf_counter() - started)
+
+    def _use(self, write: bool) -> None:
+        """router 模式下切换到主库或从库连接（按需借用）；非 router 模式下只在连接被断开后重新连接"""
+        if self.router is None:
+            if self._reopen:
+                self._open()
+            return
+        if write:
+            self.read_your_writes = True  # 写过之后本对象的读也走主库，保证读到自己的写入
+        target = 'primary' if self.read_your_writes or self.router.primary_reads_requested() else 'replica'
+        if target not in self._targets:
+            started = time.perf_counter()
+            pool = self.router.choose_replica() if target == 'replica' else None
+            if pool is not None:
+                connection = None
+                try:
+                    connection = pool.acquire()
+                    self._targets[target] = (pool, connection, connection.cursor(self._cursor_class))
+                except Exception as e:
+                    # 从库不可用：剔除后本次读操作回退到主库
+                    print(f"从库连接失败，已剔除: {e}")
+                    self.router.record_failure(pool)
+                    if connection is not None:
+                        try:
+                            connection.close()
+                        except Exception:
+                            pass
+                        pool.release(connection)
+                    pool = None
+            if pool is None:
+                target = 'primary'
+            if target not in self._targets:
+                connection = self.router.primary.acquire()
+                self._targets[target] = (self.router.primary, connection, connection.cursor(self._cursor_class))
+            if self.listeners:
+                self._notify('connect', None, 0, time.perf_counter() - started)
+        self._target = target
+        _, self.connection, self.cursor = self._targets[target]
+
+    def _drop_replica(self) -> None:
+        """当前从库连接出错：剔除该从库并归还（丢弃）连接，下次读操作重新选择"""
+        pool, connection, cursor = self._targets.pop('replica')
+        self.router.record_failure(pool)
+        try:
+            cursor.close()
+        except Exception:
+            pass
+        try:
+            connection.close()
+        except Exception:
+            pass
+        pool.release(connection)
+        self.connection, self.cursor, self._target = None, None, None
+
+    def _discard_connection(self, connection) -> None:
+        """断开连接（未读完的结果随之丢弃）并归还连接池（池会丢弃它），下次操作时重新连接或借用"""
+        result = getattr(connection, '_result', None)
+        if result is not None:
+            # 剩余结果不再读取，否则 pymysql 回收结果对象时会尝试从已关闭的连接读完
+            result.unbuffered_active = False
+        try:
+            connection.close()
+        except Exception:
+            pass
+        if self.router is not None:
+            for target, (pool, target_connection, _) in list(self._targets.items()):
+                if target_connection is connection:
+                    del self._targets[target]
+                    pool.release(connection)
+            if self.connection is connection:
+                self.connection, self.cursor, self._target = None, None, None
+            return
+        if self.connection is connection:
+            if self.pool is not None:
+                self.pool.release(connection)
+            self.connection, self.cursor = None, None
+            self._reopen = True
 
     def __enter__(self):
         """支持上下文管理器"""
@@ -59,34 +768,62 @@ class MySqlHelper:
         Returns:
             执行是否成功
         """
+        self._use(True)
+        started = time.perf_counter()
         try:
             if many:
                 self.cursor.executemany(query, params)
             else:
                 self.cursor.execute(query, params)
             self.connection.commit()
+            if self.listeners:
+                self._notify('execute', query, self.cursor.rowcount, time.perf_counter() - started)
             return True
         except Exception as e:
             print(f"操作执行失败: {e}")
             self.connection.rollback()
+            if self.listeners:
+                self._notify('execute', query, 0, time.perf_counter() - started, e)
             return False
 
-    def _query(self, query: str, params=None, fetch_all: bool = True):
+    def _query(self, query: str, params=None, fetch_all: bool = True, retry: bool = True):
         """底层查询方法（私有方法）
 
         Args:
             query: SQL查询语句
             params: 查询参数
             fetch_all: 是否获取所有结果
+            retry: router 模式下从库连接出错时是否换一个从库（或主库）重试一次
 
         Returns:
             查询结果或None(出错时)
         """
+        try:
+            self._use(False)
+        except Exception as e:
+            print(f"查询执行失败: {e}")
+            return None
+        started = time.perf_counter()
         try:
             self.cursor.execute(query, params)
-            return self.cursor.fetchall() if fetch_all else self.cursor.fetchone()
+            executed = time.perf_counter()
+            result = self.cursor.fetchall() if fetch_all else self.cursor.fetchone()
+            if self._target == 'replica':
+                self.router.record_success(self._targets['replica'][0], time.perf_counter() - started)
+            if self.listeners:
+                rows = len(result) if fetch_all else int(result is not None)
+                self._notify('query', query, rows, executed - started)
+                self._notify('fetch', query, rows, time.perf_counter() - executed)
+            return result
         except Exception as e:
+            if (self.router is not None and self._target == 'replica' and retry
+                    and isinstance(e, (pymysql.err.OperationalError, pymysql.err.InterfaceError))):
+                print(f"从库查询失败，已剔除并重试: {e}")
+                self._drop_replica()
+                return self._query(query, params, fetch_all, retry=False)
             print(f"查询执行失败: {e}")
+            if self.listeners:
+                self._notify('query', query, 0, time.perf_counter() - started, e)
             return None
 
     # 公开的单条操作方法
@@ -126,6 +863,124 @@ class MySqlHelper:
         """
         return self._query(query, params, fetch_all=False)
 
+    def query_batches(
+            self,
+            query: str,
+            params: Union[Tuple, Dict[str, Any]] = None,
+            batch_size: int = 1000,
+            cursor_class: Optional[Type[Cursor]] = None,
+            discard_on_abort: bool = False,
+    ) -> Iterator[List]:
+        """使用服务端（非缓冲）游标执行查询，每次产出最多 batch_size 行的列表
+
+        结果不会一次性读入客户端内存，适合全表扫描等大结果集。与 query 不同，出错时直接抛出异常。
+        迭代期间该连接不能执行其他语句；迭代结束或中途停止（break、异常、生成器被回收）时游标会关闭。
+
+        Args:
+            query: SQL查询语句
+            params: 查询参数
+            batch_size: 每次从服务端读取的行数
+            cursor_class: 非缓冲游标类型，默认按本对象的游标类型选择 SSDictCursor 或 SSCursor
+            discard_on_abort: 中途停止时直接断开连接（连接池归还时会丢弃该连接），
+                而不是把剩余结果读完再丢弃；剩余结果很多时更快
+        """
+        return self._stream_batches(query, params, batch_size, cursor_class, discard_on_abort)
+
+    def _stream_batches(self, query, params, batch_size, cursor_class, discard_on_abort, on_execute=None):
+        """query_batches 的实现，on_execute(cursor) 在语句执行后、读取结果前调用（如读取列信息）"""
+        self._use(False)
+        if cursor_class is None:
+            cursor_class = SSDictCursor if isinstance(self.cursor, self.DictCursor) else SSCursor
+        connection = self.connection
+        cursor = connection.cursor(cursor_class)
+        started = time.perf_counter()
+        executed = None
+        rows = 0
+        finished = False
+        error = None
+        try:
+            cursor.execute(query, params)
+            executed = time.perf_counter()
+            if on_execute is not None:
+                on_execute(cursor)
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                rows += len(batch)
+                yield batch
+            finished = True
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            if not finished and discard_on_abort:
+                self._discard_connection(connection)
+            else:
+                try:
+                    cursor.close()  # 读完并丢弃未读取的结果，连接可继续使用
+                except Exception:
+                    self._discard_connection(connection)
+            if self.listeners:
+                now = time.perf_counter()
+                self._notify('query', query, rows, (executed or now) - started, error)
+                if executed is not None:
+                    self._notify('fetch', query, rows, now - executed)
+
+    def query_iter(
+            self,
+            query: str,
+            params: Union[Tuple, Dict[str, Any]] = None,
+            batch_size: int = 1000,
+            cursor_class: Optional[Type[Cursor]] = None,
+            discard_on_abort: bool = False,
+    ) -> Iterator:
+        """使用服务端游标逐行产出查询结果，内存占用与结果总行数无关，参数见 query_batches
+
+        用法:
+            with MySqlHelper(**config) as db:
+                for row in db.query_iter("SELECT * FROM douban_hot100_list", batch_size=5000):
+                    ...
+        """
+        batches = self.query_batches(query, params, batch_size, cursor_class, discard_on_abort)
+        try:
+            for batch in batches:
+                yield from batch
+        finally:
+            batches.close()
+
+    def query_columns(
+            self,
+            query: str,
+            params: Union[Tuple, Dict[str, Any]] = None,
+            batch_size: int = 10000,
+            dictionary_encode: bool = True,
+    ) -> ColumnBatch:
+        """执行查询并以列式返回结果（ColumnBatch），供 NumPy 向量化统计使用
+
+        使用服务端游标按 batch_size 行分批读取元组并转换为列数组，不为每行创建字典；
+        客户端同一时刻只保留一批元组行。与 query 不同，出错时直接抛出异常。
+
+        Args:
+            query: SQL查询语句
+            params: 查询参数
+            batch_size: 每次从服务端读取的行数
+            dictionary_encode: 字符串列是否字典编码为 DictionaryArray
+
+        Returns:
+            ColumnBatch
+        """
+        if np is None:
+            raise RuntimeError("列式查询需要安装 numpy: pip install numpy")
+        builders = []
+        batches = self._stream_batches(
+            query, params, batch_size, SSCursor, False,
+            on_execute=lambda cursor: builders.append(_ColumnBuilder(cursor.description or (), dictionary_encode)),
+        )
+        for batch in batches:
+            builders[0].append(batch)
+        return builders[0].finish()
+
     def insert(self, query: str, params: Union[Tuple, Dict[str, Any]]) -> bool:
         """插入单条数据
 
@@ -211,9 +1066,153 @@ class MySqlHelper:
         """
         return self.execute_many(query, params_list)
 
+    # 表结构辅助方法
+    def add_missing_columns(self, table: str, columns: Dict[str, str]) -> List[str]:
+        """为已有表补充缺少的列
+
+        Args:
+            table: 表名
+            columns: 列名 -> 列定义，如 {'snapshot_id': 'INT'}
+
+        Returns:
+            实际新增的列名
+        """
+        rows = self.query(
+            "SELECT COLUMN_NAME AS name FROM information_schema.COLUMNS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            (table,)
+        )
+        existing = {row['name'] for row in rows or []}
+        added = []
+        for column, definition in columns.items():
+            if column not in existing and self.execute(f"ALTER TABLE {table} ADD COLUMN `{column}` {definition}"):
+                added.append(column)
+        return added
+
+    def index_exists(self, table: str, index: str) -> bool:
+        """判断表上是否已有指定名称的索引"""
+        row = self.query_one(
+            "SELECT 1 AS found FROM information_schema.STATISTICS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s LIMIT 1",
+            (table, index)
+        )
+        return bool(row)
+
+    # 流式分块批量导入
+    def _max_allowed_packet(self) -> int:
+        """读取服务端 max_allowed_packet，失败时按 4MB 处理"""
+        self._use(True)
+        try:
+            self.cursor.execute("SELECT @@max_allowed_packet AS size")
+            row = self.cursor.fetchone()
+            return int(row['size'] if isinstance(row, dict) else row[0])
+        except Exception:
+            return 4 * 1024 * 1024
+
+    def _execute_chunk(self, sql: str) -> bool:
+        """执行并提交一个分块，失败时回滚该分块"""
+        self._use(True)
+        started = time.perf_counter()
+        try:
+            self.cursor.execute(sql)
+            self.connection.commit()
+            if self.listeners:
+                self._notify('execute', sql, self.cursor.rowcount, time.perf_counter() - started)
+            return True
+        except Exception as e:
+            print(f"分块写入失败: {e}")
+            self.connection.rollback()
+            if self.listeners:
+                self._notify('execute', sql, 0, time.perf_counter() - started, e)
+            return False
+
+    def bulk_insert(
+            self,
+            query: str,
+            rows: Iterable[Union[Tuple, Dict[str, Any]]],
+            chunk_size: int = 1000,
+            max_packet: int = None,
+            progress: Callable[[Dict[str, Any]], None] = None,
+    ) -> Dict[str, Any]:
+        """流式分块批量插入
+
+        逐条消费 rows（可以是生成器），拼成多行 VALUES 语句，每块不超过 chunk_size 行且
+        不超过 max_allowed_packet，每块单独提交。某块失败时回滚该块并逐行重试，
+        只有出错的行会被丢弃，内存占用与数据总量无关。
+
+        Args:
+            query: 单行插入语句，如 INSERT INTO t (a, b) VALUES (%s, %s)，可带 ON DUPLICATE KEY UPDATE
+            rows: 参数的可迭代对象
+            chunk_size: 每块最多行数
+            max_packet: 每条语句最大字节数，默认读取服务端 max_allowed_packet
+            progress: 每提交一块后调用，参数为当前统计信息
+
+        Returns:
+            统计信息：rows 写入行数、failed_rows 失败行数、chunks 块数、seconds 耗时、rows_per_sec 速率
+        """
+        match = RE_INSERT_VALUES.match(query)
+        if not match:
+            raise ValueError("bulk_insert 只支持 INSERT/REPLACE ... VALUES (...) 语句")
+        prefix, values_template, postfix = match.group(1, 2, 3)
+        if max_packet is None:
+            # 预留 1KB 给语句头尾和协议开销
+            max_packet = self._max_allowed_packet() - 1024
+        prefix_size = len((prefix + postfix).encode('utf-8'))
+
+        stats = {'rows': 0, 'failed_rows': 0, 'chunks': 0, 'seconds': 0.0, 'rows_per_sec': 0.0}
+        started = time.perf_counter()
+        chunk, chunk_bytes = [], prefix_size
+
+        def flush():
+            if not chunk:
+                return
+            if self._execute_chunk(prefix + ','.join(chunk) + postfix):
+                stats['rows'] += len(chunk)
+            else:
+                for values in chunk:
+                    if self._execute_chunk(prefix + values + postfix):
+                        stats['rows'] += 1
+                    else:
+                        stats['failed_rows'] += 1
+            stats['chunks'] += 1
+            stats['seconds'] = time.perf_counter() - started
+            stats['rows_per_sec'] = stats['rows'] / stats['seconds'] if stats['seconds'] else 0.0
+            if progress:
+                progress(dict(stats))
+
+        self._use(True)
+        for row in rows:
+            values = self.cursor.mogrify(values_template, row)
+            size = len(values.encode('utf-8')) + 1
+            if chunk and (len(chunk) >= chunk_size or chunk_bytes + size > max_packet):
+                flush()
+                chunk, chunk_bytes = [], prefix_size
+            chunk.append(values)
+            chunk_bytes += size
+        flush()
+
+        stats['seconds'] = time.perf_counter() - started
+        stats['rows_per_sec'] = stats['rows'] / stats['seconds'] if stats['seconds'] else 0.0
+        return stats
+
     def close(self) -> None:
-        """关闭数据库连接"""
+        """关闭数据库连接，连接来自连接池时归还给连接池"""
+        if self.router is not None:
+            for pool, connection, cursor in self._targets.values():
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+                pool.release(connection)
+            self._targets.clear()
+            self.connection, self.cursor, self._target = None, None, None
+            return
         if hasattr(self, 'cursor') and self.cursor:
             self.cursor.close()
+            self.cursor = None
         if hasattr(self, 'connection') and self.connection:
-            self.connection.close()
+            if self.pool is not None:
+                self.pool.release(self.connection)
+            elif getattr(self.connection, 'open', True):
+                self.connection.close()
+            self.connection = None
@@ -0,0 +1,149 @@
+"""本地 MySQL 协议桩服务器，供测试使用
+
+用 mysql-mimic 实现 MySQL 网络协议，收到的语句经 sqlglot 从 MySQL 方言转换为 SQLite 后在内存库中执行，
+pymysql / aiomysql 可以像连接真实 MySQL 一样连接它（可选依赖：pip install mysql-mimic）。
+
+只用于查询路径的测试：
+    - 支持 sqlglot 能转换的 SELECT / INSERT / UPDATE / DELETE，建表和造数据用 execute_script 直接写入 SQLite
+    - 写语句不返回受影响行数和自增 id，COMMIT / ROLLBACK 被忽略（SQLite 连接为自动提交）
+    - 结果列的类型按该列第一个非 NULL 值推断
+
+用法:
+    with MySqlStubServer() as server:
+        server.execute_script("CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT); INSERT INTO t VALUES (1, 'a');")
+        connection = pymysql.connect(**server.db_config)
+"""
+import asyncio
+import sqlite3
+import threading
+from decimal import Decimal
+from typing import Any, Dict, List
+
+try:
+    from mysql_mimic import MysqlServer, ResultColumn, Session  # 可选依赖：pip install mysql-mimic
+    from mysql_mimic.types import ColumnType
+except ImportError:
+    MysqlServer = None
+    Session = object
+
+
+def _column_type(values):
+    """按第一个非 NULL 值推断列类型"""
+    for value in values:
+        if value is None:
+            continue
+        if isinstance(value, bool) or isinstance(value, int):
+            return ColumnType.LONGLONG
+        if isinstance(value, (float, Decimal)):
+            return ColumnType.DOUBLE
+        if isinstance(value, bytes):
+            return ColumnType.BLOB
+        return ColumnType.STRING
+    return ColumnType.STRING
+
+
+class _SqliteSession(Session):
+    """一个客户端连接：语句转换为 SQLite 方言后在共享的 SQLite 连接上执行"""
+
+    def __init__(self, server: 'MySqlStubServer'):
+        super().__init__()
+        self.server = server
+
+    async def query(self, expression, sql, attrs):
+        statement = expression.sql(dialect='sqlite')
+        self.server.queries.append(statement)
+        cursor = self.server.sqlite.execute(statement)
+        if cursor.description is None:
+            return None
+        rows = cursor.fetchall()
+        names = [column[0] for column in cursor.description]
+        columns = [ResultColumn(name, _column_type(row[i] for row in rows)) for i, name in enumerate(names)]
+        return rows, columns
+
+
+class MySqlStubServer:
+    """在后台线程的事件循环中运行的 MySQL 协议桩服务器"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, database: str = 'stub'):
+        """
+        Args:
+            host: 监听地址
+            port: 监听端口，0 为随机端口（启动后见 self.port）
+            database: 客户端连接参数中的库名（不校验）
+        """
+        if MysqlServer is None:
+            raise RuntimeError("MySQL 桩服务器需要安装 mysql-mimic: pip install mysql-mimic")
+        self.host = host
+        self.port = port
+        self.database = database
+        self.sqlite = sqlite3.connect(':memory:', check_same_thread=False, isolation_level=None)
+        self.queries: List[str] = []  # 收到并执行的语句（SQLite 方言），便于断言查询次数
+        self._loop = None
+        self._thread = None
+        self._server = None
+
+    @property
+    def db_config(self) -> Dict[str, Any]:
+        """pymysql / MySqlHelper / AsyncMySqlPool 的连接参数"""
+        return {'host': self.host, 'port': self.port, 'user': 'test', 'password': '', 'database': self.database,
+                'charset': 'utf8mb4'}
+
+    def execute_script(self, script: str) -> None:
+        """直接在 SQLite 中执行建表、造数据脚本（SQLite 方言）"""
+        self.sqlite.executescript(script)
+
+    def start(self) -> 'MySqlStubServer':
+        """启动服务器，返回后即可连接"""
+        started = threading.Event()
+        errors = []
+
+        async def serve():
+            self._server = MysqlServer(session_factory=lambda: _SqliteSession(self))
+            try:
+                await self._server.start_server(host=self.host, port=self.port)
+                self.port = self._server._server.sockets[0].getsockname()[1]
+            except Exception as e:
+                errors.append(e)
+            finally:
+                started.set()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(serve())
+            if not errors:
+                self._loop.run_forever()
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name='mysql-stub-server', daemon=True)
+        self._thread.start()
+        started.wait()
+        if errors:
+            raise errors[0]
+        return self
+
+    def stop(self) -> None:
+        """停止服务器"""
+        if self._loop is None:
+            return
+
+        async def shutdown():
+            # 先断开仍打开的客户端连接（连接池中的空闲连接），再关闭监听
+            control = self._server.control
+            for connection_id in list(control._connections):
+                await control.kill(connection_id)
+            while control._connections:
+                await asyncio.sleep(0.01)
+            self._server._server.close()
+            await self._server._server.wait_closed()
+            self._loop.stop()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop)
+        self._thread.join(timeout=5)
+        self._loop = None
+        self.sqlite.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
@@ -0,0 +1,281 @@
+import re
+import time
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Callable, List, Optional, Tuple
+
+# 原始文本列 -> 类型化列的解析规则，Python 入库路径与 SQL 回填语句保持一致：
+#   score_value  DECIMAL(3,1)：score 为纯数字时取其值，否则为 NULL
+#   release_year SMALLINT：release_date 以4位数字开头时取前4位（YEAR 类型只支持1901-2155，老电影会越界）
+#   release_on   DATE：release_date 形如 YYYY-MM-DD 时取该日期，否则为 NULL
+#   hot_search_01.hot_score_value BIGINT：hot_score 去掉千分位逗号后为纯数字时取其值，否则为 NULL
+_SCORE_PATTERN = re.compile(r'^[0-9]+(\.[0-9]+)?$')
+_HOT_SCORE_PATTERN = re.compile(r'^[0-9]{1,18}$')
+_YEAR_PATTERN = re.compile(r'^[0-9]{4}')
+_DATE_PATTERN = re.compile(r'^[0-9]{4}-[0-9]{2}-[0-9]{2}$')
+
+BACKFILL_TYPED_COLUMNS_SQL = r"""
+UPDATE douban_hot100_list SET
+    score_value = CASE WHEN score REGEXP '^[0-9]+(\\.[0-9]+)?$' THEN CAST(score AS DECIMAL(3,1)) END,
+    release_year = CASE WHEN release_date REGEXP '^[0-9]{4}' THEN CAST(LEFT(release_date, 4) AS UNSIGNED) END,
+    release_on = CASE WHEN release_date REGEXP '^[0-9]{4}-[0-9]{2}-[0-9]{2}$'
+        THEN STR_TO_DATE(release_date, '%%Y-%%m-%%d') END
+WHERE id > %s AND id <= %s
+"""
+
+BACKFILL_HOT_SCORE_SQL = r"""
+UPDATE hot_search_01 SET
+    hot_score_value = CASE WHEN REPLACE(TRIM(hot_score), ',', '') REGEXP '^[0-9]{1,18}$'
+        THEN CAST(REPLACE(TRIM(hot_score), ',', '') AS UNSIGNED) END
+WHERE id > %s AND id <= %s
+"""
+
+
+def typed_columns(score, release_date) -> Tuple[Optional[Decimal], Optional[date], Optional[int]]:
+    """按与回填语句相同的规则，从原始文本计算 (score_value, release_on, release_year)"""
+    score = str(score).strip() if score is not None else ''
+    release_date = str(release_date).strip() if release_date is not None else ''
+    score_value = None
+    if _SCORE_PATTERN.match(score):
+        try:
+            score_value = Decimal(score).quantize(Decimal('0.1'))
+        except InvalidOperation:
+            pass
+    release_year = int(release_date[:4]) if _YEAR_PATTERN.match(release_date) else None
+    release_on = None
+    if _DATE_PATTERN.match(release_date):
+        try:
+            release_on = date.fromisoformat(release_date)
+        except ValueError:
+            pass
+    return score_value, release_on, release_year
+
+
+def hot_score_value(hot_score) -> Optional[int]:
+    """按与回填语句相同的规则，从热度文本计算 hot_score_value"""
+    text = str(hot_score).strip().replace(',', '') if hot_score is not None else ''
+    return int(text) if _HOT_SCORE_PATTERN.match(text) else None
+
+
+class Migration:
+    """一个版本化的表结构变更
+
+    up(migrator) 必须可重复执行：DDL 在 MySQL 中会隐式提交，中途失败时不会记录版本号，
+    下次运行会从头重新执行该版本。
+    """
+
+    def __init__(self, version: int, name: str, up: Callable[['SchemaMigrator'], None]):
+        self.version = version
+        self.name = name
+        self.up = up
+
+
+def _create_base_table(migrator):
+    """爬虫原有的主表结构（文本类型的评分和上映日期）"""
+    migrator.execute("""
+    CREATE TABLE IF NOT EXISTS douban_hot100_list (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        `rank` INT,
+        `type` TEXT,
+        regions TEXT,
+        title VARCHAR(100),
+        release_date VARCHAR(20),
+        score VARCHAR(5),
+        actors TEXT,
+        snapshot_id INT,
+        content_hash CHAR(32)
+    )
+    """)
+    migrator.db_helper.add_missing_columns('douban_hot100_list', {'snapshot_id': 'INT', 'content_hash': 'CHAR(32)'})
+
+
+def _add_typed_columns(migrator):
+    """新增类型化列；原始文本列保留，内容哈希和增量入库的自然键仍基于原始文本"""
+    columns = {'score_value': 'DECIMAL(3,1) NULL', 'release_on': 'DATE NULL', 'release_year': 'SMALLINT NULL'}
+    migrator.db_helper.add_missing_columns('douban_hot100_list', columns)
+    missing = set(columns) - migrator.columns('douban_hot100_list')
+    if missing:
+        raise RuntimeError(f"新增列失败: {', '.join(sorted(missing))}")
+
+
+def _backfill_typed_columns(migrator):
+    """按主键区间分块回填类型化列，每块单独提交，避免长事务和大范围锁"""
+    migrator.backfill('douban_hot100_list', BACKFILL_TYPED_COLUMNS_SQL)
+
+
+def _add_indexes(migrator):
+    """rank 区间查询和按快照读取的索引（InnoDB 二级索引隐含主键，idx_rank 同时覆盖 ORDER BY rank, id）"""
+    migrator.add_index('douban_hot100_list', 'idx_rank', '`rank`')
+    migrator.add_index('douban_hot100_list', 'idx_snapshot', 'snapshot_id')
+    migrator.add_index('douban_hot100_list', 'idx_rank_year', '`rank`, release_year')
+
+
+def _create_hot_search_table(migrator):
+    """百度热搜表：原有结构补充快照列、逐行内容哈希和 (快照编号, 排名) 自然键"""
+    migrator.execute("""
+    CREATE TABLE IF NOT EXISTS hot_search_01 (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        `rank` INT,
+        title VARCHAR(300),
+        hot_score VARCHAR(50),
+        link VARCHAR(300),
+        snapshot_id INT,
+        content_hash CHAR(32)
+    )
+    """)
+    migrator.db_helper.add_missing_columns('hot_search_01', {'snapshot_id': 'INT', 'content_hash': 'CHAR(32)'})
+    if not migrator.db_helper.index_exists('hot_search_01', 'uk_snapshot_rank'):
+        migrator.execute("ALTER TABLE hot_search_01 ADD UNIQUE KEY uk_snapshot_rank (snapshot_id, `rank`)")
+
+
+def _add_hot_score_value(migrator):
+    """热度文本列保留（内容哈希基于原始文本），新增数值列并分块回填，可按热度排序和比较"""
+    migrator.db_helper.add_missing_columns('hot_search_01', {'hot_score_value': 'BIGINT UNSIGNED NULL'})
+    if 'hot_score_value' not in migrator.columns('hot_search_01'):
+        raise RuntimeError("新增列失败: hot_score_value")
+    migrator.backfill('hot_search_01', BACKFILL_HOT_SCORE_SQL)
+
+
+MIGRATIONS = [
+    Migration(1, 'create_douban_hot100_list', _create_base_table),
+    Migration(2, 'add_typed_columns', _add_typed_columns),
+    Migration(3, 'backfill_typed_columns', _backfill_typed_columns),
+    Migration(4, 'add_rank_snapshot_indexes', _add_indexes),
+    Migration(5, 'create_hot_search_01', _create_hot_search_table),
+    Migration(6, 'add_hot_score_value', _add_hot_score_value),
+]
+
+
+class SchemaMigrator:
+    """版本化表结构迁移
+
+    已执行的版本记录在 schema_migrations 表中，migrate 按版本号顺序执行尚未执行的迁移；
+    执行期间持有 MySQL 命名锁，多个进程（多个 gunicorn worker、爬虫）同时启动时只有一个在迁移，
+    其余等待锁释放后发现已是最新版本直接返回。
+    """
+
+    CREATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INT PRIMARY KEY,
+        name VARCHAR(100) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        seconds FLOAT
+    )
+    """
+    LOCK_NAME = 'schema_migrations'
+
+    def __init__(self, db_helper, migrations: List[Migration] = None, chunk_size: int = 5000,
+                 lock_timeout: int = 60, logger: Callable[[str], None] = print):
+        """
+        Args:
+            db_helper: MySqlHelper 实例，需连接主库（router 模式下传入 read_your_writes=True）
+            migrations: 迁移列表，默认 MIGRATIONS
+            chunk_size: 回填时每块的主键区间大小
+            lock_timeout: 等待其他进程迁移完成的秒数
+            logger: 日志函数
+        """
+        self.db_helper = db_helper
+        self.migrations = sorted(migrations or MIGRATIONS, key=lambda m: m.version)
+        self.chunk_size = chunk_size
+        self.lock_timeout = lock_timeout
+        self.log = logger
+
+    # 供迁移使用的工具方法
+    def execute(self, sql: str, params=None) -> None:
+        """执行一条语句，失败时抛出异常（MySqlHelper.execute 只返回False）"""
+        if not self.db_helper.execute(sql, params):
+            raise RuntimeError(f"迁移语句执行失败: {' '.join(sql.split())[:200]}")
+
+    def columns(self, table: str) -> set:
+        """表上已有的列名"""
+        rows = self.db_helper.query(
+            "SELECT COLUMN_NAME AS name FROM information_schema.COLUMNS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            (table,)
+        )
+        return {row['name'] for row in rows or []}
+
+    def add_index(self, table: str, name: str, columns: str) -> None:
+        """索引不存在时在线新增（INPLACE，不阻塞读写）"""
+        if not self.db_helper.index_exists(table, name):
+            self.execute(f"ALTER TABLE {table} ADD INDEX {name} ({columns}), ALGORITHM=INPLACE, LOCK=NONE")
+
+    def backfill(self, table: str, sql: str) -> int:
+        """按主键区间 (start, start + chunk_size] 分块执行 sql（参数为区间两端），返回受影响的行数"""
+        bounds = self.db_helper.query_one(f"SELECT COALESCE(MIN(id), 0) AS lo, COALESCE(MAX(id), 0) AS hi FROM {table}")
+        if bounds is None:
+            raise RuntimeError(f"读取 {table} 主键范围失败")
+        start, end = bounds['lo'] - 1, bounds['hi']
+        total, started = 0, time.perf_counter()
+        while start < end:
+            stop = min(start + self.chunk_size, end)
+            self.execute(sql, (start, stop))
+            total += max(self.db_helper.cursor.rowcount, 0)
+            start = stop
+        if end:
+            self.log(f"{table}: 回填 {total} 行，用时 {time.perf_counter() - started:.1f} 秒")
+        return total
+
+    # 版本管理
+    def applied_versions(self) -> List[int]:
+        """已执行的迁移版本号"""
+        self.execute(self.CREATE_TABLE_SQL)
+        rows = self.db_helper.query("SELECT version FROM schema_migrations ORDER BY version")
+        if rows is None:
+            raise RuntimeError("读取 schema_migrations 失败")
+        return [row['version'] for row in rows]
+
+    def current_version(self) -> int:
+        """当前表结构版本，未执行过任何迁移时为0"""
+        versions = self.applied_versions()
+        return versions[-1] if versions else 0
+
+    def pending(self, target: int = None) -> List[Migration]:
+        """尚未执行的迁移（版本号不超过 target）"""
+        applied = set(self.applied_versions())
+        return [m for m in self.migrations
+                if m.version not in applied and (target is None or m.version <= target)]
+
+    def _lock(self) -> None:
+        row = self.db_helper.query_one("SELECT GET_LOCK(%s, %s) AS locked", (self.LOCK_NAME, self.lock_timeout))
+        if not row or row['locked'] != 1:
+            raise RuntimeError(f"等待迁移锁超时（{self.lock_timeout}秒）")
+
+    def _unlock(self) -> None:
+        self.db_helper.query_one("SELECT RELEASE_LOCK(%s) AS released", (self.LOCK_NAME,))
+
+    def migrate(self, target: int = None) -> List[str]:
+        """执行全部（或到 target 版本为止的）未执行迁移，返回本次执行的迁移名
+
+        已是最新版本时不获取迁移锁直接返回，多个进程同时启动时不会互相等待
+        """
+        if not self.pending(target):
+            return []
+        self._lock()
+        try:
+            done = []
+            for migration in self.pending(target):
+                self.log(f"执行迁移 {migration.version:03d}_{migration.name}")
+                started = time.perf_counter()
+                migration.up(self)
+                self.execute(
+                    "INSERT INTO schema_migrations (version, name, seconds) VALUES (%s, %s, %s)",
+                    (migration.version, migration.name, round(time.perf_counter() - started, 3))
+                )
+                done.append(f"{migration.version:03d}_{migration.name}")
+            return done
+        finally:
+            self._unlock()
+
+    def ensure_current(self, auto_migrate: bool = True) -> List[str]:
+        """服务启动时调用：auto_migrate 为True时执行未执行的迁移，否则有未执行的迁移时抛出 RuntimeError
+
+        表结构落后于代码时接口查询会因缺少列而失败，启动时就应发现，而不是等到请求返回500
+        """
+        if auto_migrate:
+            return self.migrate()
+        pending = self.pending()
+        if pending:
+            names = ', '.join(f"{m.version:03d}_{m.name}" for m in pending)
+            raise RuntimeError(f"数据库表结构不是最新版本，待执行迁移: {names}；请先运行 python Utils/migrate.py")
+        return []
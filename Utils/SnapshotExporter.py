@@ -0,0 +1,208 @@
+import os
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional
+
+import pymysql
+from TextUtils import split_values
+
+try:
+    import pyarrow as pa  # 可选依赖：pip install pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("导出列式快照需要安装 pyarrow: pip install pyarrow")
+
+
+def _decimal(value):
+    """score_value 转为 Decimal：MySQL 的 DECIMAL 列已是 Decimal，其他驱动返回浮点数时按字面值转换"""
+    return Decimal(str(value)) if isinstance(value, float) else value
+
+
+class IncompleteSnapshotError(RuntimeError):
+    """快照无法导出为完整榜单（未完成、已被之后的增量快照覆盖，或导出期间数据发生变化）"""
+
+
+class SnapshotExporter:
+    """把豆瓣榜单快照导出为列式文件（Parquet 或 Arrow IPC），供离线分析使用
+
+    - 使用服务端游标（SSCursor）分块读取，内存占用只与 chunk_size 有关
+    - 类型/地区/演员存为 list<string> 列，评分取 score_value 存为 decimal(3,1)，上映年份取 release_year
+    - 每个快照一个文件，先写临时文件再改名，文件出现即完整
+    Arrow IPC 文件可直接 memory-map 读取（load_snapshot），Parquet 体积更小。
+
+    每个文件都是该快照时刻的完整榜单（行数等于快照的 row_count）。追加模式的快照直接导出带该编号的行；
+    增量模式下表中只保存当前榜单，带快照编号的只是当次变化的行，因此只有最新的快照能导出
+    （导出当前全表），已被之后的快照覆盖的增量快照拒绝导出（IncompleteSnapshotError）。
+    """
+
+    COLUMNS = ('id', 'rank', 'type', 'regions', 'title', 'release_date', 'release_year', 'score_value', 'actors',
+               'snapshot_id')
+    FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+    def __init__(self, db_helper, output_dir: str, chunk_size: int = 10000, file_format: str = 'parquet',
+                 compression: str = 'zstd'):
+        """
+        Args:
+            db_helper: MySqlHelper 实例
+            output_dir: 导出目录
+            chunk_size: 每次从服务端读取的行数（即每个 row group / record batch 的行数）
+            file_format: parquet 或 arrow
+            compression: 压缩算法（parquet: zstd/snappy/gzip；arrow: zstd/lz4），None 为不压缩
+        """
+        _require_pyarrow()
+        if file_format not in self.FORMATS:
+            raise ValueError(f"不支持的格式: {file_format}")
+        self.db_helper = db_helper
+        self.output_dir = output_dir
+        self.chunk_size = chunk_size
+        self.file_format = file_format
+        self.compression = compression
+        self.schema = pa.schema([
+            ('id', pa.int32()),
+            ('rank', pa.int32()),
+            ('types', pa.list_(pa.string())),
+            ('regions', pa.list_(pa.string())),
+            ('title', pa.string()),
+            ('release_date', pa.string()),
+            ('release_year', pa.int16()),
+            ('score', pa.decimal128(3, 1)),
+            ('actors', pa.list_(pa.string())),
+            ('snapshot_id', pa.int32()),
+        ])
+
+    def snapshot_path(self, snapshot_id: int) -> str:
+        """快照文件路径"""
+        return os.path.join(self.output_dir, f'douban_snapshot_{snapshot_id:06d}{self.FORMATS[self.file_format]}')
+
+    def _to_batch(self, rows: List[tuple]) -> 'pa.RecordBatch':
+        """把一块元组行转换为 RecordBatch"""
+        columns = list(zip(*rows))
+        ids, ranks, types, regions, titles, dates, years, scores, actors, snapshots = columns
+        return pa.record_batch([
+            pa.array(ids, pa.int32()),
+            pa.array(ranks, pa.int32()),
+            pa.array([split_values(v) for v in types], pa.list_(pa.string())),
+            pa.array([split_values(v) for v in regions], pa.list_(pa.string())),
+            pa.array(titles, pa.string()),
+            pa.array(dates, pa.string()),
+            pa.array(years, pa.int16()),
+            pa.array([_decimal(v) for v in scores], pa.decimal128(3, 1)),
+            pa.array([split_values(v) for v in actors], pa.list_(pa.string())),
+            pa.array(snapshots, pa.int32()),
+        ], schema=self.schema)
+
+    def _iter_chunks(self, snapshot_id: int, full_state: bool) -> Iterable[List[tuple]]:
+        """用服务端游标分块读取一个快照的行（元组）
+
+        full_state 为True时读取截至该快照的当前全表（增量模式），否则只读取带该快照编号的行
+        """
+        where = "snapshot_id IS NULL OR snapshot_id <= %s" if full_state else "snapshot_id = %s"
+        sql = (f"SELECT {', '.join(f'`{c}`' for c in self.COLUMNS)} FROM douban_hot100_list "
+               f"WHERE {where} ORDER BY id")
+        return self.db_helper.query_batches(
+            sql, (snapshot_id,), batch_size=self.chunk_size, cursor_class=pymysql.cursors.SSCursor
+        )
+
+    def _snapshot_info(self, snapshot_id: int) -> Optional[Dict[str, Any]]:
+        """快照的 row_count 与表中带该快照编号的行数（tagged_rows）"""
+        return self.db_helper.query_one(
+            "SELECT s.row_count, (SELECT COUNT(*) FROM douban_hot100_list WHERE snapshot_id = s.id) AS tagged_rows "
+            "FROM scrape_snapshots s WHERE s.id = %s AND s.source = 'douban'",
+            (snapshot_id,)
+        )
+
+    def _latest_snapshot_id(self) -> Optional[int]:
+        """最新一个已完成的豆瓣快照编号"""
+        row = self.db_helper.query_one(
+            "SELECT MAX(id) AS id FROM scrape_snapshots WHERE source = 'douban' AND row_count > 0"
+        )
+        return row['id'] if row else None
+
+    def _open_writer(self, path: str):
+        if self.file_format == 'parquet':
+            return pq.ParquetWriter(path, self.schema, compression=self.compression)
+        options = pa.ipc.IpcWriteOptions(compression=self.compression)
+        return pa.ipc.new_file(path, self.schema, options=options)
+
+    def export_snapshot(self, snapshot_id: int, overwrite: bool = False) -> Dict[str, Any]:
+        """导出单个快照的完整榜单
+
+        Args:
+            snapshot_id: 快照编号
+            overwrite: 为False时已存在的文件直接跳过
+
+        Returns:
+            {'snapshot_id', 'path', 'rows', 'skipped'}；快照无法导出为完整榜单时抛出 IncompleteSnapshotError，
+            不会留下文件
+        """
+        path = self.snapshot_path(snapshot_id)
+        if os.path.exists(path) and not overwrite:
+            return {'snapshot_id': snapshot_id, 'path': path, 'rows': None, 'skipped': True}
+
+        info = self._snapshot_info(snapshot_id)
+        if not info or not info['row_count']:
+            raise IncompleteSnapshotError(f"快照 {snapshot_id} 不存在或尚未完成")
+        full_state = info['tagged_rows'] != info['row_count']
+        if full_state and self._latest_snapshot_id() != snapshot_id:
+            raise IncompleteSnapshotError(
+                f"快照 {snapshot_id} 是增量快照（{info['row_count']} 行中只有 {info['tagged_rows']} 行带快照编号），"
+                "且之后已有新快照，表中无法还原它当时的完整榜单"
+            )
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        tmp = f'{path}.tmp'
+        rows = 0
+        writer = self._open_writer(tmp)
+        try:
+            for chunk in self._iter_chunks(snapshot_id, full_state):
+                batch = self._to_batch(chunk)
+                if self.file_format == 'parquet':
+                    writer.write_batch(batch, row_group_size=self.chunk_size)
+                else:
+                    writer.write_batch(batch)
+                rows += len(chunk)
+            # 导出期间有新快照写入时，读到的可能是新旧混合的榜单
+            if rows != info['row_count'] or (full_state and self._latest_snapshot_id() != snapshot_id):
+                raise IncompleteSnapshotError(
+                    f"快照 {snapshot_id} 导出 {rows} 行，与快照记录的 {info['row_count']} 行不一致，"
+                    "导出期间数据可能发生了变化，请稍后重试"
+                )
+        except Exception:
+            writer.close()
+            os.remove(tmp)
+            raise
+        writer.close()
+        os.replace(tmp, path)
+        return {'snapshot_id': snapshot_id, 'path': path, 'rows': rows, 'skipped': False}
+
+    def snapshot_ids(self, source: str = 'douban') -> List[int]:
+        """已完成的快照编号（升序）"""
+        rows = self.db_helper.query(
+            "SELECT id FROM scrape_snapshots WHERE source = %s AND row_count > 0 ORDER BY id", (source,)
+        )
+        return [row['id'] for row in rows or []]
+
+    def export_all(self, overwrite: bool = False) -> List[Dict[str, Any]]:
+        """导出全部快照，已导出的快照默认跳过；无法导出为完整榜单的快照跳过并在 error 中说明原因"""
+        results = []
+        for snapshot_id in self.snapshot_ids():
+            try:
+                results.append(self.export_snapshot(snapshot_id, overwrite))
+            except IncompleteSnapshotError as e:
+                results.append({'snapshot_id': snapshot_id, 'path': None, 'rows': None, 'skipped': True,
+                                'error': str(e)})
+        return results
+
+
+def load_snapshot(path: str) -> 'pa.Table':
+    """读取导出的快照文件；Arrow IPC 文件以 memory-map 方式打开，不复制数据"""
+    _require_pyarrow()
+    if path.endswith('.arrow'):
+        return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    return pq.read_table(path, memory_map=True)
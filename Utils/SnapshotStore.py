@@ -0,0 +1,100 @@
+import hashlib
+from typing import Dict, Optional, Tuple
+
+
+class SnapshotStore:
+    """爬取快照版本记录（scrape_snapshots 表）
+
+    每次入库生成一个快照编号，记录来源、行数以及新增/更新/删除行数，
+    接口可通过主键倒序取一行得到最新快照，无需扫描数据表。
+    追加模式每次入库写入完整榜单，数据表中会保留历次快照的行，统计时需用 row_scope 限定到当前榜单。
+    """
+
+    LATEST_FINISHED_SQL = (
+        "SELECT id, row_count FROM scrape_snapshots WHERE source = %s AND row_count > 0 ORDER BY id DESC LIMIT 1"
+    )
+    TAGGED_ROWS_SQL = "SELECT COUNT(*) AS n FROM {table} WHERE snapshot_id = %s"
+
+    CREATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS scrape_snapshots (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        source VARCHAR(50) NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        row_count INT DEFAULT 0,
+        inserted_rows INT DEFAULT 0,
+        updated_rows INT DEFAULT 0,
+        removed_rows INT DEFAULT 0,
+        content_hash CHAR(32),
+        KEY idx_source_id (source, id)
+    )
+    """
+
+    def __init__(self, db_helper):
+        """
+        Args:
+            db_helper: MySqlHelper 实例
+        """
+        self.db_helper = db_helper
+
+    @staticmethod
+    def content_hash(*values) -> str:
+        """计算一组字段的内容哈希，用于判断行是否变化"""
+        text = '\x1f'.join('' if v is None else str(v) for v in values)
+        return hashlib.md5(text.encode('utf-8')).hexdigest()
+
+    def initialize(self) -> None:
+        """建表"""
+        self.db_helper.execute(self.CREATE_TABLE_SQL)
+
+    def begin(self, source: str) -> int:
+        """创建一个新快照并返回编号"""
+        if not self.db_helper.execute("INSERT INTO scrape_snapshots (source) VALUES (%s)", (source,)):
+            raise RuntimeError("创建快照失败")
+        return self.db_helper.cursor.lastrowid
+
+    def finish(self, snapshot_id: int, row_count: int, inserted_rows: int = 0, updated_rows: int = 0,
+               removed_rows: int = 0, content_hash: str = None) -> None:
+        """记录快照的统计信息"""
+        self.db_helper.execute(
+            "UPDATE scrape_snapshots SET row_count = %s, inserted_rows = %s, updated_rows = %s, "
+            "removed_rows = %s, content_hash = %s WHERE id = %s",
+            (row_count, inserted_rows, updated_rows, removed_rows, content_hash, snapshot_id)
+        )
+
+    def discard(self, snapshot_id: int) -> None:
+        """删除没有产生任何写入的快照"""
+        self.db_helper.execute("DELETE FROM scrape_snapshots WHERE id = %s", (snapshot_id,))
+
+    def latest(self, source: str) -> Optional[Dict]:
+        """指定来源的最新快照"""
+        return self.db_helper.query_one(
+            "SELECT * FROM scrape_snapshots WHERE source = %s ORDER BY id DESC LIMIT 1", (source,)
+        )
+
+    def latest_finished(self, source: str) -> Optional[Dict]:
+        """指定来源最新的已完成快照（row_count > 0）的 id 和 row_count，正在入库的快照不算"""
+        return self.db_helper.query_one(self.LATEST_FINISHED_SQL, (source,))
+
+    def row_scope(self, snapshot: Optional[Dict], table: str) -> Optional[Tuple[int, bool]]:
+        """当前榜单在数据表中的范围 (快照编号, 是否整榜快照)，snapshot 为 latest_finished 的结果
+
+        追加模式的快照写入完整榜单，带该快照编号的行数等于 row_count，当前榜单就是这些行；
+        增量模式只有变化的行带最新编号，当前榜单是编号不晚于该快照（或为空）的全部行。
+        snapshot_id 上有索引，计数不扫描整表。
+        """
+        if not snapshot:
+            return None
+        tagged = self.db_helper.query_one(self.TAGGED_ROWS_SQL.format(table=table), (snapshot['id'],))
+        if tagged is None:
+            raise RuntimeError("读取快照行数失败")
+        return snapshot['id'], tagged['n'] == snapshot['row_count']
+
+    @staticmethod
+    def scope_condition(scope: Optional[Tuple[int, bool]], column: str = 'snapshot_id') -> str:
+        """row_scope 对应的 WHERE 条件；没有已完成快照时不过滤"""
+        if scope is None:
+            return "1 = 1"
+        snapshot_id, full = scope
+        if full:
+            return f"{column} = {int(snapshot_id)}"
+        return f"({column} IS NULL OR {column} <= {int(snapshot_id)})"
@@ -0,0 +1,94 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+
+class TTLCache:
+    """线程安全的 TTL + LRU 内存缓存
+
+    - 每个条目写入后 ttl 秒过期
+    - 条目数超过 max_size 时淘汰最久未使用的条目
+    - 记录命中/未命中次数，便于调整 ttl 和 max_size
+    """
+
+    def __init__(self, max_size: int = 256, ttl: float = 300.0):
+        """初始化缓存
+
+        Args:
+            max_size: 最大条目数
+            ttl: 条目存活秒数
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (过期时间, 值)，末尾为最近使用
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """读取缓存，过期或不存在时返回 default"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: float = None) -> None:
+        """写入缓存，超出容量时淘汰最久未使用的条目
+
+        Args:
+            key: 键
+            value: 值
+            ttl: 该条目的存活秒数，默认使用缓存的 ttl
+        """
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_set(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """读取缓存，未命中时调用 compute 计算并写入（compute 抛出异常时不缓存）"""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key: Hashable = None) -> None:
+        """使缓存失效
+
+        Args:
+            key: 指定失效的键，为空时清空全部缓存
+        """
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计信息"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
@@ -0,0 +1,10 @@
+from typing import List, Optional
+
+
+def split_values(value: Optional[str]) -> List[str]:
+    """拆分逗号分隔的多值字段（类型/地区/演员），去掉首尾空白和空项，同一字段中重复的取值只保留一个（按首次出现顺序）
+
+    与拆分子表以 (movie_id, 取值) 为主键去重的规则一致。接口统计、排名索引、演员摘要、拆分子表和快照导出
+    都用这一个函数，同一部电影在各处拆出的取值相同。
+    """
+    return list(dict.fromkeys(v.strip() for v in (value or '').split(',') if v.strip()))
@@ -1,12 +1,22 @@
-import urllib.request
 import urllib.parse
-from bs4 import BeautifulSoup
 import json
+from BaiduHotParser import parse_hot_list
+from HttpClient import HttpClient
 from MySqlHelper import MySqlHelper
+from SchemaMigrator import SchemaMigrator, hot_score_value
+from SnapshotStore import SnapshotStore
 
+# 爬虫共用的 HTTP 客户端（长连接、压缩、条件请求）
+HTTP_CLIENT = HttpClient(timeout=10)
 
-# 使用urllib实现
-def get_baidu_hotsearch():
+
+def get_baidu_hotsearch(client=None, parser=None):
+    """获取百度实时热搜 [(排名, 标题, 热度, 链接), ...]
+
+    Args:
+        client: HTTP 客户端，为空时使用共用客户端
+        parser: 页面解析后端（selectolax / lxml / bs4），为空时自动选择最快的可用后端
+    """
     # 百度热搜的API接口
     url = "https://top.baidu.com/board?tab=realtime"
 
@@ -19,28 +29,12 @@ def get_baidu_hotsearch():
     }
 
     try:
-        # 创建请求对象
-        req = urllib.request.Request(url, headers=headers)
-
-        # 发送请求并获取响应
-        response = urllib.request.urlopen(req)
-        html = response.read().decode('utf-8')
-
-        # 使用BeautifulSoup解析HTML
-        soup = BeautifulSoup(html, 'html.parser')
-
-        # 查找热搜项目 - 根据百度风云榜的实际HTML结构调整
-        hot_items = soup.find_all('div', class_='category-wrap_iQLoo')
+        # 发送请求并获取响应，未传入时使用共用客户端
+        response = (client or HTTP_CLIENT).get(url, headers=headers)
+        html = response.text()
 
-        hot_list = []
-        for index, item in enumerate(hot_items[:100], 1):
-            title = item.find('div', class_='c-single-text-ellipsis').text.strip()
-            hot_score = item.find('div', class_='hot-index_1Bl1a').text.strip()
-            link = item.find('a')['href']
-
-            hot_list.append((index, title, hot_score, link))
-
-        return hot_list
+        # 解析HTML，优先使用已安装的 C 解析器（selectolax / lxml），否则使用 BeautifulSoup
+        return parse_hot_list(html, limit=100, parser=parser)
 
     except Exception as e:
         print(f"获取百度热搜失败: {e}")
@@ -57,32 +51,137 @@ DB_CONFIG = {
     'charset': 'utf8mb4'
 }
 
-# 创建对应的数据库表 字段分别为：rank,title,hot_score,link
-CREATE_TABLE_SQL = """
-CREATE TABLE IF NOT EXISTS hot_search_01 (
-        id INT AUTO_INCREMENT PRIMARY KEY ,
-        `rank` INT  ,
-        title VARCHAR(300),
-        hot_score VARCHAR(50),
-        link VARCHAR(300)
-    )
+# 表结构（hot_search_01）由 SchemaMigrator 按版本迁移：rank,title,hot_score,link,snapshot_id,content_hash,hot_score_value
+
+# 以 (快照编号, 排名) 为自然键，重复写入同一快照时覆盖而不是追加
+INSERT_SQL = """
+INSERT INTO hot_search_01 (`rank`, title, hot_score, link, snapshot_id, content_hash, hot_score_value)
+VALUES (%s, %s, %s, %s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE title = VALUES(title), hot_score = VALUES(hot_score), link = VALUES(link),
+    content_hash = VALUES(content_hash), hot_score_value = VALUES(hot_score_value)
 """
 
-INSERT_SQL = "INSERT INTO hot_search_01 (`rank`, title, hot_score, link) VALUES (%s, %s, %s, %s)"
+# 增量模式下按行编号原地更新内容变化的条目
+UPDATE_SQL = """
+UPDATE hot_search_01 SET `rank` = %s, title = %s, hot_score = %s, link = %s, snapshot_id = %s, content_hash = %s,
+    hot_score_value = %s
+WHERE id = %s
+"""
+
+
+def _row_values(item, snapshot_id, content_hash):
+    """INSERT_SQL 的一行参数：热搜条目 + 快照编号、内容哈希和数值热度"""
+    return item + (snapshot_id, content_hash, hot_score_value(item[2]))
+
+
+def _write_changed_rows(helper, hot_search, snapshot_id):
+    """增量写入：以标题为自然键比较逐行内容哈希，只插入新上榜、更新内容变化的条目，并删除已下榜的条目
+
+    表中同一标题有多行时（追加模式留下的历史快照）只保留最新一行
+
+    Returns:
+        本次快照的 row_count/inserted_rows/updated_rows/removed_rows
+    """
+    current = {}
+    stale_ids = []
+    rows = helper.query("SELECT id, title, content_hash FROM hot_search_01 ORDER BY id")
+    if rows is None:
+        raise RuntimeError("读取热搜当前状态失败")
+    for row in rows:
+        if row['title'] in current:
+            stale_ids.append(current[row['title']][0])
+        current[row['title']] = (row['id'], row['content_hash'])
+
+    inserts, updates, seen = [], [], set()
+    for item in hot_search:
+        title = item[1]
+        if title in seen:
+            continue
+        seen.add(title)
+        content_hash = SnapshotStore.content_hash(*item)
+        existing = current.get(title)
+        if existing is None:
+            inserts.append(_row_values(item, snapshot_id, content_hash))
+        elif existing[1] != content_hash:
+            updates.append(_row_values(item, snapshot_id, content_hash) + (existing[0],))
+
+    if updates and not helper.update_many(UPDATE_SQL, updates):
+        raise RuntimeError("更新热搜条目失败")
+    stats = helper.bulk_insert(INSERT_SQL, inserts)
+    if stats['failed_rows']:
+        raise RuntimeError(f"写入热搜条目失败 {stats['failed_rows']} 行")
+
+    removed_ids = [row_id for title, (row_id, _) in current.items() if title not in seen]
+    if removed_ids + stale_ids and not helper.delete_many(
+            "DELETE FROM hot_search_01 WHERE id = %s", [(row_id,) for row_id in removed_ids + stale_ids]):
+        raise RuntimeError("删除已下榜的热搜条目失败")
+    return {'row_count': len(seen), 'inserted_rows': len(inserts), 'updated_rows': len(updates),
+            'removed_rows': len(removed_ids)}
+
+
+def _rollback_snapshot(helper, snapshots, snapshot_id, last_id):
+    """撤销写入中途失败的快照：删除本次插入的行，原地更新过的行清空快照编号和内容哈希，下次写入时会重新更新"""
+    helper.execute("DELETE FROM hot_search_01 WHERE snapshot_id = %s AND id > %s", (snapshot_id, last_id))
+    helper.execute(
+        "UPDATE hot_search_01 SET snapshot_id = NULL, content_hash = NULL WHERE snapshot_id = %s", (snapshot_id,)
+    )
+    snapshots.discard(snapshot_id)
 
 
-def store_hot_list():
+def store_hot_list(hot_search=None, incremental=False):
+    """获取热搜并写入数据库
+
+    Args:
+        hot_search: 已抓取的热搜列表，为空时现场抓取
+        incremental: 增量模式，表中只保存当前榜单，只写入内容变化的条目（见 _write_changed_rows）；
+            为False时每次榜单变化都追加一份完整快照
+
+    Returns:
+        本次快照的 row_count/inserted_rows/updated_rows/removed_rows；没有抓到热搜或榜单未变化时返回None
+    """
     # 获取热搜
-    hot_search = get_baidu_hotsearch()
+    if hot_search is None:
+        hot_search = get_baidu_hotsearch()
 
     # 初始化数据库连接
     helper = MySqlHelper(**DB_CONFIG)
 
-    # 创建测试表
-    helper.execute(CREATE_TABLE_SQL)
-
-    # 插入到数据库中
-    helper.insert_many(INSERT_SQL, hot_search)
+    try:
+        # 建表或把旧表迁移到最新结构（快照列、逐行内容哈希、自然键、数值热度）
+        SchemaMigrator(helper).migrate()
+        snapshots = SnapshotStore(helper)
+        snapshots.initialize()
+
+        if not hot_search:
+            return
+
+        # 与上一次快照内容完全相同时不再写入
+        content_hash = SnapshotStore.content_hash(*hot_search)
+        latest = snapshots.latest('baidu')
+        if latest and latest['content_hash'] == content_hash:
+            print("热搜榜未变化，跳过写入")
+            return
+
+        # 插入到数据库中，中途失败时撤销本次快照
+        last_id = helper.query_one("SELECT COALESCE(MAX(id), 0) AS id FROM hot_search_01")['id']
+        snapshot_id = snapshots.begin('baidu')
+        try:
+            if incremental:
+                stats = _write_changed_rows(helper, hot_search, snapshot_id)
+            else:
+                inserted = helper.bulk_insert(
+                    INSERT_SQL,
+                    (_row_values(item, snapshot_id, SnapshotStore.content_hash(*item)) for item in hot_search)
+                )
+                stats = {'row_count': len(hot_search), 'inserted_rows': inserted['rows'], 'updated_rows': 0,
+                         'removed_rows': 0}
+            snapshots.finish(snapshot_id, content_hash=content_hash, **stats)
+            return stats
+        except Exception:
+            _rollback_snapshot(helper, snapshots, snapshot_id, last_id)
+            raise
+    finally:
+        helper.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,65 @@
+"""常驻爬取进程：按间隔定时运行豆瓣榜单与百度热搜爬取
+
+用法:
+    python Utils/crawl_daemon.py --douban-interval 3600 --douban-pages 1-5 --baidu-interval 600
+
+默认增量入库（表中只保留当前榜单），--append 改为每次追加完整榜单。
+收到 SIGINT/SIGTERM 后等待正在运行的任务结束再退出；豆瓣任务中途崩溃时，
+下次启动从断点目录中恢复已完成的页面。
+指定 --notify-url 时每次确有数据入库后通知接口服务检查数据版本，否则接口在 API_DATA_VERSION_TTL 秒内自行发现。
+"""
+import argparse
+import functools
+import os
+import signal
+
+from CrawlScheduler import ApiNotifier, CrawlScheduler, DoubanCrawlJob, BaiduCrawlJob
+from baidu_hot100_01 import get_baidu_hotsearch, store_hot_list
+from douban_hot_100 import DoubanMovieScraper
+
+
+def main():
+    parser = argparse.ArgumentParser(description='定时爬取')
+    parser.add_argument('--douban-interval', type=float, default=3600, help='豆瓣爬取间隔秒数，0 为不运行')
+    parser.add_argument('--douban-pages', default='1-5', help='豆瓣页码范围，如 1-5')
+    parser.add_argument('--douban-workers', type=int, default=2, help='豆瓣并发抓取页数')
+    parser.add_argument('--douban-rate', type=float, default=2.0, help='豆瓣每秒最多请求数')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--incremental', dest='incremental', action='store_true', default=True,
+                      help='豆瓣与百度热搜增量入库，只写入内容变化的行（默认）')
+    mode.add_argument('--append', dest='incremental', action='store_false',
+                      help='追加模式入库：每次写入完整榜单，数据表保留历次快照')
+    parser.add_argument('--baidu-interval', type=float, default=600, help='百度热搜爬取间隔秒数，0 为不运行')
+    parser.add_argument('--attempts', type=int, default=5, help='每页最多尝试次数')
+    parser.add_argument('--checkpoint-dir', default='.crawl_checkpoints', help='断点目录')
+    parser.add_argument('--notify-url', default=os.environ.get('CRAWL_NOTIFY_URL'),
+                        help='入库后通知的接口地址，如 http://127.0.0.1:5000/api/cache-invalidate')
+    parser.add_argument('--notify-token', default=os.environ.get('CRAWL_NOTIFY_TOKEN'),
+                        help='通知接口的认证 token（也可用环境变量 CRAWL_NOTIFY_TOKEN）')
+    args = parser.parse_args()
+
+    on_stored = [ApiNotifier(args.notify_url, args.notify_token)] if args.notify_url else []
+    jobs = []
+    if args.douban_interval > 0:
+        start_page, _, end_page = args.douban_pages.partition('-')
+        scraper = DoubanMovieScraper(on_stored=on_stored, rate_limit=args.douban_rate, incremental=args.incremental)
+        jobs.append(DoubanCrawlJob(
+            scraper, int(start_page), int(end_page or start_page), interval=args.douban_interval,
+            max_concurrency=args.douban_workers, attempts=args.attempts,
+        ))
+    if args.baidu_interval > 0:
+        store = functools.partial(store_hot_list, incremental=args.incremental)
+        jobs.append(BaiduCrawlJob(
+            get_baidu_hotsearch, store, interval=args.baidu_interval, on_stored=on_stored, attempts=args.attempts,
+        ))
+    if not jobs:
+        parser.error("至少需要启用一个任务")
+
+    scheduler = CrawlScheduler(jobs, checkpoint_dir=args.checkpoint_dir)
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: scheduler.stop())
+    scheduler.run_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,70 @@
 import json
+import threading
+import time
 import urllib.parse
-import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from ActorTopK import ActorTopKStore, SpaceSaving
+from HttpClient import HttpClient
 from MySqlHelper import MySqlHelper
+from SchemaMigrator import SchemaMigrator, typed_columns
+from SnapshotStore import SnapshotStore
+from TextUtils import split_values
+
+
+class HostRateLimiter:
+    """按主机限速：同一主机两次请求之间至少间隔 1/rate 秒，多线程共享"""
+
+    def __init__(self, rate):
+        """
+        Args:
+            rate: 每个主机每秒最多请求数，为空或<=0时不限速
+        """
+        self.interval = 1.0 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._next_time = {}  # host -> 下一次允许请求的时间
+
+    def wait(self, url):
+        """阻塞到该 url 所在主机允许发出下一次请求"""
+        if self.interval <= 0:
+            return
+        host = urllib.parse.urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            scheduled = max(now, self._next_time.get(host, now))
+            self._next_time[host] = scheduled + self.interval
+        if scheduled > now:
+            time.sleep(scheduled - now)
 
 
 class DoubanMovieScraper:
-    def __init__(self, db_config=None):
-        self.base_url = 'https://movie.douban.com/j/chart/top_list?type=13&interval_id=100%3A90&action=&'
+    # 多值字段拆分后的子表：(子表名, 主表列名, 子表值列名)
+    DIMENSION_TABLES = (
+        ('douban_movie_type', 'type', 'type'),
+        ('douban_movie_region', 'regions', 'region'),
+        ('douban_movie_actor', 'actors', 'actor'),
+    )
+
+    def __init__(self, db_config=None, on_stored=None, max_workers=1, rate_limit=None, base_url=None, client=None,
+                 incremental=False, actor_sketch_capacity=200):
+        """
+        初始化爬虫
+
+        Args:
+            db_config: 数据库配置字典
+            on_stored: 数据入库后依次调用的无参回调列表，例如 MovieAPI.data_changed
+            max_workers: 并发抓取的线程数，1 为逐页串行抓取
+            rate_limit: 对同一主机每秒最多发出的请求数，为空时不限速
+            base_url: 榜单接口地址（需以 & 结尾），为空时使用豆瓣地址，可指向本地桩服务器测试
+            client: 共用的 HttpClient，为空时新建（长连接、压缩、条件请求）
+            incremental: 增量入库模式，以 (title, release_date) 为自然键 upsert，只写入内容变化的行，
+                并删除本次爬取中已不在榜单上的电影；为False时每次追加完整的一份数据
+            actor_sketch_capacity: 每个快照的演员 Space-Saving 摘要容量（ActorTopK），入库时同步更新，
+                供近似热门演员查询使用；0 为不记录
+        """
+        self.base_url = base_url or 'https://movie.douban.com/j/chart/top_list?type=13&interval_id=100%3A90&action=&'
+        self.max_workers = max(1, max_workers)
+        self.rate_limiter = HostRateLimiter(rate_limit)
+        self.client = client or HttpClient()
         self.headers = {
             'user-agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
                           '(KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36'
@@ -20,6 +78,11 @@ class DoubanMovieScraper:
             'charset': 'utf8mb4'
         }
         self.db_helper = None
+        self.snapshots = None
+        self.incremental = incremental
+        self.actor_sketch_capacity = actor_sketch_capacity
+        self.actor_topk = None
+        self.on_stored = list(on_stored or [])
 
     def _fetch_page_data(self, page, page_size=20):
         """获取单页电影数据"""
@@ -30,9 +93,9 @@ class DoubanMovieScraper:
         query_string = urllib.parse.urlencode(data)
         url = self.base_url + query_string
 
-        request = urllib.request.Request(url=url, headers=self.headers)
-        response = urllib.request.urlopen(request)
-        return response.read().decode('utf-8')
+        self.rate_limiter.wait(url)
+        response = self.client.get(url, headers=self.headers)
+        return response.text()
 
     def _parse_movie_data(self, raw_data, start_page, current_page):
         """解析原始电影数据"""
@@ -53,44 +116,229 @@ class DoubanMovieScraper:
         return parsed_movies
 
     def _initialize_database(self):
-        """初始化数据库表结构"""
-        create_table_sql = """
-        CREATE TABLE IF NOT EXISTS douban_hot100_list (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            `rank` INT,
-            `type` TEXT,
-            regions TEXT,
-            title VARCHAR(100),
-            release_date VARCHAR(20),
-            score VARCHAR(5),
-            actors TEXT
-        )
+        """初始化数据库表结构（主表由 SchemaMigrator 按版本迁移到最新结构）"""
+        SchemaMigrator(self.db_helper).migrate()
+        if self.incremental:
+            self._ensure_natural_key()
+
+        self.snapshots = SnapshotStore(self.db_helper)
+        self.snapshots.initialize()
+        if self.actor_sketch_capacity:
+            self.actor_topk = ActorTopKStore(self.db_helper)
+            self.actor_topk.initialize()
+
+        for table, _, column in self.DIMENSION_TABLES:
+            self.db_helper.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                movie_id INT NOT NULL,
+                `{column}` VARCHAR(100) NOT NULL,
+                PRIMARY KEY (movie_id, `{column}`),
+                KEY idx_{column} (`{column}`)
+            )
+            """)
+
+    def _ensure_natural_key(self):
+        """增量模式需要 (title, release_date) 唯一键，首次启用时清理追加模式留下的重复行（保留最新一行）"""
+        if self.db_helper.index_exists('douban_hot100_list', 'uk_title_release'):
+            return
+        self.db_helper.execute("""
+        DELETE t1 FROM douban_hot100_list t1
+        JOIN douban_hot100_list t2
+          ON t1.title = t2.title AND t1.release_date <=> t2.release_date AND t1.id < t2.id
+        """)
+        self.db_helper.execute("ALTER TABLE douban_hot100_list ADD UNIQUE KEY uk_title_release (title, release_date)")
+
+    def sync_dimension_tables(self, snapshot_id=None):
+        """将主表中尚未拆分的电影按类型/地区/演员写入子表，供接口直接 GROUP BY 统计
+
+        Args:
+            snapshot_id: 本次入库的快照编号，该快照中被更新的电影会重新拆分，已删除电影的子表行会被清理
+        """
+        for table, source, column in self.DIMENSION_TABLES:
+            if snapshot_id is not None:
+                self.db_helper.execute(
+                    f"DELETE d FROM {table} d LEFT JOIN douban_hot100_list m ON m.id = d.movie_id "
+                    "WHERE m.id IS NULL OR m.snapshot_id = %s",
+                    (snapshot_id,)
+                )
+            last = self.db_helper.query_one(f"SELECT COALESCE(MAX(movie_id), 0) AS last_id FROM {table}")
+            rows = self.db_helper.query(
+                f"SELECT id, `{source}` AS value FROM douban_hot100_list WHERE id > %s OR snapshot_id = %s",
+                (last['last_id'], snapshot_id)
+            )
+            params = ((row['id'], value) for row in rows for value in split_values(row['value']))
+            self.db_helper.bulk_insert(
+                f"INSERT IGNORE INTO {table} (movie_id, `{column}`) VALUES (%s, %s)", params
+            )
+
+    def fetch_page(self, page, start_page=1):
+        """抓取并解析单页，排名从 start_page 第一条开始计为1"""
+        return self._parse_movie_data(self._fetch_page_data(page), start_page, page)
+
+    def iter_movies(self, start_page, end_page):
+        """逐页爬取并产出电影数据的生成器
+
+        max_workers > 1 时每次并发抓取 2*max_workers 页，结果仍按页码顺序产出，保证全局排名正确，
+        内存中最多保留一个窗口的页面
         """
-        self.db_helper.execute(create_table_sql)
+        pages = list(range(start_page, end_page + 1))
+
+        if self.max_workers > 1 and len(pages) > 1:
+            window = self.max_workers * 2
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for i in range(0, len(pages), window):
+                    batch = pages[i:i + window]
+                    for page, raw_data in zip(batch, executor.map(self._fetch_page_data, batch)):
+                        yield from self._parse_movie_data(raw_data, start_page, page)
+        else:
+            for page in pages:
+                yield from self.fetch_page(page, start_page)
 
     def scrape_movies(self, start_page, end_page):
         """爬取指定页码范围的电影数据"""
-        all_movies = []
+        return list(self.iter_movies(start_page, end_page))
 
-        for page in range(start_page, end_page + 1):
-            raw_data = self._fetch_page_data(page)
-            page_movies = self._parse_movie_data(raw_data, start_page, page)
-            all_movies.extend(page_movies)
+    def store_to_database(self, movies, chunk_size=500):
+        """将电影数据分块存储到数据库
 
-        return all_movies
+        Args:
+            movies: 电影数据的可迭代对象，可以直接传入 iter_movies 生成器边爬边写
+            chunk_size: 每次提交的行数
 
-    def store_to_database(self, movies):
-        """将电影数据存储到数据库"""
+        Returns:
+            bulk_insert 的统计信息（写入行数、失败行数、rows_per_sec 等），
+            以及本次快照的 row_count/inserted_rows/updated_rows/removed_rows
+        """
         if not self.db_helper:
             self.db_helper = MySqlHelper(**self.db_config)
             self._initialize_database()
 
-        insert_sql = """
+        last_id = self.db_helper.query_one("SELECT COALESCE(MAX(id), 0) AS id FROM douban_hot100_list")['id']
+        snapshot_id = self.snapshots.begin('douban')
+        try:
+            sketch = None
+            if self.actor_topk is not None:
+                # 摘要统计本次爬取的完整榜单（增量模式下主表只写入变化的行）
+                sketch = SpaceSaving(self.actor_sketch_capacity)
+                movies = ActorTopKStore.sketch_movies(movies, sketch)
+            if self.incremental:
+                stats = self._upsert_movies(movies, snapshot_id, chunk_size)
+            else:
+                insert_sql = """
+                INSERT INTO douban_hot100_list 
+                (`rank`, `type`, regions, title, release_date, score, actors, snapshot_id, content_hash,
+                 score_value, release_on, release_year) 
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """
+                rows = (self._row_values(movie, snapshot_id, SnapshotStore.content_hash(*movie)) for movie in movies)
+                stats = self.db_helper.bulk_insert(insert_sql, rows, chunk_size=chunk_size)
+                self._check_written(stats)
+                stats.update(row_count=stats['rows'], inserted_rows=stats['rows'], updated_rows=0, removed_rows=0)
+            self.snapshots.finish(
+                snapshot_id, stats['row_count'], stats['inserted_rows'], stats['updated_rows'], stats['removed_rows']
+            )
+            self.sync_dimension_tables(snapshot_id)
+            if sketch is not None:
+                self.actor_topk.save(snapshot_id, sketch)
+        except Exception:
+            # 爬取或写入中途失败（已提交的块仍在表中），撤销本次快照后再抛出
+            self._rollback_snapshot(snapshot_id, last_id)
+            raise
+
+        for callback in self.on_stored:
+            callback()
+        return stats
+
+    def _rollback_snapshot(self, snapshot_id, last_id):
+        """撤销未完成的快照：删除本次新插入的行（id > last_id）及其子表行、演员摘要和快照记录
+
+        增量模式下已被原地更新的行无法还原旧内容，改挂到上一个完成的快照并清空内容哈希，
+        下次爬取时会重新写入并计为更新行
+        """
+        for table, _, _ in self.DIMENSION_TABLES:
+            self.db_helper.execute(
+                f"DELETE d FROM {table} d JOIN douban_hot100_list m ON m.id = d.movie_id "
+                "WHERE m.snapshot_id = %s AND m.id > %s",
+                (snapshot_id, last_id)
+            )
+        self.db_helper.execute(
+            "DELETE FROM douban_hot100_list WHERE snapshot_id = %s AND id > %s", (snapshot_id, last_id)
+        )
+        if self.incremental:
+            previous = self.db_helper.query_one(
+                "SELECT MAX(id) AS id FROM scrape_snapshots WHERE source = 'douban' AND id < %s AND row_count > 0",
+                (snapshot_id,)
+            )
+            self.db_helper.execute(
+                "UPDATE douban_hot100_list SET snapshot_id = %s, content_hash = NULL WHERE snapshot_id = %s",
+                (previous['id'] if previous else None, snapshot_id)
+            )
+        if self.actor_topk is not None:
+            self.actor_topk.discard(snapshot_id)
+        self.snapshots.discard(snapshot_id)
+
+    @staticmethod
+    def _check_written(stats):
+        """bulk_insert 有失败行时抛出，由 store_to_database 撤销快照：部分写入的快照不能记录为完成"""
+        if stats['failed_rows']:
+            raise RuntimeError(f"电影数据写入失败 {stats['failed_rows']} 行，本次快照已撤销")
+
+    @staticmethod
+    def _row_values(movie, snapshot_id, content_hash):
+        """入库的一行：原始字段 + 快照编号 + 内容哈希 + 类型化的评分/上映日期/上映年份"""
+        return movie + (snapshot_id, content_hash) + typed_columns(movie[5], movie[4])
+
+    def _upsert_movies(self, movies, snapshot_id, chunk_size):
+        """增量写入：按自然键比较内容哈希，只 upsert 新增或变化的行，并删除已不在榜单上的电影
+
+        每次爬取视为榜单的一份完整快照；爬取中途出错时异常向上抛出，不会执行删除
+        """
+        upsert_sql = """
         INSERT INTO douban_hot100_list 
-        (`rank`, `type`, regions, title, release_date, score, actors) 
-        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        (`rank`, `type`, regions, title, release_date, score, actors, snapshot_id, content_hash,
+         score_value, release_on, release_year) 
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE `rank` = VALUES(`rank`), `type` = VALUES(`type`), regions = VALUES(regions),
+            score = VALUES(score), actors = VALUES(actors),
+            snapshot_id = VALUES(snapshot_id), content_hash = VALUES(content_hash),
+            score_value = VALUES(score_value)
         """
-        self.db_helper.insert_many(insert_sql, movies)
+        existing = {
+            (row['title'], row['release_date']): (row['id'], row['content_hash'])
+            for row in self.db_helper.query(
+                "SELECT id, title, release_date, content_hash FROM douban_hot100_list"
+            ) or []
+        }
+        seen = set()
+        counts = {'inserted_rows': 0, 'updated_rows': 0}
+
+        def changed_rows():
+            for movie in movies:
+                key = (movie[3], movie[4])
+                if key in seen:
+                    # 翻页过程中榜单变动导致同一部电影出现两次，保留排名靠前的一条
+                    continue
+                seen.add(key)
+                content_hash = SnapshotStore.content_hash(*movie)
+                current = existing.get(key)
+                if current and current[1] == content_hash:
+                    continue
+                counts['updated_rows' if current else 'inserted_rows'] += 1
+                yield self._row_values(movie, snapshot_id, content_hash)
+
+        stats = self.db_helper.bulk_insert(upsert_sql, changed_rows(), chunk_size=chunk_size)
+        # 有行写入失败时不能删除下榜电影，也不能把本次计数记为完整快照
+        self._check_written(stats)
+
+        removed_ids = [movie_id for key, (movie_id, _) in existing.items() if key not in seen] if seen else []
+        for i in range(0, len(removed_ids), chunk_size):
+            chunk = removed_ids[i:i + chunk_size]
+            placeholders = ', '.join(['%s'] * len(chunk))
+            if not self.db_helper.execute(f"DELETE FROM douban_hot100_list WHERE id IN ({placeholders})", tuple(chunk)):
+                raise RuntimeError("删除已下榜的电影失败")
+
+        stats.update(counts, row_count=len(seen), removed_rows=len(removed_ids))
+        return stats
 
     def run(self):
         """运行爬虫主流程"""
@@ -98,10 +346,11 @@ class DoubanMovieScraper:
             start_page = int(input("请输入起始页码: "))
             end_page = int(input("请输入结束页码: "))
 
-            movies = self.scrape_movies(start_page, end_page)
-            self.store_to_database(movies)
+            stats = self.store_to_database(self.iter_movies(start_page, end_page))
 
-            print(f"成功爬取并存储了 {len(movies)} 条电影数据")
+            print(f"成功爬取并存储了 {stats['row_count']} 条电影数据"
+                  f"（新增 {stats['inserted_rows']} 条，更新 {stats['updated_rows']} 条，删除 {stats['removed_rows']} 条，"
+                  f"失败 {stats['failed_rows']} 条，{stats['rows_per_sec']:.0f} 行/秒）")
         except ValueError:
             print("请输入有效的页码数字")
         except Exception as e:
@@ -0,0 +1,57 @@
+"""把豆瓣榜单快照导出为 Parquet / Arrow 文件，供离线分析读取，不再直接查询生产库
+
+用法:
+    python Utils/export_snapshots.py --output exports            # 导出尚未导出的全部快照
+    python Utils/export_snapshots.py --output exports --snapshot 12 --format arrow
+
+每个文件是该快照时刻的完整榜单；增量入库模式下只有最新快照能导出，更早的增量快照会跳过并给出原因。
+"""
+import argparse
+
+from MySqlHelper import MySqlHelper
+from SnapshotExporter import IncompleteSnapshotError, SnapshotExporter
+
+# 数据库配置
+DB_CONFIG = {
+    'host': 'localhost',
+    'user': 'root',
+    'password': '123456',  # 替换为你的数据库密码
+    'database': 'intershipproject',  # 替换为你的数据库名
+    'port': 3306,
+    'charset': 'utf8mb4'
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='导出爬取快照为列式文件')
+    parser.add_argument('--output', default='exports', help='导出目录')
+    parser.add_argument('--snapshot', type=int, help='只导出指定快照')
+    parser.add_argument('--format', choices=sorted(SnapshotExporter.FORMATS), default='parquet', help='文件格式')
+    parser.add_argument('--compression', default='zstd', help='压缩算法，none 为不压缩')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='每次从数据库读取的行数')
+    parser.add_argument('--overwrite', action='store_true', help='覆盖已导出的文件')
+    args = parser.parse_args()
+
+    compression = None if args.compression.lower() == 'none' else args.compression
+    with MySqlHelper(**DB_CONFIG) as helper:
+        exporter = SnapshotExporter(helper, args.output, chunk_size=args.chunk_size,
+                                    file_format=args.format, compression=compression)
+        if args.snapshot is not None:
+            try:
+                results = [exporter.export_snapshot(args.snapshot, args.overwrite)]
+            except IncompleteSnapshotError as e:
+                parser.exit(1, f"{e}\n")
+        else:
+            results = exporter.export_all(args.overwrite)
+
+    for result in results:
+        if result.get('error'):
+            print(f"快照 {result['snapshot_id']} 未导出: {result['error']}")
+        elif result['skipped']:
+            print(f"快照 {result['snapshot_id']} 已存在，跳过: {result['path']}")
+        else:
+            print(f"快照 {result['snapshot_id']} 导出 {result['rows']} 行: {result['path']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""执行爬虫数据表的结构迁移（爬虫首次入库时也会自动执行）
+
+用法:
+    python Utils/migrate.py                # 执行全部未执行的迁移
+    python Utils/migrate.py --status       # 查看当前版本和待执行的迁移
+    python Utils/migrate.py --target 2     # 只迁移到指定版本
+"""
+import argparse
+
+from MySqlHelper import MySqlHelper
+from SchemaMigrator import SchemaMigrator
+
+# 数据库配置
+DB_CONFIG = {
+    'host': 'localhost',
+    'user': 'root',
+    'password': '123456',  # 替换为你的数据库密码
+    'database': 'intershipproject',  # 替换为你的数据库名
+    'port': 3306,
+    'charset': 'utf8mb4'
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='数据表结构迁移')
+    parser.add_argument('--status', action='store_true', help='只显示迁移状态')
+    parser.add_argument('--target', type=int, help='迁移到的版本号，默认最新')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='回填时每块的主键区间大小')
+    args = parser.parse_args()
+
+    with MySqlHelper(**DB_CONFIG) as helper:
+        migrator = SchemaMigrator(helper, chunk_size=args.chunk_size)
+        if args.status:
+            print(f"当前版本: {migrator.current_version()}")
+            for migration in migrator.pending(args.target):
+                print(f"待执行: {migration.version:03d}_{migration.name}")
+            return
+        done = migrator.migrate(args.target)
+        print(f"已执行 {len(done)} 个迁移，当前版本: {migrator.current_version()}")
+
+
+if __name__ == '__main__':
+    main()
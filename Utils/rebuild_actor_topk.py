@@ -0,0 +1,46 @@
+"""为启用演员摘要之前的历史快照生成 Space-Saving 摘要，并可只保留最近若干快照
+
+只处理主表中保存了完整榜单的快照（追加入库模式），增量模式的快照会跳过。
+
+用法:
+    python Utils/rebuild_actor_topk.py                    # 为所有尚无摘要的快照生成摘要
+    python Utils/rebuild_actor_topk.py --capacity 500 --snapshot 12 --snapshot 13
+    python Utils/rebuild_actor_topk.py --keep-last 720    # 删除更早快照的摘要
+"""
+import argparse
+
+from ActorTopK import ActorTopKStore
+from MySqlHelper import MySqlHelper
+
+# 数据库配置
+DB_CONFIG = {
+    'host': 'localhost',
+    'user': 'root',
+    'password': '123456',  # 替换为你的数据库密码
+    'database': 'intershipproject',  # 替换为你的数据库名
+    'port': 3306,
+    'charset': 'utf8mb4'
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成演员近似 Top-K 摘要')
+    parser.add_argument('--capacity', type=int, default=200, help='每个快照的摘要容量 k')
+    parser.add_argument('--snapshot', type=int, action='append', help='只处理指定快照（可重复），会覆盖已有摘要')
+    parser.add_argument('--keep-last', type=int, help='只保留最近 N 个快照的摘要')
+    args = parser.parse_args()
+
+    with MySqlHelper(**DB_CONFIG) as helper:
+        store = ActorTopKStore(helper)
+        store.initialize()
+        count = store.rebuild(args.capacity, args.snapshot)
+        print(f"已生成 {count} 个快照的摘要")
+        if args.snapshot and count < len(set(args.snapshot)):
+            print(f"跳过 {len(set(args.snapshot)) - count} 个不存在或不完整（增量入库）的快照")
+        if args.keep_last:
+            store.prune(args.keep_last)
+            print(f"已删除最近 {args.keep_last} 个快照之前的摘要")
+
+
+if __name__ == '__main__':
+    main()
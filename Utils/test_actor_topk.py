@@ -0,0 +1,93 @@
+"""SpaceSaving 摘要的测试：与 collections.Counter 的精确计数比较，检查模块文档中的误差界
+
+运行: python -m pytest Utils/test_actor_topk.py 或 python Utils/test_actor_topk.py
+"""
+import random
+import unittest
+from collections import Counter
+
+from ActorTopK import SpaceSaving
+
+
+def skewed_stream(length, distinct, seed):
+    """按 Zipf 分布抽取的演员名序列（少数演员出现很多次，大量演员只出现几次）"""
+    rng = random.Random(seed)
+    actors = [f'演员{i}' for i in range(distinct)]
+    weights = [1 / (rank + 1) for rank in range(distinct)]
+    return rng.choices(actors, weights=weights, k=length)
+
+
+class SpaceSavingTest(unittest.TestCase):
+
+    def check_bounds(self, sketch, exact):
+        """逐项检查 真实值 <= c <= 真实值 + error、error <= min <= m / k 以及未记录项的真实值 <= min"""
+        floor = sketch.min_count()
+        self.assertEqual(sketch.total, sum(exact.values()))
+        self.assertLessEqual(len(sketch.counters), sketch.capacity)
+        self.assertLessEqual(floor * sketch.capacity, sketch.total)
+        for item, (count, error) in sketch.counters.items():
+            self.assertLessEqual(exact[item], count, item)
+            self.assertLessEqual(count, exact[item] + error, item)
+            self.assertLessEqual(error, floor, item)
+        for item, true_count in exact.items():
+            if item not in sketch.counters:
+                self.assertLessEqual(true_count, floor, item)
+            if true_count * sketch.capacity > sketch.total:
+                self.assertIn(item, sketch.counters)
+
+    def test_error_bounds(self):
+        for seed, capacity in [(1, 10), (2, 50), (3, 200)]:
+            with self.subTest(seed=seed, capacity=capacity):
+                stream = skewed_stream(20000, 2000, seed)
+                sketch = SpaceSaving(capacity)
+                sketch.update_many(stream)
+                self.check_bounds(sketch, Counter(stream))
+
+    def test_bounds_hold_during_stream(self):
+        stream = skewed_stream(3000, 300, 4)
+        sketch = SpaceSaving(20)
+        exact = Counter()
+        for index, item in enumerate(stream, 1):
+            sketch.update(item)
+            exact[item] += 1
+            if index % 250 == 0:
+                self.check_bounds(sketch, exact)
+
+    def test_exact_when_few_distinct(self):
+        stream = skewed_stream(5000, 30, 5)
+        sketch = SpaceSaving(30)
+        sketch.update_many(stream)
+        exact = Counter(stream)
+        self.assertEqual({item: tuple(counter) for item, counter in sketch.counters.items()},
+                         {item: (count, 0) for item, count in exact.items()})
+        self.assertEqual(sketch.min_count(), 0 if len(exact) < 30 else min(exact.values()))
+
+    def test_weighted_update(self):
+        sketch = SpaceSaving(2)
+        for item, weight in [('甲', 5), ('乙', 3), ('丙', 1), ('甲', 2)]:
+            sketch.update(item, weight)
+        # 丙替换计数最小的乙，继承其计数 3 作为误差
+        self.assertEqual(sketch.top(), [('甲', 7, 0), ('丙', 4, 3)])
+        self.assertEqual(sketch.total, 11)
+        self.assertEqual(sketch.min_count(), 4)
+
+    def test_top_order(self):
+        stream = skewed_stream(10000, 500, 6)
+        sketch = SpaceSaving(100)
+        sketch.update_many(stream)
+        top = sketch.top(10)
+        self.assertEqual(len(top), 10)
+        self.assertEqual([count for _, count, _ in top], sorted((count for _, count, _ in top), reverse=True))
+        # 最热门的几位演员远超 m / k，必然排在前面
+        exact = Counter(stream)
+        heavy = {item for item, count in exact.items() if count * sketch.capacity > 2 * sketch.total}
+        self.assertTrue(heavy)
+        self.assertLessEqual(heavy, {item for item, _, _ in top})
+
+    def test_invalid_capacity(self):
+        with self.assertRaises(ValueError):
+            SpaceSaving(0)
+
+
+if __name__ == '__main__':
+    unittest.main()
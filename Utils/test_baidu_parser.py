@@ -0,0 +1,63 @@
+"""百度热搜解析后端的一致性测试：对 benchmarks/fixtures 下保存的页面，每个已安装的后端都应返回与 bs4 相同的结果
+
+未安装的后端（selectolax / lxml）跳过。
+运行: python -m pytest Utils/test_baidu_parser.py 或 python Utils/test_baidu_parser.py
+"""
+import glob
+import os
+import unittest
+
+from BaiduHotParser import PARSERS, available_parsers, parse_with_bs4
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../benchmarks/fixtures')
+
+
+def load_fixtures():
+    """[(文件名, html), ...]"""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, '*.html'))):
+        with open(path, encoding='utf-8') as f:
+            pages.append((os.path.basename(path), f.read()))
+    return pages
+
+
+class BaiduHotParserTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pages = load_fixtures()
+        if not cls.pages:
+            raise unittest.SkipTest(f"{FIXTURE_DIR} 中没有样本页面")
+
+    def test_backends_match_bs4(self):
+        for name, html in self.pages:
+            expected = parse_with_bs4(html)
+            self.assertTrue(expected, name)
+            for backend in available_parsers():
+                with self.subTest(page=name, backend=backend):
+                    self.assertEqual(PARSERS[backend][0](html, 100), expected)
+
+    def test_limit(self):
+        for name, html in self.pages:
+            expected = parse_with_bs4(html)[:10]
+            for backend in available_parsers():
+                with self.subTest(page=name, backend=backend):
+                    self.assertEqual(PARSERS[backend][0](html, 10), expected)
+
+    def test_reconstructed_page(self):
+        html = dict(self.pages).get('baidu_realtime_reconstructed.html')
+        if html is None:
+            self.skipTest("没有重建的样本页面")
+        hot_list = parse_with_bs4(html)
+        self.assertEqual([item[0] for item in hot_list], list(range(1, 51)))
+        titles = [item[1] for item in hot_list]
+        # 实体解码、首尾空白去掉；侧栏中热搜项之外的同名 div 不计入
+        self.assertIn('A股三大指数集体收涨 & 成交额破万亿', titles)
+        self.assertIn('首尾带空白的热搜标题', titles)
+        self.assertFalse([title for title in titles if title.startswith('推荐榜单')])
+        self.assertTrue(all(item[2].isdigit() and item[3].startswith('https://www.baidu.com/s?wd=')
+                            for item in hot_list))
+
+
+if __name__ == '__main__':
+    unittest.main()
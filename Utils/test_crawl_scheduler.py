@@ -0,0 +1,159 @@
+"""定时爬取任务的测试：用 FakeClock 跳过重试等待，对本地桩 HTTP 服务器抓取（不访问网络、不需要数据库）
+
+运行: python -m pytest Utils/test_crawl_scheduler.py 或 python Utils/test_crawl_scheduler.py
+"""
+import json
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from CrawlScheduler import ApiNotifier, BaiduCrawlJob, CrawlScheduler, DoubanCrawlJob, FakeClock
+from douban_hot_100 import DoubanMovieScraper
+
+PAGE_SIZE = 20
+TOTAL_MOVIES = 95
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """GET 按 start/limit 返回榜单切片，server.failing_pages 中的页返回 500；POST 记录通知请求"""
+
+    def do_GET(self):
+        params = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        page = int(params['start'][0]) // PAGE_SIZE + 1
+        self.server.pages.append(page)
+        if page in self.server.failing_pages:
+            self.send_error(500)
+            return
+        start = (page - 1) * PAGE_SIZE
+        movies = [{'title': f'电影{i}', 'types': ['剧情'], 'regions': ['美国'], 'release_date': '2000-01-01',
+                   'score': '9.0', 'actors': [f'演员{i}']} for i in range(start, min(start + PAGE_SIZE, TOTAL_MOVIES))]
+        self.reply(200, json.dumps(movies).encode('utf-8'))
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.server.notifications.append((self.path, self.headers.get('Authorization')))
+        self.reply(200, b'{"success": true}')
+
+    def reply(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class RecordingScraper(DoubanMovieScraper):
+    """不写数据库，记录每次入库的电影并按原逻辑调用 on_stored"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.stored = []
+
+    def store_to_database(self, movies, chunk_size=500):
+        self.stored.append(list(movies))
+        for callback in self.on_stored:
+            callback()
+        return {'row_count': len(self.stored[-1])}
+
+
+class CrawlSchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        self.server.pages = []
+        self.server.failing_pages = set()
+        self.server.notifications = []
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.root = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.checkpoint_dir = tempfile.mkdtemp()
+        self.clock = FakeClock()
+        self.logs = []
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        shutil.rmtree(self.checkpoint_dir)
+
+    def make_scheduler(self, job):
+        return CrawlScheduler([job], checkpoint_dir=self.checkpoint_dir, clock=self.clock, threaded=False,
+                              logger=self.logs.append)
+
+    def make_douban_job(self, **kwargs):
+        scraper = RecordingScraper(base_url=f'{self.root}/j/chart/top_list?type=13&', **kwargs)
+        return DoubanCrawlJob(scraper, 1, 5, interval=3600, max_concurrency=3, attempts=3)
+
+    def test_failed_page_keeps_other_checkpoints(self):
+        self.server.failing_pages = {2}
+        job = self.make_douban_job()
+        scheduler = self.make_scheduler(job)
+
+        self.assertEqual(scheduler.run_pending(), ['douban'])
+        _, _, _, ok, error = scheduler.history[-1]
+        self.assertFalse(ok)
+        self.assertIn('[2]', str(error))
+        # 失败页按重试次数请求，退避只推进假时钟
+        self.assertEqual(self.server.pages.count(2), 3)
+        self.assertEqual(len(self.clock.sleeps), 2)
+        # 其余页面都已写入断点，本次不入库
+        state = scheduler.checkpoints.load('douban')
+        self.assertEqual(sorted(state['pages'], key=int), ['1', '3', '4', '5'])
+        self.assertEqual(job.scraper.stored, [])
+
+        # 下次运行只重抓失败的页，排名连续
+        self.server.failing_pages = set()
+        self.server.pages = []
+        stats = job.run(scheduler)
+        self.assertEqual(self.server.pages, [2])
+        self.assertEqual(stats, {'row_count': TOTAL_MOVIES})
+        self.assertEqual([movie[0] for movie in job.scraper.stored[0]], list(range(1, TOTAL_MOVIES + 1)))
+        self.assertEqual([movie[3] for movie in job.scraper.stored[0][:2]], ['电影0', '电影1'])
+        self.assertIsNone(scheduler.checkpoints.load('douban'))
+
+    def test_expired_checkpoint_is_refetched(self):
+        self.server.failing_pages = {5}
+        job = self.make_douban_job()
+        scheduler = self.make_scheduler(job)
+        scheduler.run_pending()
+
+        self.server.failing_pages = set()
+        self.server.pages = []
+        self.clock.now += 3600
+        job.run(scheduler)
+        self.assertEqual(sorted(self.server.pages), [1, 2, 3, 4, 5])
+
+    def test_douban_store_notifies_api(self):
+        notifier = ApiNotifier(f'{self.root}/api/cache-invalidate', token='abc', logger=self.logs.append)
+        job = self.make_douban_job(on_stored=[notifier])
+        self.make_scheduler(job).run_pending()
+        self.assertEqual(self.server.notifications, [('/api/cache-invalidate', 'Bearer abc')])
+
+    def test_baidu_notifies_only_when_stored(self):
+        notifier = ApiNotifier(f'{self.root}/api/cache-invalidate', logger=self.logs.append)
+        results = [{'row_count': 1}, None]
+        job = BaiduCrawlJob(lambda: [(1, '标题', '100', 'link')], lambda hot_search: results.pop(0),
+                            interval=600, on_stored=[notifier])
+        scheduler = self.make_scheduler(job)
+        job.run(scheduler)
+        job.run(scheduler)  # 榜单未变化，没有写入
+        self.assertEqual(self.server.notifications, [('/api/cache-invalidate', None)])
+
+    def test_notify_failure_is_logged(self):
+        with socket.socket() as sock:  # 取一个没有服务监听的端口
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        notifier = ApiNotifier(f'http://127.0.0.1:{port}/api/cache-invalidate', timeout=1, logger=self.logs.append)
+        self.assertFalse(notifier())
+        self.assertEqual(len(self.logs), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
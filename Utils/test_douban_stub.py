@@ -0,0 +1,109 @@
+"""豆瓣榜单爬虫对本地桩 HTTP 服务器的测试（不访问网络、不需要数据库）
+
+运行: python -m pytest Utils/test_douban_stub.py 或 python Utils/test_douban_stub.py
+"""
+import json
+import threading
+import time
+import unittest
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from douban_hot_100 import DoubanMovieScraper
+
+PAGE_SIZE = 20
+TOTAL_MOVIES = 95  # 最后一页不满
+
+
+def make_movie(position):
+    """第 position 部电影（从0开始）的接口数据"""
+    return {
+        'title': f'电影{position}',
+        'types': ['剧情', f'类型{position % 3}'],
+        'regions': ['中国大陆'],
+        'release_date': f'{1990 + position % 30}-01-01',
+        'score': f'{9.0 + position % 10 / 10:.1f}',
+        'actors': [f'演员{position}', f'演员{position + 1}'],
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """按 start/limit 返回榜单切片；靠前的页故意慢一些，使并发抓取的完成顺序与页码顺序不同"""
+
+    def do_GET(self):
+        parts = urllib.parse.urlsplit(self.path)
+        params = urllib.parse.parse_qs(parts.query)
+        start = int(params['start'][0])
+        limit = int(params['limit'][0])
+        self.server.requests.append((parts.path, start, limit))
+        time.sleep(max(0.0, 0.05 - start / PAGE_SIZE * 0.01))
+        body = json.dumps([make_movie(i) for i in range(start, min(start + limit, TOTAL_MOVIES))]).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class DoubanStubServerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        self.server.requests = []
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        port = self.server.server_address[1]
+        self.base_url = f'http://127.0.0.1:{port}/j/chart/top_list?type=13&interval_id=100%3A90&action=&'
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def assert_movies(self, movies, start_page=1):
+        offset = (start_page - 1) * PAGE_SIZE
+        self.assertEqual(len(movies), TOTAL_MOVIES - offset)
+        for rank, movie in enumerate(movies, start=1):
+            position = offset + rank - 1
+            expected = make_movie(position)
+            self.assertEqual(movie, (
+                rank,
+                ', '.join(expected['types']),
+                ', '.join(expected['regions']),
+                expected['title'],
+                expected['release_date'],
+                expected['score'],
+                ', '.join(expected['actors']),
+            ))
+
+    def test_serial_scrape(self):
+        scraper = DoubanMovieScraper(base_url=self.base_url)
+        self.assert_movies(scraper.scrape_movies(1, 5))
+        self.assertEqual(
+            [(start, limit) for _, start, limit in self.server.requests],
+            [(0, 20), (20, 20), (40, 20), (60, 20), (80, 20)],
+        )
+        self.assertTrue(all(path == '/j/chart/top_list' for path, _, _ in self.server.requests))
+
+    def test_concurrent_scrape_keeps_page_order(self):
+        scraper = DoubanMovieScraper(base_url=self.base_url, max_workers=4)
+        self.assert_movies(scraper.scrape_movies(1, 5))
+        self.assertEqual(sorted(start for _, start, _ in self.server.requests), [0, 20, 40, 60, 80])
+
+    def test_ranks_start_from_start_page(self):
+        scraper = DoubanMovieScraper(base_url=self.base_url, max_workers=2)
+        self.assert_movies(scraper.scrape_movies(3, 5), start_page=3)
+
+    def test_rate_limit_spaces_requests(self):
+        scraper = DoubanMovieScraper(base_url=self.base_url, max_workers=4, rate_limit=20)
+        started = time.monotonic()
+        scraper.scrape_movies(1, 5)
+        # 5 次请求之间至少 4 个 1/20 秒的间隔
+        self.assertGreaterEqual(time.monotonic() - started, 4 / 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,296 @@
+"""MySqlHelper 的测试，对本地 MySQL 协议桩服务器（MySqlStubServer）执行：
+    - 流式查询：中途停止 query_iter 后，同一对象还能继续查询
+    - 批量插入：bulk_insert 的分块、失败行重试与逐行 INSERT 得到的表内容一致
+    - 列式查询：ColumnBatch / query_columns 的结果与逐行读取、Counter 计数一致（需要 numpy）
+
+需要 mysql-mimic，未安装时跳过连接桩服务器的测试。
+运行: python -m pytest Utils/test_mysql_helper.py 或 python Utils/test_mysql_helper.py
+"""
+import datetime
+import random
+import unittest
+from collections import Counter
+
+from pymysql.constants import FIELD_TYPE
+
+from MySqlHelper import ColumnBatch, DictionaryArray, MySqlHelper, MySqlPool, ReplicaRouter, np
+from MySqlStubServer import MySqlStubServer, MysqlServer
+
+TOTAL_ROWS = 2000
+INSERT_SQL = "INSERT INTO movies (id, title, score) VALUES (%s, %s, %s)"
+
+SCHEMA = f"""
+CREATE TABLE numbers (n INTEGER PRIMARY KEY);
+WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < {TOTAL_ROWS})
+INSERT INTO numbers SELECT n FROM seq;
+"""
+
+
+@unittest.skipIf(MysqlServer is None, "需要安装 mysql-mimic")
+class QueryIterAbortTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MySqlStubServer()
+        cls.server.execute_script(SCHEMA)
+        cls.server.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def read_some(self, db, discard_on_abort):
+        """读取前几行后中途停止迭代"""
+        rows = []
+        for row in db.query_iter("SELECT n FROM numbers ORDER BY n", batch_size=10, discard_on_abort=discard_on_abort):
+            rows.append(row['n'])
+            if len(rows) == 3:
+                break
+        return rows
+
+    def assert_usable(self, db):
+        self.assertEqual(db.query_one("SELECT COUNT(*) AS total FROM numbers"), {'total': TOTAL_ROWS})
+        self.assertEqual(self.read_some(db, True), [1, 2, 3])
+        self.assertEqual(db.query_one("SELECT MAX(n) AS n FROM numbers"), {'n': TOTAL_ROWS})
+
+    def test_discard_then_query(self):
+        with MySqlHelper(**self.server.db_config) as db:
+            self.assertEqual(self.read_some(db, True), [1, 2, 3])
+            self.assert_usable(db)
+
+    def test_drain_then_query(self):
+        with MySqlHelper(**self.server.db_config) as db:
+            self.assertEqual(self.read_some(db, False), [1, 2, 3])
+            self.assert_usable(db)
+
+    def test_discard_with_pool(self):
+        pool = MySqlPool(**self.server.db_config, max_size=1)
+        try:
+            with MySqlHelper(pool=pool) as db:
+                self.read_some(db, True)
+                # 断开的连接已归还（被丢弃），唯一的名额可以重新借出
+                self.assert_usable(db)
+            self.assertEqual(pool.stats()['size'], 1)
+            with MySqlHelper(pool=pool) as db:
+                self.assertEqual(db.query_one("SELECT MIN(n) AS n FROM numbers"), {'n': 1})
+        finally:
+            pool.close()
+
+    def test_discard_with_router(self):
+        primary = MySqlPool(**self.server.db_config, max_size=1)
+        replica = MySqlPool(**self.server.db_config, max_size=1)
+        router = ReplicaRouter(primary, [replica])
+        try:
+            with MySqlHelper(router=router) as db:
+                self.read_some(db, True)
+                self.assert_usable(db)
+            self.assertEqual(router.stats()['replicas'][0]['healthy'], True)
+        finally:
+            router.close()
+
+
+
+@unittest.skipIf(MysqlServer is None, "需要安装 mysql-mimic")
+class BulkInsertTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MySqlStubServer()
+        self.server.execute_script("CREATE TABLE movies (id INTEGER PRIMARY KEY, title TEXT NOT NULL, score REAL);")
+        self.server.start()
+        self.db = MySqlHelper(**self.server.db_config)
+        self.statements = []
+        MySqlHelper.add_listener(self.record)
+
+    def tearDown(self):
+        MySqlHelper.remove_listener(self.record)
+        self.db.close()
+        self.server.stop()
+
+    def record(self, event, sql, rows, seconds, error):
+        if event == 'execute':
+            self.statements.append((sql, error is None))
+
+    def table(self):
+        return [tuple(row) for row in self.server.sqlite.execute("SELECT id, title, score FROM movies ORDER BY id")]
+
+    def naive_table(self, rows):
+        """逐行 INSERT 的结果：主键重复或标题为空的行被拒绝"""
+        expected = {}
+        for row in rows:
+            if row[0] not in expected and row[1] is not None:
+                expected[row[0]] = row
+        return sorted(expected.values())
+
+    def test_chunks_and_progress(self):
+        consumed = []
+
+        def generate():
+            for i in range(1, 2501):
+                consumed.append(i)
+                yield i, f'电影{i}', i % 100 / 10
+
+        progress = []
+        stats = self.db.bulk_insert(INSERT_SQL, generate(), chunk_size=1000,
+                                    progress=lambda s: progress.append((s['rows'], s['chunks'], len(consumed))))
+        self.assertEqual((stats['rows'], stats['failed_rows'], stats['chunks']), (2500, 0, 3))
+        # 逐条消费生成器，每块写满即提交
+        self.assertEqual(progress, [(1000, 1, 1001), (2000, 2, 2001), (2500, 3, 2500)])
+        self.assertEqual(self.table(), [(i, f'电影{i}', i % 100 / 10) for i in range(1, 2501)])
+
+    def test_max_packet(self):
+        rows = [(i, '片名' * (i % 7 + 1), None) for i in range(1, 301)]
+        stats = self.db.bulk_insert(INSERT_SQL, rows, chunk_size=1000, max_packet=600)
+        self.assertEqual((stats['rows'], stats['failed_rows']), (300, 0))
+        self.assertEqual(stats['chunks'], len(self.statements))
+        self.assertGreater(stats['chunks'], 10)
+        for sql, _ in self.statements:
+            self.assertLessEqual(len(sql.encode('utf-8')), 600)
+        self.assertEqual(self.table(), rows)
+
+    def test_failed_rows_retried_one_by_one(self):
+        self.server.execute_script("INSERT INTO movies VALUES (5, '已存在', 9.0);")
+        rows = [(i, f'电影{i}', 8.0) for i in range(1, 21)] + [(3, '重复', 1.0), (21, None, 2.0), (22, '电影22', 3.0)]
+        stats = self.db.bulk_insert(INSERT_SQL, rows, chunk_size=8)
+        # 主键 5 与表中已有行冲突、主键 3 重复、21 标题为空，只丢弃这三行
+        self.assertEqual((stats['rows'], stats['failed_rows'], stats['chunks']), (20, 3, 3))
+        self.assertEqual(self.table(), self.naive_table([(5, '已存在', 9.0)] + rows))
+        failed_chunks = [sql for sql, ok in self.statements if not ok and sql.count('),(') > 0]
+        self.assertEqual(len(failed_chunks), 2)
+
+    def test_dict_rows(self):
+        rows = [{'id': i, 'title': f"片名'{i}", 'score': None} for i in range(1, 11)]
+        stats = self.db.bulk_insert("INSERT INTO movies (id, title, score) VALUES (%(id)s, %(title)s, %(score)s)",
+                                    iter(rows), chunk_size=4)
+        self.assertEqual((stats['rows'], stats['chunks']), (10, 3))
+        self.assertEqual(self.table(), [(row['id'], row['title'], None) for row in rows])
+
+    def test_empty_rows(self):
+        stats = self.db.bulk_insert(INSERT_SQL, iter(()))
+        self.assertEqual((stats['rows'], stats['chunks']), (0, 0))
+        self.assertEqual(self.statements, [])
+
+    def test_rejects_non_insert(self):
+        with self.assertRaises(ValueError):
+            self.db.bulk_insert("UPDATE movies SET score = %s WHERE id = %s", [(1.0, 1)])
+
+
+
+def random_movies(count, seed):
+    """(id, 类型, 评分, 上映日期, 入库时间, 票房) 元组行，各列随机含 NULL"""
+    rng = random.Random(seed)
+    types = ['剧情', '喜剧', '动画, 奇幻', '剧情, 爱情', '科幻']
+    rows = []
+    for i in range(1, count + 1):
+        rows.append((
+            i,
+            None if rng.random() < 0.1 else rng.choice(types),
+            None if rng.random() < 0.1 else rng.randint(10, 97) / 10,
+            None if rng.random() < 0.1 else datetime.date(1990, 1, 1) + datetime.timedelta(days=rng.randrange(9000)),
+            datetime.datetime(2024, 1, 1, 8, 30, 15, 250000) + datetime.timedelta(minutes=i),
+            None if rng.random() < 0.2 else rng.randrange(10 ** 9),
+        ))
+    return rows
+
+
+MOVIE_DESCRIPTION = [
+    ('id', FIELD_TYPE.LONGLONG), ('type', FIELD_TYPE.VAR_STRING), ('score', FIELD_TYPE.NEWDECIMAL),
+    ('release_date', FIELD_TYPE.DATE), ('created_at', FIELD_TYPE.DATETIME), ('box_office', FIELD_TYPE.LONG),
+]
+
+
+@unittest.skipIf(np is None, "需要安装 numpy")
+class ColumnBatchTest(unittest.TestCase):
+
+    def test_from_rows_matches_rows(self):
+        rows = random_movies(1000, 1)
+        for batch_size in (1, 7, 1000, 5000):
+            with self.subTest(batch_size=batch_size):
+                batch = ColumnBatch.from_rows(rows, MOVIE_DESCRIPTION, batch_size=batch_size)
+                self.assertEqual(len(batch), 1000)
+                self.assertEqual(batch.column_names, [name for name, _ in MOVIE_DESCRIPTION])
+                names = batch.column_names
+                self.assertEqual(batch.to_pylist(), [dict(zip(names, row)) for row in rows])
+
+    def test_column_types(self):
+        batch = ColumnBatch.from_rows(random_movies(200, 2), MOVIE_DESCRIPTION, batch_size=50)
+        self.assertEqual(batch['id'].dtype, np.int64)
+        self.assertIsInstance(batch['type'], DictionaryArray)
+        self.assertEqual(batch['score'].dtype, np.float64)
+        self.assertEqual(batch['release_date'].dtype, np.dtype('datetime64[D]'))
+        self.assertEqual(batch['created_at'].dtype, np.dtype('datetime64[us]'))
+        # 含 NULL 的整数列为 float64，NULL 为 NaN
+        self.assertEqual(batch['box_office'].dtype, np.float64)
+        self.assertTrue(np.isnan(batch['box_office']).any())
+        self.assertIn('type', batch)
+        self.assertNotIn('title', batch)
+
+    def test_value_counts_match_counter(self):
+        rows = random_movies(3000, 3)
+        batch = ColumnBatch.from_rows(rows, MOVIE_DESCRIPTION, batch_size=256)
+        dictionary, counts = batch['type'].value_counts()
+        expected = Counter(row[1] for row in rows if row[1] is not None)
+        self.assertEqual(dict(zip(dictionary, counts.tolist())), dict(expected))
+        # 各批共用一个字典，按首次出现顺序排列
+        first_seen = list(dict.fromkeys(row[1] for row in rows if row[1] is not None))
+        self.assertEqual(dictionary, first_seen)
+
+    def test_mask(self):
+        rows = random_movies(500, 4)
+        batch = ColumnBatch.from_rows(rows, MOVIE_DESCRIPTION)
+        mask = np.nan_to_num(batch['score'], nan=0) >= 8
+        self.assertEqual(batch['type'].to_pylist(mask),
+                         [row[1] for row in rows if row[2] is not None and row[2] >= 8])
+
+    def test_without_dictionary_encoding(self):
+        rows = random_movies(100, 5)
+        batch = ColumnBatch.from_rows(rows, MOVIE_DESCRIPTION, dictionary_encode=False)
+        self.assertEqual(batch['type'].dtype, object)
+        self.assertEqual(batch['type'].tolist(), [row[1] for row in rows])
+
+    def test_empty(self):
+        batch = ColumnBatch.from_rows([], MOVIE_DESCRIPTION)
+        self.assertEqual(len(batch), 0)
+        self.assertEqual(batch.to_pylist(), [])
+        self.assertEqual(batch['id'].dtype, np.int64)
+        self.assertEqual(batch['type'].value_counts()[1].tolist(), [])
+
+
+@unittest.skipIf(MysqlServer is None or np is None, "需要安装 mysql-mimic 和 numpy")
+class QueryColumnsTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MySqlStubServer()
+        cls.server.execute_script("CREATE TABLE movies (id INTEGER PRIMARY KEY, type TEXT, score REAL, votes INTEGER);")
+        rng = random.Random(6)
+        cls.server.sqlite.executemany("INSERT INTO movies VALUES (?, ?, ?, ?)", [
+            (i, rng.choice(['剧情', '喜剧', '动画, 奇幻', None]), rng.randint(10, 97) / 10, rng.randrange(10 ** 6))
+            for i in range(1, 2501)
+        ])
+        cls.server.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def test_matches_dict_query(self):
+        sql = "SELECT id, type, score, votes FROM movies WHERE score >= %s ORDER BY id"
+        with MySqlHelper(**self.server.db_config) as db:
+            batch = db.query_columns(sql, (5.0,), batch_size=300)
+            rows = db.query(sql, (5.0,))
+        self.assertEqual(len(batch), len(rows))
+        self.assertEqual(batch.to_pylist(), rows)
+        dictionary, counts = batch['type'].value_counts()
+        self.assertEqual(dict(zip(dictionary, counts.tolist())),
+                         dict(Counter(row['type'] for row in rows if row['type'] is not None)))
+        self.assertEqual(int(batch['votes'].sum()), sum(row['votes'] for row in rows))
+
+    def test_error_raises(self):
+        with MySqlHelper(**self.server.db_config) as db:
+            with self.assertRaises(Exception):
+                db.query_columns("SELECT missing FROM movies")
+            self.assertEqual(db.query_one("SELECT COUNT(*) AS n FROM movies"), {'n': 2500})
+
+
+if __name__ == '__main__':
+    unittest.main()
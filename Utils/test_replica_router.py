@@ -0,0 +1,123 @@
+"""ReplicaRouter 剔除、试探恢复与定期健康检查的测试（用假连接池，不需要数据库）
+
+运行: python -m pytest Utils/test_replica_router.py 或 python Utils/test_replica_router.py
+"""
+import time
+import unittest
+
+from MySqlHelper import PoolTimeoutError, ReplicaRouter
+
+
+class FakeConnection:
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def ping(self, reconnect=False):
+        self.pool.pings += 1
+        if not self.pool.up:
+            raise ConnectionError("从库不可达")
+
+
+class FakePool:
+    """只实现 ReplicaRouter 用到的接口；up 为False时 ping 失败，busy 为True时借连接超时"""
+
+    def __init__(self, host):
+        self.connect_kwargs = {'host': host, 'port': 3306}
+        self.up = True
+        self.busy = False
+        self.pings = 0
+
+    def acquire(self, timeout=None):
+        if self.busy:
+            raise PoolTimeoutError("连接池已满")
+        return FakeConnection(self)
+
+    def release(self, connection):
+        pass
+
+    def close(self):
+        pass
+
+    def reset_after_fork(self):
+        pass
+
+    def stats(self):
+        return {}
+
+
+class ReplicaRouterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.primary = FakePool('primary')
+        self.a, self.b = FakePool('a'), FakePool('b')
+        self.router = ReplicaRouter(self.primary, [self.a, self.b], eject_seconds=0.05, max_eject_seconds=1)
+
+    def tearDown(self):
+        self.router.close()
+
+    def choices(self, count):
+        return [self.router.choose_replica() for _ in range(count)]
+
+    def test_ejected_replica_gets_single_probe(self):
+        self.router.record_failure(self.a)
+        self.assertNotIn(self.a, self.choices(4))
+        time.sleep(0.06)
+        # 剔除到期后只有一个请求拿到 a 作为试探，其余请求仍只用 b
+        chosen = self.choices(6)
+        self.assertEqual(chosen.count(self.a), 1)
+        self.assertTrue(self.router.stats()['replicas'][0]['probing'])
+        self.router.record_success(self.a, 0.001)
+        self.assertGreater(self.choices(4).count(self.a), 1)
+
+    def test_failed_probe_doubles_ejection(self):
+        self.router.record_failure(self.a)
+        time.sleep(0.06)
+        self.assertEqual(self.router.choose_replica(), self.a)
+        self.router.record_failure(self.a)
+        time.sleep(0.03)  # 第二次剔除 0.1 秒，尚未到期
+        self.assertNotIn(self.a, self.choices(4))
+        time.sleep(0.1)
+        self.assertIn(self.a, self.choices(4))
+
+    def test_unanswered_probe_lease_expires(self):
+        self.router.record_failure(self.a)
+        time.sleep(0.06)
+        self.assertEqual(self.choices(4).count(self.a), 1)
+        time.sleep(0.06)  # 试探请求既没成功也没失败，租约到期后放行下一个试探
+        self.assertEqual(self.choices(4).count(self.a), 1)
+
+    def test_check_health(self):
+        self.a.up = False
+        self.b.busy = True
+        self.assertEqual(self.router.check_health(), {'a:3306': False, 'b:3306': True})
+        self.assertEqual(self.choices(3), [self.b] * 3)
+        self.a.up = True
+        self.assertEqual(self.router.check_health()['a:3306'], True)
+        self.assertIn(self.a, self.choices(3))
+
+    def test_periodic_health_checks(self):
+        self.a.up = False
+        self.router.start_health_checks(0.01)
+        deadline = time.monotonic() + 2
+        while self.router.stats()['replicas'][0]['healthy'] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertFalse(self.router.stats()['replicas'][0]['healthy'])
+        self.router.close()
+        self.router._health_thread.join(1)
+        self.assertFalse(self.router._health_thread.is_alive())
+        pings = self.a.pings
+        time.sleep(0.05)
+        self.assertEqual(self.a.pings, pings)
+
+    def test_health_checks_restart_after_fork(self):
+        self.router.start_health_checks(0.01)
+        inherited, inherited_stop = self.router._health_thread, self.router._health_stop
+        self.router.reset_after_fork()
+        inherited_stop.set()  # 真正 fork 时子进程中没有父进程的线程
+        self.assertIsNot(self.router._health_thread, inherited)
+        self.assertTrue(self.router._health_thread.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
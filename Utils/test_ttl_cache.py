@@ -0,0 +1,189 @@
+"""TTLCache 的测试：用假时钟推进时间，随机读写序列的结果与逐条维护过期时间和使用顺序的朴素模型比较
+
+运行: python -m pytest Utils/test_ttl_cache.py 或 python Utils/test_ttl_cache.py
+"""
+import random
+import threading
+import unittest
+from unittest import mock
+
+import TTLCache as ttl_cache_module
+from TTLCache import TTLCache
+
+
+class FakeTime:
+    """只提供 monotonic 的假时间模块，now 由测试推进"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class NaiveCache:
+    """朴素模型：条目列表按使用先后排列，每次操作逐条检查"""
+
+    def __init__(self, max_size, ttl):
+        self.max_size, self.ttl = max_size, ttl
+        self.entries = []  # [键, 过期时间, 值]，末尾为最近使用
+        self.hits = self.misses = self.evictions = 0
+
+    def find(self, key):
+        for index, entry in enumerate(self.entries):
+            if entry[0] == key:
+                return index
+        return None
+
+    def get(self, key, now):
+        index = self.find(key)
+        if index is not None and self.entries[index][1] > now:
+            self.entries.append(self.entries.pop(index))
+            self.hits += 1
+            return self.entries[-1][2]
+        if index is not None:
+            del self.entries[index]
+        self.misses += 1
+        return None
+
+    def set(self, key, value, now, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        index = self.find(key)
+        if index is not None:
+            del self.entries[index]
+        self.entries.append([key, now + ttl, value])
+        while len(self.entries) > self.max_size:
+            del self.entries[0]
+            self.evictions += 1
+
+
+class TTLCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeTime()
+        patcher = mock.patch.object(ttl_cache_module, 'time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_matches_naive_model(self):
+        for seed in range(5):
+            with self.subTest(seed=seed):
+                rng = random.Random(seed)
+                cache, model = TTLCache(max_size=8, ttl=10), NaiveCache(8, 10)
+                for step in range(3000):
+                    key = rng.randrange(20)
+                    operation = rng.random()
+                    if operation < 0.45:
+                        self.assertEqual(cache.get(key), model.get(key, self.clock.now), step)
+                    elif operation < 0.85:
+                        ttl = rng.choice([None, None, 0, 3, 30])
+                        cache.set(key, step, ttl=ttl)
+                        model.set(key, step, self.clock.now, ttl=ttl)
+                    elif operation < 0.9:
+                        cache.invalidate(key)
+                        index = model.find(key)
+                        if index is not None:
+                            del model.entries[index]
+                    else:
+                        self.clock.now += rng.choice([0.5, 2, 5, 11])
+                stats = cache.stats()
+                self.assertEqual((stats['hits'], stats['misses'], stats['evictions']),
+                                 (model.hits, model.misses, model.evictions))
+                self.assertEqual(list(cache._data), [entry[0] for entry in model.entries])
+
+    def test_expiry(self):
+        cache = TTLCache(max_size=4, ttl=10)
+        cache.set('a', 1)
+        cache.set('b', 2, ttl=20)
+        self.clock.now += 9.9
+        self.assertEqual((cache.get('a'), cache.get('b')), (1, 2))
+        self.clock.now += 0.1
+        self.assertEqual(cache.get('a', 'missing'), 'missing')
+        self.assertEqual(cache.get('b'), 2)
+        # 过期条目在读取时删除
+        self.assertEqual(cache.stats()['size'], 1)
+
+    def test_lru_eviction(self):
+        cache = TTLCache(max_size=2, ttl=10)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')  # a 变为最近使用
+        cache.set('c', 3)
+        self.assertEqual((cache.get('a'), cache.get('b'), cache.get('c')), (1, None, 3))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_non_positive_ttl_not_stored(self):
+        cache = TTLCache(max_size=2, ttl=0)
+        cache.set('a', 1)
+        cache.set('b', 2, ttl=-1)
+        self.assertEqual(cache.stats()['size'], 0)
+        cache.set('c', 3, ttl=5)
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_get_or_set(self):
+        cache = TTLCache(max_size=4, ttl=10)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return len(calls)
+
+        self.assertEqual([cache.get_or_set('k', compute) for _ in range(3)], [1, 1, 1])
+        self.clock.now += 10
+        self.assertEqual(cache.get_or_set('k', compute), 2)
+
+        def fail():
+            raise ValueError('计算失败')
+
+        with self.assertRaises(ValueError):
+            cache.get_or_set('e', fail)
+        self.assertEqual(cache.get('e', 'missing'), 'missing')
+
+    def test_cached_none_is_hit(self):
+        cache = TTLCache(max_size=4, ttl=10)
+        calls = []
+        cache.get_or_set('k', lambda: calls.append(1))
+        cache.get_or_set('k', lambda: calls.append(1))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.stats()['hit_rate'], 0.5)
+
+    def test_invalidate_all(self):
+        cache = TTLCache(max_size=4, ttl=10)
+        for key in 'abc':
+            cache.set(key, key)
+        cache.invalidate()
+        self.assertEqual(cache.stats()['size'], 0)
+        self.assertIsNone(cache.get('a'))
+
+    def test_concurrent_access(self):
+        cache = TTLCache(max_size=16, ttl=10)
+        reads, errors = [], []
+
+        def worker(seed):
+            rng = random.Random(seed)
+            count = 0
+            for _ in range(2000):
+                key = rng.randrange(40)
+                if rng.random() < 0.5:
+                    cache.set(key, key)
+                else:
+                    count += 1
+                    value = cache.get(key)
+                    if value is not None and value != key:
+                        errors.append((key, value))
+            reads.append(count)
+
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = cache.stats()
+        self.assertEqual(errors, [])
+        self.assertLessEqual(stats['size'], 16)
+        self.assertEqual(stats['hits'] + stats['misses'], sum(reads))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,5 @@
+import os
+
 from flask import request, Flask
 
 
@@ -41,7 +43,12 @@ class APIService01:
         return f"body中的参数是{body_param}，param中的参数是{url_param}"
 
 
-# 使用示例
+def create_app():
+    """应用工厂，供 gunicorn 等 WSGI 服务器导入：gunicorn 'APIService01:create_app()'"""
+    return APIService01().app
+
+
+# 使用示例（开发服务器，调试模式默认关闭，设置 FLASK_DEBUG=1 开启）
 if __name__ == '__main__':
     api = APIService01()
-    api.run(debug=True)
+    api.run(debug=os.environ.get('FLASK_DEBUG') == '1')
@@ -1,16 +1,21 @@
+import atexit
 import os
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../Utils')))
-from flask import Flask
+from flask import Flask, g, request
 from flask_cors import CORS
 from movie_api import MovieAPI
+from backend.database_visualization.rank_index import RankPrefixIndex
+from backend.database_visualization.http_cache import HttpCache
+from backend.database_visualization.metrics import RequestMetrics
 from backend.register_login.user_api import UserAPI
-
-app = Flask(__name__)
-CORS(app)  # 启用跨域支持
+from backend.register_login.password_hasher import PasswordHasher
+from Utils.MySqlHelper import MySqlHelper, MySqlPool, ReplicaRouter
+from Utils.SchemaMigrator import SchemaMigrator
+from Utils.TTLCache import TTLCache
 
 # TODO: 替换为你的数据库连接信息
-db_config = {
+DB_CONFIG = {
     'host': 'localhost',
     'user': 'root',
     'password': '123456',  # 替换为你的数据库密码
@@ -19,93 +24,269 @@ db_config = {
     'charset': 'utf8mb4'
 }
 
-# 创建API实例
-movie_api = MovieAPI(db_config)
-user_api = UserAPI(db_config)
-
-# 获取认证装饰器
-require_auth = user_api.get_auth_decorator()
-
-@app.errorhandler(Exception)
-def handle_exception(e):
-    """全局异常处理"""
-    return movie_api.fail(str(e)), 500
-
-# ==================== 电影数据可视化接口 ====================
-@app.route('/api/type-distribution')
-def type_distribution():
-    """类型分布接口"""
-    try:
-        return movie_api.type_distribution()
-    except Exception as e:
-        return movie_api.fail(str(e)), 500
 
-@app.route('/api/region-distribution')
-def region_distribution():
-    """地区分布接口"""
-    try:
-        return movie_api.region_distribution()
-    except Exception as e:
-        return movie_api.fail(str(e)), 500
+def shutdown_app(app):
+    """关闭应用持有的连接池和密码计算进程池（优雅退出时调用，可重复调用）"""
+    resources = app.extensions.get('dashboard', {})
+    if resources.get('router') is not None:
+        resources['router'].close()
+    elif resources.get('db_pool') is not None:
+        resources['db_pool'].close()
+    if resources.get('hasher') is not None:
+        resources['hasher'].shutdown()
 
-@app.route('/api/release-date-distribution')
-def release_date_distribution():
-    """上映时间分布接口"""
-    try:
-        return movie_api.release_date_distribution()
-    except Exception as e:
-        return movie_api.fail(str(e)), 500
 
-@app.route('/api/score-distribution')
-def score_distribution():
-    """评分分布接口"""
-    try:
-        return movie_api.score_distribution()
-    except Exception as e:
-        return movie_api.fail(str(e)), 500
+def reinit_after_fork(app):
+    """应用在 fork 前创建（gunicorn --preload）时，在 worker 进程中重置继承来的连接池和进程池"""
+    resources = app.extensions.get('dashboard', {})
+    if resources.get('router') is not None:
+        resources['router'].reset_after_fork()
+    elif resources.get('db_pool') is not None:
+        resources['db_pool'].reset_after_fork()
+    if resources.get('hasher') is not None:
+        resources['hasher'].reset_after_fork()
+
+
+def replica_configs_from_env(db_config):
+    """从环境变量 API_DB_REPLICAS（逗号分隔的 host:port）生成从库配置，账号与库名同主库"""
+    configs = []
+    for item in filter(None, (part.strip() for part in os.environ.get('API_DB_REPLICAS', '').split(','))):
+        host, _, port = item.partition(':')
+        configs.append(dict(db_config, host=host, port=int(port or db_config.get('port', 3306))))
+    return configs
+
+
+def create_app(db_config=None, pool_size=None, replica_configs=None):
+    """应用工厂，供 gunicorn 等多进程 WSGI 服务器导入：gunicorn -c gunicorn.conf.py "api:create_app()"
+
+    Args:
+        db_config: 数据库配置字典，为空时使用 DB_CONFIG
+        pool_size: 每个进程的数据库连接池大小，默认读取环境变量 API_DB_POOL_SIZE，未设置时为10
+        replica_configs: 只读从库配置列表，为空时读取环境变量 API_DB_REPLICAS；有从库时读写分离，
+            从库选择策略由 API_DB_REPLICA_STRATEGY（round_robin / least_latency）指定，
+            每隔 API_DB_HEALTH_INTERVAL 秒（默认5，0 为关闭）在后台 ping 一次各从库
+
+    启动时把表结构迁移到最新版本（多个 worker 同时启动时由迁移锁保证只执行一次）；
+    API_AUTO_MIGRATE=0 时只检查，有未执行的迁移则抛出 RuntimeError 拒绝启动。
+
+    每个 worker 每隔 API_DATA_VERSION_TTL 秒（默认10）检查一次最新快照编号，数据入库后各 worker
+    自行刷新排名索引和缓存，不依赖 /api/cache-invalidate 通知到每个进程
+    """
+    db_config = db_config or DB_CONFIG
+    pool_size = pool_size or int(os.environ.get('API_DB_POOL_SIZE', 10))
+    replica_configs = replica_configs if replica_configs is not None else replica_configs_from_env(db_config)
+
+    app = Flask(__name__)
+    CORS(app)  # 启用跨域支持
+
+    # 请求分阶段耗时与 SQL 指标，/metrics 导出；需先于 HttpCache 注册，使总耗时包含压缩
+    slow_query = os.environ.get('API_SLOW_QUERY_SECONDS')
+    RequestMetrics(slow_query_seconds=float(slow_query) if slow_query else None).init_app(app)
+
+    # 进程内共享的数据库连接池，电影接口和用户接口共用；每个 worker 进程各自创建
+    db_pool = MySqlPool(**db_config, max_size=pool_size)
+
+    # 图表查询依赖迁移后的类型化列，表结构落后时启动即失败，而不是请求时返回500
+    with MySqlHelper(**db_config, pool=db_pool) as helper:
+        SchemaMigrator(helper).ensure_current(auto_migrate=os.environ.get('API_AUTO_MIGRATE', '1') == '1')
+
+    router = None
+    if replica_configs:
+        router = ReplicaRouter(
+            db_pool,
+            [MySqlPool(**config, max_size=pool_size) for config in replica_configs],
+            strategy=os.environ.get('API_DB_REPLICA_STRATEGY', 'round_robin'),
+        )
+        # 每个 worker 定期 ping 从库（preload 时 fork 后由 reset_after_fork 在 worker 中重新启动）
+        health_interval = float(os.environ.get('API_DB_HEALTH_INTERVAL', 5))
+        if health_interval > 0:
+            router.start_health_checks(health_interval)
+
+    # 创建API实例
+    movie_api = MovieAPI(
+        db_config,
+        pool=db_pool,
+        cache=TTLCache(max_size=256, ttl=300),
+        rank_index=RankPrefixIndex(),
+        version_ttl=float(os.environ.get('API_DATA_VERSION_TTL', 10)),
+        router=router,
+    )
+    hasher = PasswordHasher(max_workers=2, max_pending=16, rounds=12)
+    user_api = UserAPI(
+        db_config,
+        pool=db_pool,
+        hasher=hasher,
+        token_cache=TTLCache(max_size=4096, ttl=3600),
+        user_cache=TTLCache(max_size=1024, ttl=30),
+        router=router,
+    )
+
+    # 图表接口的 ETag/304、Cache-Control 与 JSON 响应压缩
+    HttpCache(
+        movie_api.data_version,
+        endpoints=[
+            'type_distribution',
+            'region_distribution',
+            'release_date_distribution',
+            'score_distribution',
+            'actor_popularity',
+            'dashboard',
+        ],
+        max_age=60,
+        min_size=1024,
+    ).init_app(app)
 
-@app.route('/api/actor-popularity')
-def actor_popularity():
-    """演员热度接口"""
-    try:
-        return movie_api.actor_popularity()
-    except Exception as e:
+    # 获取认证装饰器
+    require_auth = user_api.get_auth_decorator()
+
+    # 供 worker 生命周期钩子和退出清理使用
+    app.extensions['dashboard'] = {
+        'db_pool': db_pool, 'router': router, 'hasher': hasher, 'movie_api': movie_api, 'user_api': user_api,
+    }
+    atexit.register(shutdown_app, app)
+
+    if router is not None:
+        @app.before_request
+        def read_your_writes():
+            """请求头 X-Read-Your-Writes: 1 时，本次请求的读操作走主库"""
+            if request.headers.get('X-Read-Your-Writes') == '1':
+                g.primary_reads = router.read_from_primary()
+                g.primary_reads.__enter__()
+
+        @app.teardown_request
+        def end_read_your_writes(exc):
+            primary_reads = g.pop('primary_reads', None)
+            if primary_reads is not None:
+                primary_reads.__exit__(None, None, None)
+
+    @app.errorhandler(Exception)
+    def handle_exception(e):
+        """全局异常处理"""
         return movie_api.fail(str(e)), 500
 
-# ==================== 用户认证接口 ====================
-@app.route('/api/register', methods=['POST'])
-def register():
-    """用户注册接口"""
-    try:
-        return user_api.register()
-    except Exception as e:
-        return user_api.fail(str(e)), 500
-
-@app.route('/api/login', methods=['POST'])
-def login():
-    """用户登录接口"""
-    try:
-        return user_api.login()
-    except Exception as e:
-        return user_api.fail(str(e)), 500
-
-@app.route('/api/user-info', methods=['GET'])
-@require_auth
-def get_user_info():
-    """获取用户信息接口"""
-    try:
-        return user_api.get_user_info()
-    except Exception as e:
-        return user_api.fail(str(e)), 500
-
-@app.route('/api/logout', methods=['POST'])
-@require_auth
-def logout():
-    """用户登出接口"""
-    try:
-        return user_api.logout()
-    except Exception as e:
-        return user_api.fail(str(e)), 500
+    # ==================== 电影数据可视化接口 ====================
+    @app.route('/api/type-distribution')
+    def type_distribution():
+        """类型分布接口"""
+        try:
+            return movie_api.type_distribution()
+        except Exception as e:
+            return movie_api.fail(str(e)), 500
+
+    @app.route('/api/region-distribution')
+    def region_distribution():
+        """地区分布接口"""
+        try:
+            return movie_api.region_distribution()
+        except Exception as e:
+            return movie_api.fail(str(e)), 500
+
+    @app.route('/api/release-date-distribution')
+    def release_date_distribution():
+        """上映时间分布接口"""
+        try:
+            return movie_api.release_date_distribution()
+        except Exception as e:
+            return movie_api.fail(str(e)), 500
+
+    @app.route('/api/score-distribution')
+    def score_distribution():
+        """评分分布接口"""
+        try:
+            return movie_api.score_distribution()
+        except Exception as e:
+            return movie_api.fail(str(e)), 500
+
+    @app.route('/api/actor-popularity')
+    def actor_popularity():
+        """演员热度接口"""
+        try:
+            return movie_api.actor_popularity()
+        except Exception as e:
+            return movie_api.fail(str(e)), 500
+
+    @app.route('/api/dashboard')
+    def dashboard():
+        """看板接口：一次返回多个图表数据，charts 参数选择图表"""
+        try:
+            return movie_api.dashboard()
+        except Exception as e:
+            return movie_api.fail(str(e)), 500
+
+    @app.route('/api/latest-snapshot')
+    def latest_snapshot():
+        """最新爬取快照接口"""
+        try:
+            return movie_api.latest_snapshot()
+        except Exception as e:
+            return movie_api.fail(str(e)), 500
+
+    @app.route('/api/cache-stats')
+    @require_auth
+    def cache_stats():
+        """统计结果缓存命中情况接口（需登录）"""
+        try:
+            return movie_api.cache_stats()
+        except Exception as e:
+            return movie_api.fail(str(e)), 500
+
+    @app.route('/api/db-stats')
+    @require_auth
+    def db_stats():
+        """数据库连接池及从库健康情况接口（需登录）"""
+        try:
+            return movie_api.success(router.stats() if router is not None else {'primary': db_pool.stats()})
+        except Exception as e:
+            return movie_api.fail(str(e)), 500
+
+    @app.route('/api/cache-invalidate', methods=['POST'])
+    @require_auth
+    def cache_invalidate():
+        """数据入库后通知接口：收到请求的 worker 立即检查数据版本，其他 worker 在 API_DATA_VERSION_TTL 秒内自行跟进"""
+        try:
+            movie_api.data_changed()
+            return movie_api.success({'version': movie_api.data_version()}, "已检查数据版本")
+        except Exception as e:
+            return movie_api.fail(str(e)), 500
+
+    # ==================== 用户认证接口 ====================
+    @app.route('/api/register', methods=['POST'])
+    def register():
+        """用户注册接口"""
+        try:
+            return user_api.register()
+        except Exception as e:
+            return user_api.fail(str(e)), 500
+
+    @app.route('/api/login', methods=['POST'])
+    def login():
+        """用户登录接口"""
+        try:
+            return user_api.login()
+        except Exception as e:
+            return user_api.fail(str(e)), 500
+
+    @app.route('/api/user-info', methods=['GET'])
+    @require_auth
+    def get_user_info():
+        """获取用户信息接口"""
+        try:
+            return user_api.get_user_info()
+        except Exception as e:
+            return user_api.fail(str(e)), 500
+
+    @app.route('/api/logout', methods=['POST'])
+    @require_auth
+    def logout():
+        """用户登出接口"""
+        try:
+            return user_api.logout()
+        except Exception as e:
+            return user_api.fail(str(e)), 500
+
+    return app
+
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    # 仅用于本地开发；调试模式默认关闭，设置 FLASK_DEBUG=1 开启
+    create_app().run(debug=os.environ.get('FLASK_DEBUG') == '1', threaded=True)
@@ -0,0 +1,126 @@
+"""电影图表接口的 ASGI 入口（asyncio + aiomysql）
+
+与 api.py 中的 Flask 图表接口路径和返回格式相同，等待数据库时不占用线程:
+    uvicorn --factory asgi:create_asgi_app --app-dir backend/database_visualization
+
+用户认证接口仍由 api.py（Flask）提供。启动时与 api.py 一样检查表结构版本（API_AUTO_MIGRATE）。
+统计缓存按数据版本失效：每隔 API_DATA_VERSION_TTL 秒（默认10）检查一次最新快照编号，
+爬虫入库后也可 POST /api/cache-invalidate 立即检查（只重新读取版本，版本未前进时不清空缓存，因此不要求登录）。
+"""
+import asyncio
+import json
+import os
+import sys
+import urllib.parse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from backend.database_visualization.async_movie_api import AsyncMovieAPI
+from Utils.AsyncMySqlHelper import AsyncMySqlPool
+from Utils.MySqlHelper import MySqlHelper
+from Utils.SchemaMigrator import SchemaMigrator
+from Utils.TTLCache import TTLCache
+
+# TODO: 替换为你的数据库连接信息
+DB_CONFIG = {
+    'host': 'localhost',
+    'user': 'root',
+    'password': '123456',  # 替换为你的数据库密码
+    'database': 'intershipproject',  # 替换为你的数据库名
+    'port': 3306,
+    'charset': 'utf8mb4'
+}
+
+
+def create_asgi_app(db_config=None, pool_size=None):
+    """ASGI 应用工厂
+
+    Args:
+        db_config: 数据库配置字典，为空时使用 DB_CONFIG
+        pool_size: 异步连接池大小，默认读取环境变量 API_DB_POOL_SIZE，未设置时为20
+    """
+    db_config = db_config or DB_CONFIG
+    pool_size = pool_size or int(os.environ.get('API_DB_POOL_SIZE', 20))
+    pool = AsyncMySqlPool(**db_config, max_size=pool_size)
+    movie_api = AsyncMovieAPI(
+        pool,
+        cache=TTLCache(max_size=256, ttl=300),
+        version_ttl=float(os.environ.get('API_DATA_VERSION_TTL', 10)),
+    )
+
+    def ensure_schema():
+        """迁移表结构或检查是否最新（同步驱动，在线程中执行）"""
+        with MySqlHelper(**db_config) as helper:
+            SchemaMigrator(helper).ensure_current(auto_migrate=os.environ.get('API_AUTO_MIGRATE', '1') == '1')
+
+    routes = {
+        '/api/type-distribution': movie_api.type_distribution,
+        '/api/region-distribution': movie_api.region_distribution,
+        '/api/release-date-distribution': movie_api.release_date_distribution,
+        '/api/score-distribution': movie_api.score_distribution,
+        '/api/actor-popularity': movie_api.actor_popularity,
+        '/api/dashboard': movie_api.dashboard,
+    }
+
+    async def send_json(send, status, payload):
+        body = json.dumps(payload, ensure_ascii=False, sort_keys=True).encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode('ascii')),
+                (b'access-control-allow-origin', b'*'),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def lifespan(receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await asyncio.to_thread(ensure_schema)
+                    await pool.open()
+                except Exception as e:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await pool.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def app(scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        if scope['path'] == '/api/cache-invalidate':
+            if scope['method'] != 'POST':
+                await send_json(send, 405, movie_api.fail("不支持的请求方法"))
+                return
+            try:
+                version = await movie_api.data_changed()
+                await send_json(send, 200, movie_api.success({'version': version}, "已检查数据版本"))
+            except Exception as e:
+                await send_json(send, 500, movie_api.fail(str(e)))
+            return
+
+        handler = routes.get(scope['path'])
+        if handler is None:
+            await send_json(send, 404, movie_api.fail("接口不存在"))
+            return
+        if scope['method'] not in ('GET', 'HEAD'):
+            await send_json(send, 405, movie_api.fail("不支持的请求方法"))
+            return
+        args = dict(urllib.parse.parse_qsl(scope.get('query_string', b'').decode('latin-1')))
+        try:
+            await send_json(send, 200, await handler(args))
+        except Exception as e:
+            await send_json(send, 500, movie_api.fail(str(e)))
+
+    app.movie_api = movie_api
+    app.pool = pool
+    return app
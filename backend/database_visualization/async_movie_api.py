@@ -0,0 +1,239 @@
+import asyncio
+import logging
+import time
+
+from Utils.AsyncMySqlHelper import AsyncMySqlHelper
+from Utils.SnapshotStore import SnapshotStore
+from backend.database_visualization.movie_api import MovieAPI
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncMovieAPI:
+    """电影数据可视化API的 asyncio 版本
+
+    统计逻辑与 MovieAPI 相同（共用 MovieAPI.dashboard_sql / summarize_rows），
+    等待 MySQL 时让出事件循环，一个进程可同时处理大量看板请求。
+    同一 (接口, rank_min, rank_max) 的并发请求只查询一次数据库，其余请求等待同一结果。
+    统计只计入当前榜单的行（见 MovieAPI.row_scope）；缓存键带数据版本，数据版本的检查规则同 MovieAPI.data_version。
+    各方法返回 {'success', 'msg', 'data'} 字典，由 asgi.py 序列化为 JSON。
+    """
+
+    DASHBOARD_CHARTS = MovieAPI.DASHBOARD_CHARTS
+
+    def __init__(self, pool, normalized=False, cache=None, version_ttl=10):
+        """
+        Args:
+            pool: 异步数据库连接池（AsyncMySqlPool）
+            normalized: 为True时类型/地区/演员统计直接在数据库中对拆分子表 GROUP BY
+            cache: 统计结果缓存（TTLCache），按 (数据版本, 接口名, rank_min, rank_max) 缓存，为空时不缓存
+            version_ttl: 每隔多少秒检查一次数据库中的最新快照编号，版本前进时清空缓存
+        """
+        self.pool = pool
+        self.normalized = normalized
+        self.cache = cache
+        self.version_ttl = version_ttl
+        self._version = None  # 缓存当前对应的数据版本
+        self._scope = None  # 该版本的当前榜单范围（SnapshotStore.row_scope）
+        self._version_expires = 0.0
+        self._version_lock = asyncio.Lock()
+        self._inflight = {}  # 缓存键 -> 正在计算的 Future
+
+    def get_db(self):
+        """获取异步数据库操作对象，需配合 async with 使用"""
+        return AsyncMySqlHelper(pool=self.pool)
+
+    @staticmethod
+    def get_rank_range(args):
+        """从查询参数字典获取rank范围"""
+        try:
+            return int(args.get('rank_min', 1)), int(args.get('rank_max', 100))
+        except Exception:
+            return 1, 100
+
+    def success(self, data, msg="ok"):
+        """成功响应"""
+        return {"success": True, "msg": msg, "data": data}
+
+    def fail(self, msg="error", data=None):
+        """失败响应"""
+        return {"success": False, "msg": msg, "data": data}
+
+    async def cached(self, endpoint, rank_min, rank_max, compute):
+        """按 (数据版本, 接口名, rank_min, rank_max) 读取缓存，未命中时 await compute(rank_min, rank_max)
+
+        同一个键已在计算时，直接等待那次计算的结果；那次计算的请求被取消（如客户端断开）时，
+        等待者中的一个重新计算，其余继续等待
+        """
+        key = (endpoint, rank_min, rank_max)
+        if self.cache is not None:
+            key = (await self.data_version(),) + key
+            missing = object()
+            value = self.cache.get(key, missing)
+            if value is not missing:
+                return value
+
+        while key in self._inflight:
+            future = self._inflight[key]
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise  # 本请求自身被取消
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await compute(rank_min, rank_max)
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # 标记异常已读取，没有其他等待者时不报警告
+            raise
+        else:
+            future.set_result(value)
+            if self.cache is not None:
+                self.cache.set(key, value)
+            return value
+        finally:
+            if not future.done():
+                # 被取消（CancelledError 不是 Exception 的子类）：取消 Future，等待者不会一直挂起
+                future.cancel()
+            self._inflight.pop(key, None)
+
+    def invalidate_cache(self):
+        """清空统计结果缓存"""
+        if self.cache is not None:
+            self.cache.invalidate()
+
+    async def data_changed(self):
+        """数据重新入库后调用：立即检查数据版本，不必等到 version_ttl 到期，返回检查后的版本"""
+        async with self._version_lock:
+            await self._sync_version()
+        return self._version
+
+    async def data_version(self):
+        """缓存当前对应的数据版本（豆瓣最新已完成快照的编号）
+
+        每 version_ttl 秒检查一次数据库，版本前进时先清空缓存再发布新版本；
+        检查期间其他请求继续使用旧版本，不排队等待（首次检查除外）。无法读取版本时返回 None。
+        """
+        if self._version is None or time.monotonic() >= self._version_expires:
+            if self._version is None or not self._version_lock.locked():
+                async with self._version_lock:
+                    if self._version is None or time.monotonic() >= self._version_expires:
+                        await self._sync_version()
+        return self._version
+
+    async def _sync_version(self):
+        """读取数据库中的最新版本，前进时清空缓存（需持有 _version_lock）"""
+        self._version_expires = time.monotonic() + self.version_ttl
+        try:
+            async with self.get_db() as db:
+                latest = await db.query_one(SnapshotStore.LATEST_FINISHED_SQL, ('douban',))
+                if latest is None and self._version is not None:
+                    return  # 读取失败（或快照仍未完成）时沿用已加载的版本
+                version = latest['id'] if latest else 0
+                if version == self._version:
+                    return
+                scope = None
+                if latest:
+                    tagged_sql = SnapshotStore.TAGGED_ROWS_SQL.format(table='douban_hot100_list')
+                    tagged = await db.query_one(tagged_sql, (latest['id'],))
+                    if tagged is None:
+                        raise RuntimeError("读取快照行数失败")
+                    scope = (latest['id'], tagged['n'] == latest['row_count'])
+        except Exception as e:
+            # 数据库暂时不可用时沿用已加载的版本，下个周期再检查
+            logger.warning("检查数据版本失败: %s", e)
+            return
+        self.invalidate_cache()
+        self._scope = scope
+        self._version = version
+
+    async def row_scope(self, column='snapshot_id'):
+        """只保留当前榜单行的 WHERE 条件（随数据版本更新，规则同 SnapshotStore.row_scope）"""
+        await self.data_version()
+        return SnapshotStore.scope_condition(self._scope, column)
+
+    async def count_dimension(self, table, column, rank_min, rank_max, limit=None):
+        """在数据库端按子表的值分组计数，返回 [{'value': 值, 'count': 数量}, ...]"""
+        sql = (
+            f"SELECT d.`{column}` AS value, COUNT(*) AS count FROM {table} d "
+            "JOIN douban_hot100_list m ON m.id = d.movie_id "
+            f"WHERE m.`rank` BETWEEN %s AND %s AND {await self.row_scope('m.snapshot_id')} "
+            f"GROUP BY d.`{column}`"
+        )
+        if limit:
+            sql += f" ORDER BY count DESC LIMIT {int(limit)}"
+        async with self.get_db() as db:
+            return await db.query(sql, (rank_min, rank_max))
+
+    async def compute_charts(self, rank_min, rank_max, charts):
+        """只查询一次 rank 范围内所需的列，计算 charts 中的各个图表"""
+        sql = MovieAPI.dashboard_sql(charts, await self.row_scope())
+        async with self.get_db() as db:
+            rows = await db.query(sql, (rank_min, rank_max))
+        if rows is None:
+            raise RuntimeError("查询执行失败")
+        return MovieAPI.summarize_rows(rows, charts)
+
+    async def compute_chart(self, chart, rank_min, rank_max):
+        """计算单个图表，normalized 模式下类型/地区/演员在数据库中分组计数"""
+        dimensions = {
+            'type_distribution': ('douban_movie_type', 'type', None),
+            'region_distribution': ('douban_movie_region', 'region', None),
+            'actor_popularity': ('douban_movie_actor', 'actor', 50),
+        }
+        if self.normalized and chart in dimensions:
+            table, column, limit = dimensions[chart]
+            rows = await self.count_dimension(table, column, rank_min, rank_max, limit=limit)
+            if rows is None:
+                raise RuntimeError("查询执行失败")
+            return [{column: row['value'], 'count': row['count']} for row in rows]
+        return (await self.compute_charts(rank_min, rank_max, [chart]))[chart]
+
+    async def chart(self, chart, args):
+        """单个图表接口（类型/地区/上映时间/评分/演员）"""
+        try:
+            rank_min, rank_max = self.get_rank_range(args)
+            return self.success(await self.cached(
+                chart, rank_min, rank_max, lambda lo, hi: self.compute_chart(chart, lo, hi)
+            ))
+        except Exception as e:
+            return self.fail(str(e))
+
+    async def type_distribution(self, args):
+        """类型分布接口"""
+        return await self.chart('type_distribution', args)
+
+    async def region_distribution(self, args):
+        """地区分布接口"""
+        return await self.chart('region_distribution', args)
+
+    async def release_date_distribution(self, args):
+        """上映时间分布接口"""
+        return await self.chart('release_date_distribution', args)
+
+    async def score_distribution(self, args):
+        """评分分布接口（全部电影的 title/release_date/score 列表）"""
+        return await self.chart('score_distribution', args)
+
+    async def actor_popularity(self, args):
+        """演员热度接口"""
+        return await self.chart('actor_popularity', args)
+
+    async def dashboard(self, args):
+        """看板接口：charts 参数为逗号分隔的图表名，缺省时返回全部图表"""
+        try:
+            rank_min, rank_max = self.get_rank_range(args)
+            charts = [c.strip() for c in args.get('charts', '').split(',') if c.strip()] or list(self.DASHBOARD_CHARTS)
+            unknown = [c for c in charts if c not in self.DASHBOARD_CHARTS]
+            if unknown:
+                return self.fail(f"未知的图表: {', '.join(unknown)}")
+            charts = [c for c in self.DASHBOARD_CHARTS if c in charts]
+            return self.success(await self.cached(
+                'dashboard:' + ','.join(charts), rank_min, rank_max,
+                lambda lo, hi: self.compute_charts(lo, hi, charts)
+            ))
+        except Exception as e:
+            return self.fail(str(e))
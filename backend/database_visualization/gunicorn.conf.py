@@ -0,0 +1,49 @@
+"""gunicorn 生产环境配置
+
+在仓库根目录执行:
+    gunicorn -c backend/database_visualization/gunicorn.conf.py "api:create_app()"
+
+可用环境变量调整：
+    API_BIND            监听地址，默认 0.0.0.0:5000
+    API_WORKERS         worker 进程数，默认 CPU 核数 * 2 + 1
+    API_THREADS         每个 worker 的线程数，默认 4
+    API_DB_POOL_SIZE    每个 worker 的数据库连接池大小，默认与线程数相同
+注意 API_WORKERS * API_DB_POOL_SIZE 不要超过 MySQL 的 max_connections
+"""
+import multiprocessing
+import os
+
+here = os.path.dirname(os.path.abspath(__file__))
+root = os.path.abspath(os.path.join(here, '../..'))
+
+bind = os.environ.get('API_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('API_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('API_THREADS', 4))
+worker_class = 'gthread'
+pythonpath = f'{root},{here}'
+os.environ.setdefault('API_DB_POOL_SIZE', str(threads))
+
+# 默认每个 worker 在 fork 之后各自创建应用和连接池；开启 preload 时由 post_fork 重置继承的资源
+preload_app = os.environ.get('API_PRELOAD', '0') == '1'
+
+timeout = 30
+graceful_timeout = 30  # 收到 SIGTERM 后等待处理中请求完成的秒数
+keepalive = 5
+max_requests = 10000  # worker 处理一定请求数后重启，防止内存缓慢增长
+max_requests_jitter = 1000
+
+
+def post_fork(server, worker):
+    """worker fork 后重置从 master 继承的连接池（仅 preload 时存在）"""
+    app = getattr(server.app, 'callable', None)
+    if app is not None:
+        from api import reinit_after_fork
+        reinit_after_fork(app)
+
+
+def worker_exit(server, worker):
+    """worker 退出时关闭连接池和密码计算进程池"""
+    app = getattr(worker, 'wsgi', None)
+    if app is not None and hasattr(app, 'extensions'):
+        from api import shutdown_app
+        shutdown_app(app)
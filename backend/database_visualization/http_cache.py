@@ -0,0 +1,114 @@
+import gzip
+import hashlib
+import re
+
+from flask import request, g, make_response
+
+try:
+    import brotli  # 可选依赖，安装后支持 br 压缩
+except ImportError:
+    brotli = None
+
+
+class HttpCache:
+    """图表接口的 HTTP 缓存与响应压缩
+
+    - 对指定的接口按 (数据快照版本, 路径, 查询参数) 生成强 ETag，
+      请求带 If-None-Match 且命中时直接返回 304，不调用接口、不访问 MySQL
+    - 为这些接口设置 Cache-Control
+    - 对超过 min_size 字节的 JSON 响应按客户端 Accept-Encoding 做 br/gzip 压缩
+    """
+
+    # 接口统一用 jsonify 返回，键按字母排序，success 位于末尾
+    SUCCESS_TAIL = re.compile(rb'"success":\s*true\s*}\s*$')
+
+    def __init__(self, version_getter, endpoints, max_age=60, min_size=1024, compress_level=6):
+        """
+        Args:
+            version_getter: 返回当前数据版本的无参函数，返回 None 时不生成 ETag
+            endpoints: 需要生成 ETag 的 Flask endpoint 名称
+            max_age: Cache-Control 的 max-age 秒数
+            min_size: 响应体超过该字节数才压缩
+            compress_level: gzip 压缩级别
+        """
+        self.version_getter = version_getter
+        self.endpoints = set(endpoints)
+        self.max_age = max_age
+        self.min_size = min_size
+        self.compress_level = compress_level
+
+    def init_app(self, app):
+        """注册到 Flask 应用"""
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def _etag(self):
+        """当前请求的 ETag（不含编码后缀），数据版本未知时返回 None"""
+        try:
+            version = self.version_getter()
+        except Exception:
+            version = None
+        if version is None:
+            return None
+        query = '&'.join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True)))
+        return hashlib.sha1(f"{version}|{request.path}|{query}".encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _matches(etag):
+        """If-None-Match 中是否包含该 ETag（忽略压缩编码后缀）"""
+        header = request.headers.get('If-None-Match', '')
+        if not header:
+            return False
+        if header.strip() == '*':
+            return True
+        for candidate in header.split(','):
+            candidate = candidate.strip().strip('"')
+            if candidate.split('-', 1)[0] == etag:
+                return True
+        return False
+
+    def _before_request(self):
+        if request.method != 'GET' or request.endpoint not in self.endpoints:
+            return None
+        etag = self._etag()
+        g.http_cache_etag = etag
+        if etag is not None and self._matches(etag):
+            response = make_response('', 304)
+            response.headers['ETag'] = f'"{etag}"'
+            response.headers['Cache-Control'] = f'public, max-age={self.max_age}'
+            response.headers['Vary'] = 'Accept-Encoding'
+            return response
+        return None
+
+    def _after_request(self, response):
+        etag = g.pop('http_cache_etag', None)
+        if response.status_code != 200 or response.direct_passthrough:
+            return response
+
+        # 只给成功的结果加 ETag，失败结果不缓存；需在压缩前检查
+        success = etag is not None and bool(self.SUCCESS_TAIL.search(response.get_data()[-64:]))
+        suffix = self._compress(response)
+        if success:
+            response.headers['ETag'] = f'"{etag}{suffix}"'
+            response.headers['Cache-Control'] = f'public, max-age={self.max_age}'
+        return response
+
+    def _compress(self, response):
+        """按 Accept-Encoding 压缩 JSON 响应，返回加在 ETag 后的编码后缀"""
+        if response.mimetype != 'application/json' or 'Content-Encoding' in response.headers:
+            return ''
+        response.vary.add('Accept-Encoding')
+        body = response.get_data()
+        if len(body) < self.min_size:
+            return ''
+        offered = ['br', 'gzip'] if brotli else ['gzip']
+        encoding = request.accept_encodings.best_match(offered)
+        if encoding == 'br':
+            body = brotli.compress(body)
+        elif encoding == 'gzip':
+            body = gzip.compress(body, compresslevel=self.compress_level)
+        else:
+            return ''
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        return f'-{encoding}'
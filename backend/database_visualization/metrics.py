@@ -0,0 +1,221 @@
+import bisect
+import logging
+import re
+import threading
+import time
+
+from flask import current_app, g, has_app_context, has_request_context, request, Response
+from flask.json.provider import DefaultJSONProvider
+
+from Utils.MySqlHelper import MySqlHelper
+
+slow_query_logger = logging.getLogger('slow_query')
+
+# 默认分桶（秒），覆盖 0.5ms ~ 10s
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000, 1000000)
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def sql_fingerprint(sql, max_length=200):
+    """SQL 指纹：去掉字面量和多行 VALUES/IN 列表，只保留语句结构，用作指标标签"""
+    if not sql:
+        return ''
+    text = sql[:2000].replace('%s', '?').replace('%(', '?(')
+    text = _STRING_LITERAL.sub('?', text)
+    text = _NUMBER_LITERAL.sub('?', text)
+    text = _VALUE_LIST.sub('(...)', text)
+    text = _IN_LIST.sub('IN (...)', text)
+    return _WHITESPACE.sub(' ', text).strip()[:max_length]
+
+
+class Histogram:
+    """Prometheus 直方图，按标签值分组，线程安全"""
+
+    def __init__(self, name, help_text, label_names, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}  # 标签值元组 -> [各桶计数..., 总数, 总和]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        """记录一次观测值，labels 顺序与 label_names 一致"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    @staticmethod
+    def _escape(value):
+        return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+    def _labels(self, labels, extra=None):
+        pairs = [f'{name}="{self._escape(value)}"' for name, value in zip(self.label_names, labels)]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    def render(self):
+        """输出 Prometheus 文本格式"""
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((labels, list(values)) for labels, values in self._series.items())
+        for labels, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                bucket_labels = self._labels(labels, 'le="%s"' % bound)
+                lines.append(f'{self.name}_bucket{bucket_labels} {cumulative}')
+            bucket_labels = self._labels(labels, 'le="+Inf"')
+            lines.append(f'{self.name}_bucket{bucket_labels} {values[-2]}')
+            lines.append(f'{self.name}_count{self._labels(labels)} {values[-2]}')
+            lines.append(f'{self.name}_sum{self._labels(labels)} {values[-1]}')
+        return '\n'.join(lines)
+
+
+class MetricCounter:
+    """Prometheus 计数器，按标签值分组，线程安全"""
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            pairs = ','.join(f'{n}="{Histogram._escape(v)}"' for n, v in zip(self.label_names, labels))
+            lines.append(f'{self.name}{{{pairs}}} {value}' if pairs else f'{self.name} {value}')
+        return '\n'.join(lines)
+
+
+class _TimedJSONProvider(DefaultJSONProvider):
+    """记录 JSON 序列化耗时到当前请求的 serialize 阶段"""
+
+    def dumps(self, obj, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            if has_request_context() and 'request_phases' in g:
+                g.request_phases['serialize'] += time.perf_counter() - started
+
+
+def _dispatch_query(event, sql, rows, seconds, error=None):
+    """进程内唯一注册的 MySqlHelper 查询监听器，转发给当前应用的 RequestMetrics
+
+    MySqlHelper.listeners 是类属性，每个 RequestMetrics 各自注册时，每次 create_app 都会多一个监听器，
+    查询被所有应用重复计数且旧应用无法释放；这里只注册一次，按 current_app 找到对应的指标，
+    应用上下文之外的查询（如爬虫脚本）不计入。
+    """
+    if has_app_context():
+        metrics = current_app.extensions.get('request_metrics')
+        if metrics is not None:
+            metrics.on_query(event, sql, rows, seconds, error)
+
+
+class RequestMetrics:
+    """请求耗时与数据库查询指标
+
+    - 每个请求的总耗时，以及 connect（取连接）、query（执行 SQL）、fetch（读取结果）、
+      serialize（JSON 序列化）和 python（其余 Python 处理）各阶段耗时
+    - 每条 SQL 按指纹统计耗时、返回行数和失败次数
+    - 慢查询（超过 slow_query_seconds）写入 slow_query 日志
+    - 通过 /metrics 以 Prometheus 文本格式导出
+    应在其他 before/after_request 钩子之前调用 init_app，使总耗时覆盖压缩等后处理。
+    """
+
+    PHASES = ('connect', 'query', 'fetch', 'serialize', 'python')
+
+    def __init__(self, slow_query_seconds=None, buckets=DEFAULT_BUCKETS):
+        """
+        Args:
+            slow_query_seconds: 慢查询阈值（秒），为空时不记录慢查询日志
+            buckets: 耗时直方图分桶（秒）
+        """
+        self.slow_query_seconds = slow_query_seconds
+        self.request_seconds = Histogram(
+            'http_request_duration_seconds', '请求总耗时', ('endpoint', 'method', 'status'), buckets)
+        self.phase_seconds = Histogram(
+            'http_request_phase_seconds', '请求各阶段耗时', ('endpoint', 'phase'), buckets)
+        self.query_seconds = Histogram(
+            'db_query_duration_seconds', 'SQL 执行耗时（按指纹）', ('fingerprint', 'event'), buckets)
+        self.query_rows = Histogram(
+            'db_query_rows', 'SQL 返回/影响行数（按指纹）', ('fingerprint',), ROW_BUCKETS)
+        self.query_errors = MetricCounter(
+            'db_query_errors_total', 'SQL 执行失败次数（按指纹）', ('fingerprint',))
+
+    def init_app(self, app, path='/metrics'):
+        """注册到 Flask 应用并添加指标导出接口"""
+        app.json = _TimedJSONProvider(app)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.add_url_rule(path, 'metrics', self.metrics_endpoint)
+        app.extensions['request_metrics'] = self
+        MySqlHelper.add_listener(_dispatch_query)
+
+    def on_query(self, event, sql, rows, seconds, error=None):
+        """记录一次数据库操作（由 _dispatch_query 在该应用的上下文中调用）"""
+        if has_request_context() and 'request_phases' in g:
+            g.request_phases['query' if event == 'execute' else event] += seconds
+        if event == 'connect':
+            return
+
+        fingerprint = sql_fingerprint(sql)
+        self.query_seconds.observe(seconds, fingerprint, event)
+        if event == 'fetch':
+            return
+        if error is not None:
+            self.query_errors.inc(fingerprint)
+        else:
+            self.query_rows.observe(rows, fingerprint)
+        if self.slow_query_seconds is not None and seconds >= self.slow_query_seconds:
+            endpoint = request.endpoint if has_request_context() else None
+            slow_query_logger.warning(
+                "慢查询 %.3fs rows=%d endpoint=%s sql=%s", seconds, rows, endpoint, fingerprint)
+
+    def _before_request(self):
+        g.request_started = time.perf_counter()
+        g.request_phases = dict.fromkeys(self.PHASES, 0.0)
+
+    def _after_request(self, response):
+        started = g.pop('request_started', None)
+        phases = g.pop('request_phases', None)
+        if started is None or request.endpoint == 'metrics':
+            return response
+        total = time.perf_counter() - started
+        endpoint = request.endpoint or 'unknown'
+        self.request_seconds.observe(total, endpoint, request.method, str(response.status_code))
+        phases['python'] = max(0.0, total - sum(phases.values()))
+        for phase in self.PHASES:
+            self.phase_seconds.observe(phases[phase], endpoint, phase)
+        return response
+
+    def render(self):
+        """全部指标的 Prometheus 文本"""
+        metrics = (self.request_seconds, self.phase_seconds, self.query_seconds, self.query_rows, self.query_errors)
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+    def metrics_endpoint(self):
+        """/metrics 接口"""
+        return Response(self.render(), mimetype='text/plain; version=0.0.4')
@@ -1,18 +1,74 @@
+import logging
+import math
+import threading
+import time
+
+import numpy as np
 from flask import request, jsonify
+from Utils.ActorTopK import ActorTopKStore
 from Utils.MySqlHelper import MySqlHelper
+from Utils.SnapshotStore import SnapshotStore
+from Utils.TextUtils import split_values
 from collections import Counter, defaultdict
 
+logger = logging.getLogger(__name__)
+
 class MovieAPI:
-    """电影数据可视化API类"""
+    """电影数据可视化API类
+
+    评分和上映年份使用 SchemaMigrator 迁移后的类型化列（score_value / release_year），
+    rank 区间过滤走 idx_rank 索引，评分为空、上映日期无法解析的行在 SQL 中过滤；
+    所有统计只计入当前榜单的行（见 row_scope），追加模式保留的历次快照不会重复计数
+    """
+
+    # 看板接口可选的图表及各自需要的列
+    DASHBOARD_CHARTS = {
+        'type_distribution': ('type',),
+        'region_distribution': ('regions',),
+        'release_date_distribution': ('release_year',),
+        'score_distribution': ('title', 'release_date', 'score_value'),
+        'actor_popularity': ('actors',),
+    }
     
-    def __init__(self, db_config):
+    def __init__(self, db_config, pool=None, normalized=False, cache=None, rank_index=None, version_ttl=10,
+                 router=None, columnar=False):
         """
         初始化电影API
         
         Args:
             db_config: 数据库配置字典
+            pool: 共享的数据库连接池（MySqlPool），为空时每次请求单独建立连接
+            normalized: 为True时类型/地区/演员统计直接在数据库中对拆分子表 GROUP BY，
+                需要爬虫已写入 douban_movie_type/region/actor 子表
+            cache: 统计结果缓存（TTLCache），按 (数据版本, 接口名, rank_min, rank_max) 缓存，为空时不缓存
+            rank_index: 排名前缀和索引（RankPrefixIndex），配置后所有统计由内存索引直接回答，不再访问数据库
+            version_ttl: 每隔多少秒检查一次数据库中的最新快照编号，版本前进时刷新排名索引并清空缓存
+            router: 主从路由（ReplicaRouter），配置后统计查询走从库，忽略 pool
+            columnar: 为True时扫描类统计（类型/地区/演员及看板）以列式读取（MySqlHelper.query_columns），
+                用 NumPy 向量化计算，不再逐行处理字典
         """
         self.db_config = db_config
+        self.pool = pool
+        self.router = router
+        self.columnar = columnar
+        self.normalized = normalized
+        self.cache = cache
+        self.rank_index = rank_index
+        self.version_ttl = version_ttl
+        self._version = None  # 排名索引和缓存当前对应的数据版本
+        self._scope = None  # 该版本的当前榜单范围（SnapshotStore.row_scope）
+        self._version_expires = 0.0
+        self._version_lock = threading.Lock()
+
+    def get_db(self, read_your_writes=False):
+        """获取数据库操作对象，配置了连接池时从池中借用连接
+
+        Args:
+            read_your_writes: 配置了主从路由时强制读主库
+        """
+        if self.router is not None:
+            return MySqlHelper(router=self.router, read_your_writes=read_your_writes)
+        return MySqlHelper(**self.db_config, pool=self.pool)
 
     def get_rank_range(self):
         """获取rank范围参数"""
@@ -23,6 +79,33 @@ class MovieAPI:
         except Exception:
             return 1, 100
 
+    def count_dimension(self, table, column, rank_min, rank_max, limit=None):
+        """在数据库端按子表的值分组计数
+
+        Args:
+            table: 子表名
+            column: 子表值列名
+            rank_min: 最小排名
+            rank_max: 最大排名
+            limit: 按计数降序只取前limit条，为空时不排序不限制
+
+        Returns:
+            [{'value': 值, 'count': 数量}, ...]
+        """
+        sql = (
+            f"SELECT d.`{column}` AS value, COUNT(*) AS count FROM {table} d "
+            "JOIN douban_hot100_list m ON m.id = d.movie_id "
+            f"WHERE m.`rank` BETWEEN %s AND %s AND {self.row_scope('m.snapshot_id')} "
+            f"GROUP BY d.`{column}`"
+        )
+        if limit:
+            sql += f" ORDER BY count DESC LIMIT {int(limit)}"
+        with self.get_db() as db:
+            return db.query(sql, (rank_min, rank_max))
+
+    # 拆分逗号分隔的多值字段（Utils/TextUtils.py），扫描统计与 normalized 模式、排名索引的取值规则相同
+    split_values = staticmethod(split_values)
+
     def success(self, data, msg="ok"):
         """成功响应"""
         return jsonify({"success": True, "msg": msg, "data": data})
@@ -31,87 +114,488 @@ class MovieAPI:
         """失败响应"""
         return jsonify({"success": False, "msg": msg, "data": data})
 
+    def cached(self, endpoint, rank_min, rank_max, compute):
+        """按 (数据版本, 接口名, rank_min, rank_max) 读取缓存，未命中时调用 compute(rank_min, rank_max) 计算
+
+        键中带版本，版本切换前开始计算的旧结果不会在新版本下被读到
+        """
+        if self.cache is None:
+            return compute(rank_min, rank_max)
+        key = (self.data_version(), endpoint, rank_min, rank_max)
+        return self.cache.get_or_set(key, lambda: compute(rank_min, rank_max))
+
+    def row_scope(self, column='snapshot_id'):
+        """只保留当前榜单行的 WHERE 条件（随数据版本更新，见 SnapshotStore.row_scope）"""
+        self.data_version()
+        return SnapshotStore.scope_condition(self._scope, column)
+
+    def invalidate_cache(self):
+        """清空统计结果缓存"""
+        if self.cache is not None:
+            self.cache.invalidate()
+
+    def get_rank_index(self):
+        """返回已加载的排名索引，首次使用时从数据库全量加载；未配置索引时返回None"""
+        if self.rank_index is not None and not self.rank_index.loaded:
+            self.refresh_rank_index()
+        return self.rank_index
+
+    def refresh_rank_index(self):
+        """增量加载新入库的电影到排名索引（读主库，避免从库延迟漏掉刚入库的行）"""
+        if self.rank_index is not None:
+            with self.get_db(read_your_writes=True) as db:
+                self.rank_index.refresh(db)
+
+    def data_changed(self):
+        """数据重新入库后调用：立即检查数据版本（见 data_version），不必等到 version_ttl 到期"""
+        with self._version_lock:
+            self._sync_version()
+
+    def data_version(self):
+        """排名索引和统计缓存当前对应的数据版本（豆瓣最新已完成快照的编号），用于生成 ETag
+
+        每 version_ttl 秒检查一次数据库（爬虫和常驻爬取进程在其他进程中入库，不会通知本进程）。
+        版本前进时先增量刷新排名索引、清空缓存，再发布新版本，因此 ETag 不会领先于实际返回的数据；
+        刷新期间其他请求继续使用旧版本，不排队等待。无法读取版本时返回 None（不生成 ETag）。
+        """
+        if self._version is None or time.monotonic() >= self._version_expires:
+            if self._version_lock.acquire(blocking=self._version is None):
+                try:
+                    if self._version is None or time.monotonic() >= self._version_expires:
+                        self._sync_version()
+                finally:
+                    self._version_lock.release()
+        return self._version
+
+    def _sync_version(self):
+        """读取数据库中的最新版本，前进时刷新索引和缓存（需持有 _version_lock）"""
+        self._version_expires = time.monotonic() + self.version_ttl
+        try:
+            with self.get_db() as db:
+                store = SnapshotStore(db)
+                latest = store.latest_finished('douban')
+                if latest is None and self._version is not None:
+                    return  # 读取失败（或快照仍未完成）时沿用已加载的版本
+                version = latest['id'] if latest else 0
+                if version == self._version:
+                    return
+                scope = store.row_scope(latest, 'douban_hot100_list')
+            self.refresh_rank_index()
+            self.invalidate_cache()
+        except Exception as e:
+            # 数据库暂时不可用时沿用已加载的版本，下个周期再检查
+            logger.warning("检查数据版本失败: %s", e)
+            return
+        if self.rank_index is not None:
+            # 索引实际加载到的快照，可能比刚读到的版本更新
+            version = max(version, self.rank_index.last_snapshot)
+            scope = self.rank_index.scope
+        self._scope = scope
+        self._version = version
+
+    def cache_stats(self):
+        """缓存命中统计接口"""
+        if self.cache is None:
+            return self.fail("未启用缓存")
+        return self.success(self.cache.stats())
+
+    def latest_snapshot(self):
+        """最新爬取快照接口"""
+        try:
+            with self.get_db() as db:
+                snapshot = SnapshotStore(db).latest('douban')
+            if snapshot and snapshot.get('created_at'):
+                snapshot['created_at'] = snapshot['created_at'].strftime('%Y-%m-%d %H:%M:%S')
+            return self.success(snapshot)
+        except Exception as e:
+            return self.fail(str(e))
+
     def type_distribution(self):
         """类型分布接口"""
         try:
             rank_min, rank_max = self.get_rank_range()
-            sql = "SELECT type FROM douban_hot100_list WHERE `rank` BETWEEN %s AND %s"
-            with MySqlHelper(**self.db_config) as db:
-                rows = db.query(sql, (rank_min, rank_max))
-            type_counter = Counter()
-            for row in rows:
-                types = [t.strip() for t in row['type'].split(',') if t.strip()]
-                type_counter.update(types)
-            result = [{'type': t, 'count': c} for t, c in type_counter.items()]
-            return self.success(result)
+            return self.success(self.cached('type_distribution', rank_min, rank_max, self.compute_type_distribution))
         except Exception as e:
             return self.fail(str(e))
 
+    def compute_type_distribution(self, rank_min, rank_max):
+        """统计类型分布"""
+        index = self.get_rank_index()
+        if index is not None:
+            return index.type_distribution(rank_min, rank_max)
+        if self.normalized:
+            rows = self.count_dimension('douban_movie_type', 'type', rank_min, rank_max)
+            return [{'type': row['value'], 'count': row['count']} for row in rows]
+        if self.columnar:
+            return self.compute_dashboard(rank_min, rank_max, ['type_distribution'])['type_distribution']
+        sql = f"SELECT type FROM douban_hot100_list WHERE `rank` BETWEEN %s AND %s AND {self.row_scope()}"
+        with self.get_db() as db:
+            rows = db.query(sql, (rank_min, rank_max))
+        type_counter = Counter()
+        for row in rows:
+            type_counter.update(self.split_values(row['type']))
+        return [{'type': t, 'count': c} for t, c in type_counter.items()]
+
     def region_distribution(self):
         """地区分布接口"""
         try:
             rank_min, rank_max = self.get_rank_range()
-            sql = "SELECT regions FROM douban_hot100_list WHERE `rank` BETWEEN %s AND %s"
-            with MySqlHelper(**self.db_config) as db:
-                rows = db.query(sql, (rank_min, rank_max))
-            region_counter = Counter()
-            for row in rows:
-                regions = [r.strip() for r in row['regions'].split(',') if r.strip()]
-                region_counter.update(regions)
-            result = [{'region': r, 'count': c} for r, c in region_counter.items()]
-            return self.success(result)
+            return self.success(self.cached('region_distribution', rank_min, rank_max, self.compute_region_distribution))
         except Exception as e:
             return self.fail(str(e))
 
+    def compute_region_distribution(self, rank_min, rank_max):
+        """统计地区分布"""
+        index = self.get_rank_index()
+        if index is not None:
+            return index.region_distribution(rank_min, rank_max)
+        if self.normalized:
+            rows = self.count_dimension('douban_movie_region', 'region', rank_min, rank_max)
+            return [{'region': row['value'], 'count': row['count']} for row in rows]
+        if self.columnar:
+            return self.compute_dashboard(rank_min, rank_max, ['region_distribution'])['region_distribution']
+        sql = f"SELECT regions FROM douban_hot100_list WHERE `rank` BETWEEN %s AND %s AND {self.row_scope()}"
+        with self.get_db() as db:
+            rows = db.query(sql, (rank_min, rank_max))
+        region_counter = Counter()
+        for row in rows:
+            region_counter.update(self.split_values(row['regions']))
+        return [{'region': r, 'count': c} for r, c in region_counter.items()]
+
     def release_date_distribution(self):
         """上映时间分布接口"""
         try:
             rank_min, rank_max = self.get_rank_range()
-            sql = "SELECT release_date FROM douban_hot100_list WHERE `rank` BETWEEN %s AND %s"
-            with MySqlHelper(**self.db_config) as db:
-                rows = db.query(sql, (rank_min, rank_max))
-            period_counter = defaultdict(int)
-            for row in rows:
-                date_str = row['release_date']
-                try:
-                    year = int(date_str[:4])
-                    period_start = year - (year % 5)
-                    period = f"{period_start}-{period_start+4}"
-                    period_counter[period] += 1
-                except Exception:
-                    continue
-            result = [{'period': p, 'count': c} for p, c in sorted(period_counter.items())]
-            return self.success(result)
+            return self.success(self.cached(
+                'release_date_distribution', rank_min, rank_max, self.compute_release_date_distribution
+            ))
         except Exception as e:
             return self.fail(str(e))
 
+    def compute_release_date_distribution(self, rank_min, rank_max):
+        """按5年区间统计上映时间分布（在数据库中分组计数）"""
+        index = self.get_rank_index()
+        if index is not None:
+            return index.release_date_distribution(rank_min, rank_max)
+        sql = ("SELECT release_year - MOD(release_year, 5) AS period_start, COUNT(*) AS count "
+               f"FROM douban_hot100_list WHERE `rank` BETWEEN %s AND %s AND {self.row_scope()} "
+               "AND release_year IS NOT NULL "
+               "GROUP BY period_start ORDER BY period_start")
+        with self.get_db() as db:
+            rows = db.query(sql, (rank_min, rank_max))
+        return [
+            {'period': f"{row['period_start']}-{row['period_start'] + 4}", 'count': row['count']}
+            for row in rows
+        ]
+
     def score_distribution(self):
-        """评分分布接口"""
+        """评分分布接口
+
+        不带下列参数时返回全部电影的 {'title','release_date','score'} 列表；带任一参数时返回
+        {'items': ..., 'next_cursor': ..., 'binned': ...}：
+            limit: 每页条数，按 (rank, id) 游标分页
+            cursor: 上一页返回的 next_cursor
+            format: rows（默认，逐行字典）或 columns（titles/release_dates/scores 平行数组）
+            max_points: 点数超过该值时按 (年份, 评分) 分箱降采样，此时忽略分页
+        """
         try:
             rank_min, rank_max = self.get_rank_range()
-            sql = "SELECT title, release_date, score FROM douban_hot100_list WHERE `rank` BETWEEN %s AND %s"
-            with MySqlHelper(**self.db_config) as db:
-                rows = db.query(sql, (rank_min, rank_max))
-            result = [
+            limit = request.args.get('limit', type=int)
+            cursor = request.args.get('cursor') or None
+            fmt = request.args.get('format', 'rows')
+            max_points = request.args.get('max_points', type=int)
+            if fmt not in ('rows', 'columns'):
+                return self.fail("format 只能是 rows 或 columns")
+            if limit is None and cursor is None and max_points is None and fmt == 'rows':
+                return self.success(self.cached('score_distribution', rank_min, rank_max, self.compute_score_distribution))
+
+            endpoint = f"score_distribution:{fmt}:{limit}:{cursor}:{max_points}"
+            return self.success(self.cached(
+                endpoint, rank_min, rank_max,
+                lambda lo, hi: self.compute_score_page(lo, hi, cursor, limit, fmt, max_points)
+            ))
+        except Exception as e:
+            return self.fail(str(e))
+
+    def fetch_score_rows(self, rank_min, rank_max, cursor=None, limit=None):
+        """按 (rank, id) 顺序读取评分行
+
+        Args:
+            rank_min: 最小排名
+            rank_max: 最大排名
+            cursor: (rank, id)，只返回其后的行
+            limit: 最多返回行数，为空时不限制
+
+        Returns:
+            含 id/rank/title/release_date/release_year/score 的字典列表（不含评分为空的行）
+        """
+        index = self.get_rank_index()
+        if index is not None:
+            rows = index.score_rows(rank_min, rank_max)
+            if cursor is not None:
+                rows = [row for row in rows if (row['rank'], row['id']) > cursor]
+            return rows[:limit] if limit is not None else rows
+
+        sql = ("SELECT id, `rank`, title, release_date, release_year, score_value AS score FROM douban_hot100_list "
+               f"WHERE `rank` BETWEEN %s AND %s AND {self.row_scope()} AND score_value IS NOT NULL")
+        params = [rank_min, rank_max]
+        if cursor is not None:
+            sql += " AND (`rank` > %s OR (`rank` = %s AND id > %s))"
+            params += [cursor[0], cursor[0], cursor[1]]
+        sql += " ORDER BY `rank`, id"
+        if limit is not None:
+            sql += " LIMIT %s"
+            params.append(limit)
+        with self.get_db() as db:
+            return db.query(sql, tuple(params))
+
+    def compute_score_page(self, rank_min, rank_max, cursor=None, limit=None, fmt='rows', max_points=None):
+        """评分分布的分页/列式/降采样结果"""
+        if max_points is not None:
+            rows = self.fetch_score_rows(rank_min, rank_max)
+            if len(rows) > max_points:
+                points = self.downsample_scores(rows, max(1, max_points))
+                if fmt == 'columns':
+                    points = {key + 's': [p[key] for p in points] for key in ('year', 'score', 'count', 'title')}
+                return {'items': points, 'next_cursor': None, 'binned': True}
+            next_cursor = None
+        else:
+            if cursor is not None:
+                rank, _, movie_id = cursor.partition(':')
+                cursor = (int(rank), int(movie_id))
+            limit = None if limit is None else max(1, limit)
+            rows = self.fetch_score_rows(rank_min, rank_max, cursor, None if limit is None else limit + 1)
+            next_cursor = None
+            if limit is not None and len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = f"{rows[-1]['rank']}:{rows[-1]['id']}"
+
+        if fmt == 'columns':
+            items = {
+                'titles': [row['title'] for row in rows],
+                'release_dates': [row['release_date'] for row in rows],
+                'scores': [float(row['score']) for row in rows],
+            }
+        else:
+            items = [
                 {'title': row['title'], 'release_date': row['release_date'], 'score': float(row['score'])}
                 for row in rows
             ]
-            return self.success(result)
+        return {'items': items, 'next_cursor': next_cursor, 'binned': False}
+
+    @staticmethod
+    def downsample_scores(rows, max_points):
+        """按 (年份, 评分) 分箱，箱数超过 max_points 时年份与评分的箱宽同时加倍
+
+        Returns:
+            [{'year': 箱起始年份, 'score': 箱内平均分, 'count': 电影数, 'title': 箱内第一部电影}, ...]
+        """
+        points = [(row['release_year'] or 0, float(row['score']), row['title']) for row in rows]
+
+        year_step, score_step = 1, 0.1
+        while True:
+            bins = {}
+            for year, score, title in points:
+                key = (year // year_step * year_step, math.floor(score / score_step + 1e-9))
+                entry = bins.get(key)
+                if entry is None:
+                    bins[key] = [title, 1, score]
+                else:
+                    entry[1] += 1
+                    entry[2] += score
+            if len(bins) <= max_points:
+                break
+            year_step *= 2
+            score_step *= 2
+
+        return [
+            {'year': year, 'score': round(total / count, 2), 'count': count, 'title': title}
+            for (year, _), (title, count, total) in sorted(bins.items())
+        ]
+
+    def compute_score_distribution(self, rank_min, rank_max):
+        """查询评分散点数据"""
+        index = self.get_rank_index()
+        if index is not None:
+            return index.score_distribution(rank_min, rank_max)
+        sql = ("SELECT title, release_date, score_value AS score FROM douban_hot100_list "
+               f"WHERE `rank` BETWEEN %s AND %s AND {self.row_scope()} AND score_value IS NOT NULL")
+        with self.get_db() as db:
+            rows = db.query(sql, (rank_min, rank_max))
+        return [
+            {'title': row['title'], 'release_date': row['release_date'], 'score': float(row['score'])}
+            for row in rows
+        ]
+
+    def actor_popularity(self):
+        """演员热度接口
+
+        默认精确统计 rank 范围内的出演次数，返回 [{'actor','count'}, ...]；
+        带 mode=approx 时改为合并最近 snapshots 个快照（缺省为全部快照）的 Space-Saving 摘要，
+        忽略 rank 范围，返回 {'items': [{'actor','count','error'}, ...], 'snapshots', 'total', 'max_error'}，
+        每个 count 为出演次数的上界，真实值不小于 count - error（误差界见 Utils/ActorTopK.py）
+        """
+        try:
+            rank_min, rank_max = self.get_rank_range()
+            mode = request.args.get('mode', 'exact')
+            if mode == 'approx':
+                snapshots = request.args.get('snapshots', type=int)
+                return self.success(self.cached(
+                    f'actor_popularity:approx:{snapshots}', 0, 0,
+                    lambda lo, hi: self.compute_actor_popularity_approx(snapshots)
+                ))
+            if mode != 'exact':
+                return self.fail("mode 只能是 exact 或 approx")
+            return self.success(self.cached('actor_popularity', rank_min, rank_max, self.compute_actor_popularity))
         except Exception as e:
             return self.fail(str(e))
 
-    def actor_popularity(self):
-        """演员热度接口"""
+    def compute_actor_popularity_approx(self, last_snapshots=None, limit=50):
+        """合并最近 last_snapshots 个快照的演员摘要，返回近似的前limit位演员（爬虫入库时写入摘要）"""
+        with self.get_db() as db:
+            return ActorTopKStore(db).top(limit, last_snapshots)
+
+    def compute_actor_popularity(self, rank_min, rank_max):
+        """统计出演次数最多的前50位演员"""
+        index = self.get_rank_index()
+        if index is not None:
+            return index.actor_popularity(rank_min, rank_max)
+        if self.normalized:
+            rows = self.count_dimension('douban_movie_actor', 'actor', rank_min, rank_max, limit=50)
+            return [{'actor': row['value'], 'count': row['count']} for row in rows]
+        if self.columnar:
+            return self.compute_dashboard(rank_min, rank_max, ['actor_popularity'])['actor_popularity']
+        sql = f"SELECT actors FROM douban_hot100_list WHERE `rank` BETWEEN %s AND %s AND {self.row_scope()}"
+        with self.get_db() as db:
+            rows = db.query(sql, (rank_min, rank_max))
+        actor_counter = Counter()
+        for row in rows:
+            actor_counter.update(self.split_values(row['actors']))
+        return [{'actor': a, 'count': c} for a, c in actor_counter.most_common(50)]  # 只返回前50
+
+    def dashboard(self):
+        """看板接口：一次查询返回多个图表的统计结果
+
+        charts 参数为逗号分隔的图表名（见 DASHBOARD_CHARTS），缺省时返回全部图表
+        """
         try:
             rank_min, rank_max = self.get_rank_range()
-            sql = "SELECT actors FROM douban_hot100_list WHERE `rank` BETWEEN %s AND %s"
-            with MySqlHelper(**self.db_config) as db:
-                rows = db.query(sql, (rank_min, rank_max))
-            actor_counter = Counter()
-            for row in rows:
-                actors = [a.strip() for a in row['actors'].split(',') if a.strip()]
-                actor_counter.update(actors)
-            result = [{'actor': a, 'count': c} for a, c in actor_counter.most_common(50)]  # 只返回前50
-            return self.success(result)
+            charts_arg = request.args.get('charts', '')
+            charts = [c.strip() for c in charts_arg.split(',') if c.strip()] or list(self.DASHBOARD_CHARTS)
+            unknown = [c for c in charts if c not in self.DASHBOARD_CHARTS]
+            if unknown:
+                return self.fail(f"未知的图表: {', '.join(unknown)}")
+            charts = [c for c in self.DASHBOARD_CHARTS if c in charts]  # 去重并固定顺序，便于缓存
+            return self.success(self.cached(
+                'dashboard:' + ','.join(charts), rank_min, rank_max,
+                lambda lo, hi: self.compute_dashboard(lo, hi, charts)
+            ))
         except Exception as e:
-            return self.fail(str(e)) 
\ No newline at end of file
+            return self.fail(str(e))
+
+    def compute_dashboard(self, rank_min, rank_max, charts):
+        """只查询一次 rank 范围内所需的列，单次遍历同时计算多个图表"""
+        index = self.get_rank_index()
+        if index is not None:
+            return {chart: getattr(index, chart)(rank_min, rank_max) for chart in charts}
+
+        sql = self.dashboard_sql(charts, self.row_scope())
+        with self.get_db() as db:
+            if self.columnar:
+                return self.summarize_columns(db.query_columns(sql, (rank_min, rank_max)), charts)
+            rows = db.query(sql, (rank_min, rank_max))
+        return self.summarize_rows(rows, charts)
+
+    @classmethod
+    def dashboard_sql(cls, charts, scope="1 = 1"):
+        """查询 rank 范围内 charts 所需列的 SQL（参数为 rank_min, rank_max），scope 为 row_scope 返回的条件"""
+        columns = []
+        for chart in charts:
+            columns.extend(c for c in cls.DASHBOARD_CHARTS[chart] if c not in columns)
+        return (f"SELECT {', '.join(f'`{c}`' for c in columns)} FROM douban_hot100_list "
+                f"WHERE `rank` BETWEEN %s AND %s AND {scope}")
+
+    @classmethod
+    def summarize_rows(cls, rows, charts):
+        """单次遍历查询结果，同时计算 charts 中的各个图表（同步/异步接口共用）"""
+        want = set(charts)
+        type_counter, region_counter, actor_counter = Counter(), Counter(), Counter()
+        period_counter = defaultdict(int)
+        scores = []
+        for row in rows:
+            if 'type_distribution' in want:
+                type_counter.update(cls.split_values(row['type']))
+            if 'region_distribution' in want:
+                region_counter.update(cls.split_values(row['regions']))
+            if 'actor_popularity' in want:
+                actor_counter.update(cls.split_values(row['actors']))
+            if 'release_date_distribution' in want and row['release_year'] is not None:
+                period_start = row['release_year'] - row['release_year'] % 5
+                period_counter[f"{period_start}-{period_start+4}"] += 1
+            if 'score_distribution' in want and row['score_value'] is not None:
+                scores.append({
+                    'title': row['title'], 'release_date': row['release_date'], 'score': float(row['score_value'])
+                })
+
+        result = {}
+        if 'type_distribution' in want:
+            result['type_distribution'] = [{'type': t, 'count': c} for t, c in type_counter.items()]
+        if 'region_distribution' in want:
+            result['region_distribution'] = [{'region': r, 'count': c} for r, c in region_counter.items()]
+        if 'release_date_distribution' in want:
+            result['release_date_distribution'] = [
+                {'period': p, 'count': c} for p, c in sorted(period_counter.items())
+            ]
+        if 'score_distribution' in want:
+            result['score_distribution'] = scores
+        if 'actor_popularity' in want:
+            result['actor_popularity'] = [{'actor': a, 'count': c} for a, c in actor_counter.most_common(50)]
+        return result
+
+    @classmethod
+    def _split_counts(cls, column):
+        """字典编码的多值列（逗号分隔）按单个取值计数：先对编码 bincount，再只拆分每个不同的组合
+
+        返回的 Counter 按取值首次出现的顺序插入，与逐行 Counter.update 的结果一致
+        """
+        values, counts = column.value_counts()
+        counter = Counter()
+        for value, count in zip(values, counts.tolist()):
+            for item in cls.split_values(value):
+                counter[item] += count
+        return counter
+
+    @classmethod
+    def summarize_columns(cls, columns, charts):
+        """summarize_rows 的列式版本：输入 MySqlHelper.query_columns 返回的 ColumnBatch，结果与 summarize_rows 相同"""
+        want = set(charts)
+        result = {}
+        if 'type_distribution' in want:
+            result['type_distribution'] = [
+                {'type': t, 'count': c} for t, c in cls._split_counts(columns['type']).items()
+            ]
+        if 'region_distribution' in want:
+            result['region_distribution'] = [
+                {'region': r, 'count': c} for r, c in cls._split_counts(columns['regions']).items()
+            ]
+        if 'release_date_distribution' in want:
+            years = columns['release_year']
+            if years.dtype.kind == 'f':
+                years = years[~np.isnan(years)].astype(np.int64)
+            starts, counts = np.unique(years - years % 5, return_counts=True)
+            periods = sorted((f"{start}-{start+4}", count) for start, count in zip(starts.tolist(), counts.tolist()))
+            result['release_date_distribution'] = [{'period': p, 'count': c} for p, c in periods]
+        if 'score_distribution' in want:
+            scores = columns['score_value']
+            valid = ~np.isnan(scores)
+            result['score_distribution'] = [
+                {'title': title, 'release_date': release_date, 'score': score}
+                for title, release_date, score in zip(
+                    columns['title'].to_pylist(valid), columns['release_date'].to_pylist(valid), scores[valid].tolist()
+                )
+            ]
+        if 'actor_popularity' in want:
+            result['actor_popularity'] = [
+                {'actor': a, 'count': c} for a, c in cls._split_counts(columns['actors']).most_common(50)
+            ]
+        return result
@@ -0,0 +1,229 @@
+import heapq
+import threading
+
+import numpy as np
+
+from Utils.SnapshotStore import SnapshotStore
+from Utils.TextUtils import split_values
+
+
+class _PrefixCounts:
+    """某一维度（类型/地区/演员/年代）按排名累计的计数矩阵
+
+    counts[i, r] 为第 i 个取值在排名 r 上出现的次数，prefix 为沿排名方向的累加和，
+    第 0 列恒为 0，因此 [lo, hi] 区间计数 = prefix[:, hi] - prefix[:, lo - 1]。
+    矩阵按容量倍增分配，追加时只更新新行涉及的取值所在的行，不重新分配、不重算整个矩阵；
+    超出 max_rank 的列与最后一列保持相同（累加和不再变化）。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()  # 原地追加与区间读取互斥，持有时间只有一次追加或一次两列相减
+        self.labels = []  # 按首次出现顺序排列的取值，只追加
+        self.positions = {}  # 取值 -> 行号
+        self.size = 0  # 已使用的行数
+        self.max_rank = 0
+        self.counts = np.zeros((0, 1), dtype=np.int32)
+        self.prefix = np.zeros((0, 1), dtype=np.int32)
+
+    def _reserve(self, rows, cols):
+        """保证矩阵至少有 rows 行、cols 列，不足时按倍增扩容"""
+        capacity_rows, capacity_cols = self.counts.shape
+        if rows <= capacity_rows and cols <= capacity_cols:
+            return
+        new_rows = max(rows, capacity_rows * 2, 16) if rows > capacity_rows else capacity_rows
+        new_cols = max(cols, capacity_cols * 2) if cols > capacity_cols else capacity_cols
+        counts = np.zeros((new_rows, new_cols), dtype=np.int32)
+        prefix = np.zeros((new_rows, new_cols), dtype=np.int32)
+        counts[:capacity_rows, :capacity_cols] = self.counts
+        prefix[:capacity_rows, :capacity_cols] = self.prefix
+        prefix[:capacity_rows, capacity_cols:] = self.prefix[:, -1:]
+        self.counts, self.prefix = counts, prefix
+
+    def add(self, items, max_rank):
+        """原地累加一批 (排名, 取值)，只重算这批取值所在行的累加和"""
+        with self._lock:
+            for _, label in items:
+                if label not in self.positions:
+                    self.positions[label] = len(self.labels)
+                    self.labels.append(label)
+            self._reserve(len(self.labels), max_rank + 1)
+            if items:
+                rows = np.fromiter((self.positions[label] for _, label in items), dtype=np.int64, count=len(items))
+                cols = np.fromiter((rank for rank, _ in items), dtype=np.int64, count=len(items))
+                np.add.at(self.counts, (rows, cols), 1)
+                touched = np.unique(rows)
+                self.prefix[touched] = np.cumsum(self.counts[touched], axis=1, dtype=np.int32)
+            self.size = len(self.labels)
+            self.max_rank = max(self.max_rank, max_rank)
+
+    def range_counts(self, rank_min, rank_max):
+        """返回 [rank_min, rank_max] 内每个取值的计数向量"""
+        with self._lock:
+            lo = max(rank_min, 1)
+            hi = min(rank_max, self.max_rank)
+            if lo > hi:
+                return np.zeros(self.size, dtype=np.int32)
+            return self.prefix[:self.size, hi] - self.prefix[:self.size, lo - 1]
+
+
+class RankPrefixIndex:
+    """基于排名前缀和的统计索引
+
+    入库后按主表 id 增量读取新行，维护类型、地区、演员、5年上映区间的排名累计计数，
+    任意 rank_min/rank_max 的统计只需两列相减，不再访问数据库。
+    追加模式下只把新行累加进已有矩阵（见 _PrefixCounts）；若新快照中有行被原地更新或删除（增量入库模式），
+    则在新对象上全量重建后整体替换；追加模式每个快照都是完整榜单，只加载最新快照的行，新快照到达时重建。
+    评分散点数据按排名排序保存，新行归并进有序列表，区间查询用二分定位切片。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()  # 串行化写入；追加由各维度自身的锁与读取互斥，重建则整体替换
+        self.last_id = 0
+        self.loaded_rows = 0  # id <= last_id 的已读取行数，用于发现被撤销删除的行
+        self.last_snapshot = 0
+        self.scope = None  # 已加载的当前榜单范围（SnapshotStore.row_scope）
+        self.max_rank = 0
+        self.loaded = False
+        self.types = _PrefixCounts()
+        self.regions = _PrefixCounts()
+        self.actors = _PrefixCounts()
+        self.periods = _PrefixCounts()
+        self.scores = (np.zeros(0, dtype=np.int64), [])  # (按排名排序的排名数组, 对应的评分行)
+
+    @staticmethod
+    def _period(year):
+        """上映年份对应的5年区间，年份为空时返回 None"""
+        if year is None:
+            return None
+        period_start = year - (year % 5)
+        return f"{period_start}-{period_start+4}"
+
+    def refresh(self, db, rebuild=False):
+        """从数据库增量加载上次之后新增的电影并更新索引
+
+        Args:
+            db: MySqlHelper 实例
+            rebuild: 为True时忽略已有内容全量重建
+
+        Returns:
+            本次加载的行数
+        """
+        with self._lock:
+            store = SnapshotStore(db)
+            latest = store.latest_finished('douban')
+            scope = self.scope
+            if latest and latest['id'] > self.last_snapshot:
+                scope = store.row_scope(latest, 'douban_hot100_list')
+                # 新的整榜快照（追加模式）替换掉此前的全部行，只能重建；从整榜快照切换到增量快照时同样重建
+                rebuild = rebuild or scope[1] or bool(self.scope and self.scope[1])
+            # 只统计已完成的快照（row_count > 0），正在入库或中途失败被撤销的快照不计入
+            snapshot = db.query_one(
+                "SELECT MAX(id) AS last_id, COALESCE(SUM(updated_rows + removed_rows), 0) AS touched "
+                "FROM scrape_snapshots WHERE source = 'douban' AND id > %s AND row_count > 0",
+                (self.last_snapshot,)
+            )
+            # 有行被原地更新或删除时无法只追加，改为全量重建；重建期间读取方仍看到旧索引
+            rebuild = rebuild or bool(snapshot and snapshot['touched'])
+            condition = SnapshotStore.scope_condition(scope)
+            if not rebuild and self.last_id:
+                # 已加载范围内的行数变少（失败的快照被撤销）时同样重建
+                loaded = db.query_one(
+                    f"SELECT COUNT(*) AS n FROM douban_hot100_list WHERE id <= %s AND {condition}", (self.last_id,)
+                )
+                rebuild = loaded is None or loaded['n'] != self.loaded_rows
+            last_snapshot = snapshot['last_id'] if snapshot and snapshot['last_id'] else self.last_snapshot
+
+            sql = ("SELECT id, `rank`, `type`, regions, title, release_date, release_year, "
+                   "score_value AS score, actors FROM douban_hot100_list "
+                   f"WHERE id > %s AND {condition} ORDER BY id")
+            rows = db.query(sql, (0 if rebuild else self.last_id,))
+            if rows is None:
+                raise RuntimeError("加载排名索引失败")
+            if rebuild:
+                self.last_id = self.loaded_rows = 0
+            if rows:
+                self.last_id = rows[-1]['id']
+                self.loaded_rows += len(rows)
+            rows = [row for row in rows if row['rank'] is not None and row['rank'] > 0]
+            self._add_rows(rows, replace=rebuild)
+            self.last_snapshot = last_snapshot
+            self.scope = scope
+            self.loaded = True
+            return len(rows)
+
+    def rebuild(self, db):
+        """丢弃现有索引并全量重建"""
+        return self.refresh(db, rebuild=True)
+
+    def _add_rows(self, rows, replace=False):
+        """把新行累加进各维度（需持有写锁），replace 为True时在空索引上重建后整体替换"""
+        target = RankPrefixIndex() if replace else self
+        max_rank = max([target.max_rank] + [row['rank'] for row in rows])
+        type_items, region_items, actor_items, period_items = [], [], [], []
+        for row in rows:
+            rank = row['rank']
+            type_items.extend((rank, t) for t in split_values(row['type']))
+            region_items.extend((rank, r) for r in split_values(row['regions']))
+            actor_items.extend((rank, a) for a in split_values(row['actors']))
+            period = self._period(row['release_year'])
+            if period is not None:
+                period_items.append((rank, period))
+
+        new_scores = sorted((
+            {'id': row['id'], 'rank': row['rank'], 'title': row['title'], 'release_date': row['release_date'],
+             'release_year': row['release_year'], 'score': row['score']}
+            for row in rows if row['score'] is not None
+        ), key=lambda row: row['rank'])
+        # 旧行在前的稳定归并，同一排名内保持 id 升序
+        score_rows = list(heapq.merge(target.scores[1], new_scores, key=lambda row: row['rank']))
+        score_ranks = np.fromiter((row['rank'] for row in score_rows), dtype=np.int64, count=len(score_rows))
+
+        target.types.add(type_items, max_rank)
+        target.regions.add(region_items, max_rank)
+        target.actors.add(actor_items, max_rank)
+        target.periods.add(period_items, max_rank)
+        if replace:
+            self.types, self.regions, self.actors, self.periods = (
+                target.types, target.regions, target.actors, target.periods
+            )
+        self.scores = (score_ranks, score_rows)
+        self.max_rank = max_rank
+
+    @staticmethod
+    def _nonzero(dimension, rank_min, rank_max):
+        """区间内计数大于0的 (取值, 计数)，按取值首次出现顺序"""
+        counts = dimension.range_counts(rank_min, rank_max)
+        return [(dimension.labels[i], int(counts[i])) for i in np.flatnonzero(counts)]
+
+    def type_distribution(self, rank_min, rank_max):
+        """类型分布"""
+        return [{'type': t, 'count': c} for t, c in self._nonzero(self.types, rank_min, rank_max)]
+
+    def region_distribution(self, rank_min, rank_max):
+        """地区分布"""
+        return [{'region': r, 'count': c} for r, c in self._nonzero(self.regions, rank_min, rank_max)]
+
+    def release_date_distribution(self, rank_min, rank_max):
+        """5年区间上映时间分布"""
+        return [{'period': p, 'count': c} for p, c in sorted(self._nonzero(self.periods, rank_min, rank_max))]
+
+    def actor_popularity(self, rank_min, rank_max, limit=50):
+        """出演次数最多的前limit位演员"""
+        actors = self.actors
+        counts = actors.range_counts(rank_min, rank_max)
+        order = np.argsort(-counts, kind='stable')[:limit]
+        return [{'actor': actors.labels[i], 'count': int(counts[i])} for i in order if counts[i] > 0]
+
+    def score_rows(self, rank_min, rank_max):
+        """rank 范围内的原始评分行（含 id、rank），按 (rank, id) 排序"""
+        score_ranks, score_rows = self.scores
+        lo = int(np.searchsorted(score_ranks, rank_min, side='left'))
+        hi = int(np.searchsorted(score_ranks, rank_max, side='right'))
+        return score_rows[lo:hi]
+
+    def score_distribution(self, rank_min, rank_max):
+        """评分散点数据"""
+        return [
+            {'title': row['title'], 'release_date': row['release_date'], 'score': float(row['score'])}
+            for row in self.score_rows(rank_min, rank_max)
+        ]
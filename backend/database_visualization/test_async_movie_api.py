@@ -0,0 +1,257 @@
+"""AsyncMovieAPI 的正确性测试：对同一个 MySQL 协议桩服务器（Utils/MySqlStubServer）比较异步接口与同步 MovieAPI 的结果，
+测试同键并发请求的合并（含发起计算的请求被取消、计算失败），以及新快照入库后缓存按数据版本失效
+
+需要 mysql-mimic 和 aiomysql，未安装时跳过。
+运行: python -m pytest backend/database_visualization/test_async_movie_api.py
+"""
+import asyncio
+import json
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from backend.database_visualization.asgi import create_asgi_app
+from backend.database_visualization.async_movie_api import AsyncMovieAPI
+from backend.database_visualization.movie_api import MovieAPI
+from Utils.MySqlStubServer import MySqlStubServer, MysqlServer
+from Utils.TTLCache import TTLCache
+
+try:
+    import aiomysql
+except ImportError:
+    aiomysql = None
+
+if aiomysql is not None:
+    from Utils.AsyncMySqlHelper import AsyncMySqlPool
+
+SCHEMA = """
+CREATE TABLE douban_hot100_list (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    `rank` INTEGER, `type` TEXT, regions TEXT, title TEXT, release_date TEXT, actors TEXT,
+    score_value REAL, release_year INTEGER
+);
+INSERT INTO douban_hot100_list (`rank`, `type`, regions, title, release_date, actors, score_value, release_year) VALUES
+    (1, '剧情, 犯罪', '美国', '肖申克的救赎', '1994-09-10', '蒂姆·罗宾斯, 摩根·弗里曼', 9.7, 1994),
+    (2, '剧情, 爱情, 同性', '中国大陆, 中国香港', '霸王别姬', '1993-07-26', '张国荣, 张丰毅, 巩俐', 9.6, 1993),
+    (3, '剧情, 喜剧, 爱情', '美国', '阿甘正传', '1994-06-23', '汤姆·汉克斯, 罗宾·怀特', 9.5, 1994),
+    (4, '剧情, 剧情, 动作', '意大利', '美丽人生', '1997-12-20', '罗伯托·贝尼尼, 罗伯托·贝尼尼', 9.5, 1997),
+    (5, '剧情, 战争', '美国', '辛德勒的名单', '1993-11-30', '连姆·尼森', NULL, 1993),
+    (6, '动画, 奇幻', '日本', '千与千寻', '未知', '柊瑠美, 入野自由', 9.4, NULL),
+    (7, '', '', '无类型', '2001-01-01', '', 8.0, 2001),
+    (120, '剧情', '美国', '排名之外', '2000-01-01', '张国荣', 8.1, 2000);
+"""
+
+# 追加模式入库的两个快照：每个快照都是完整榜单
+SNAPSHOT_SCHEMA = """
+CREATE TABLE douban_hot100_list (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    `rank` INTEGER, `type` TEXT, regions TEXT, title TEXT, release_date TEXT, actors TEXT,
+    score_value REAL, release_year INTEGER, snapshot_id INTEGER
+);
+CREATE TABLE scrape_snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, source TEXT NOT NULL, row_count INTEGER DEFAULT 0
+);
+INSERT INTO scrape_snapshots (source, row_count) VALUES ('douban', 2);
+INSERT INTO douban_hot100_list (`rank`, `type`, regions, title, release_date, actors, score_value, release_year,
+                                snapshot_id) VALUES
+    (1, '剧情', '美国', '肖申克的救赎', '1994-09-10', '蒂姆·罗宾斯', 9.7, 1994, 1),
+    (2, '剧情', '中国大陆', '霸王别姬', '1993-07-26', '张国荣', 9.6, 1993, 1);
+"""
+SECOND_SNAPSHOT = """
+INSERT INTO scrape_snapshots (source, row_count) VALUES ('douban', 2);
+INSERT INTO douban_hot100_list (`rank`, `type`, regions, title, release_date, actors, score_value, release_year,
+                                snapshot_id) VALUES
+    (1, '剧情', '美国', '肖申克的救赎', '1994-09-10', '蒂姆·罗宾斯', 9.7, 1994, 2),
+    (2, '动画', '日本', '千与千寻', '2001-07-20', '柊瑠美', 9.4, 2001, 2);
+"""
+
+CHARTS = list(MovieAPI.DASHBOARD_CHARTS)
+RANK_RANGES = [(1, 100), (2, 4), (5, 5), (101, 200), (1, 200)]
+
+
+@unittest.skipIf(MysqlServer is None or aiomysql is None, "需要安装 mysql-mimic 和 aiomysql")
+class AsyncMovieAPIStubTest(unittest.IsolatedAsyncioTestCase):
+    """异步接口与同步接口对同一份数据的结果一致"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MySqlStubServer()
+        cls.server.execute_script(SCHEMA)
+        cls.server.start()
+        cls.sync_api = MovieAPI(cls.server.db_config)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    async def asyncSetUp(self):
+        self.pool = AsyncMySqlPool(**self.server.db_config, max_size=4)
+        await self.pool.open()
+        self.api = AsyncMovieAPI(self.pool)
+
+    async def asyncTearDown(self):
+        await self.pool.close()
+
+    def expected(self, chart, rank_min, rank_max):
+        compute = getattr(self.sync_api, 'compute_' + chart)
+        return compute(rank_min, rank_max)
+
+    async def test_charts_match_sync_api(self):
+        for chart in CHARTS:
+            for rank_min, rank_max in RANK_RANGES:
+                with self.subTest(chart=chart, rank_min=rank_min, rank_max=rank_max):
+                    response = await self.api.chart(chart, {'rank_min': rank_min, 'rank_max': rank_max})
+                    self.assertTrue(response['success'], response['msg'])
+                    self.assertEqual(response['data'], self.expected(chart, rank_min, rank_max))
+
+    async def test_dashboard_matches_sync_api(self):
+        for rank_min, rank_max in RANK_RANGES:
+            response = await self.api.dashboard({'rank_min': rank_min, 'rank_max': rank_max})
+            self.assertTrue(response['success'], response['msg'])
+            self.assertEqual(response['data'], self.sync_api.compute_dashboard(rank_min, rank_max, CHARTS))
+
+        response = await self.api.dashboard({'charts': 'actor_popularity, type_distribution'})
+        self.assertEqual(set(response['data']), {'type_distribution', 'actor_popularity'})
+        self.assertFalse((await self.api.dashboard({'charts': 'unknown'}))['success'])
+
+    async def test_duplicate_values_counted_once_per_movie(self):
+        response = await self.api.type_distribution({'rank_min': 4, 'rank_max': 4})
+        self.assertEqual(response['data'], [{'type': '剧情', 'count': 1}, {'type': '动作', 'count': 1}])
+
+    async def test_concurrent_requests_query_once(self):
+        before = len(self.server.queries)
+        responses = await asyncio.gather(*[
+            self.api.region_distribution({'rank_min': 1, 'rank_max': 7}) for _ in range(10)
+        ])
+        self.assertTrue(all(r['data'] == responses[0]['data'] for r in responses))
+        selects = [q for q in self.server.queries[before:] if 'douban_hot100_list' in q]
+        self.assertEqual(len(selects), 1)
+
+
+@unittest.skipIf(MysqlServer is None or aiomysql is None, "需要安装 mysql-mimic 和 aiomysql")
+class AsyncMovieAPIVersionTest(unittest.IsolatedAsyncioTestCase):
+    """只统计最新快照；新快照入库后缓存在检查数据版本时失效"""
+
+    async def asyncSetUp(self):
+        self.server = MySqlStubServer()
+        self.server.execute_script(SNAPSHOT_SCHEMA)
+        self.server.start()
+        self.pool = AsyncMySqlPool(**self.server.db_config, max_size=2)
+        await self.pool.open()
+
+    async def asyncTearDown(self):
+        await self.pool.close()
+        self.server.stop()
+
+    async def test_new_snapshot_invalidates_cache(self):
+        api = AsyncMovieAPI(self.pool, cache=TTLCache(max_size=16, ttl=300), version_ttl=3600)
+        first = [{'type': '剧情', 'count': 2}]
+        self.assertEqual((await api.type_distribution({}))['data'], first)
+        self.assertEqual(await api.data_version(), 1)
+
+        self.server.execute_script(SECOND_SNAPSHOT)
+        # version_ttl 未到期，仍返回缓存的旧版本结果
+        self.assertEqual((await api.type_distribution({}))['data'], first)
+        self.assertEqual(await api.data_changed(), 2)
+        # 只统计最新快照的两行，不与旧快照累加
+        self.assertEqual((await api.type_distribution({}))['data'],
+                         [{'type': '剧情', 'count': 1}, {'type': '动画', 'count': 1}])
+
+    async def test_invalidate_route(self):
+        app = create_asgi_app(db_config=self.server.db_config)
+        await app.pool.open()
+        try:
+            self.assertEqual((await app.movie_api.type_distribution({}))['data'], [{'type': '剧情', 'count': 2}])
+            self.server.execute_script(SECOND_SNAPSHOT)
+            status, body = await self.request(app, 'POST', '/api/cache-invalidate')
+            self.assertEqual((status, body['data']), (200, {'version': 2}))
+            status, body = await self.request(app, 'GET', '/api/type-distribution')
+            self.assertEqual(body['data'], [{'type': '剧情', 'count': 1}, {'type': '动画', 'count': 1}])
+            status, _ = await self.request(app, 'GET', '/api/cache-invalidate')
+            self.assertEqual(status, 405)
+        finally:
+            await app.pool.close()
+
+    @staticmethod
+    async def request(app, method, path):
+        """调用 ASGI 应用，返回 (状态码, JSON 响应体)"""
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        await app({'type': 'http', 'method': method, 'path': path, 'query_string': b''}, receive, send)
+        return messages[0]['status'], json.loads(messages[1]['body'])
+
+
+class AsyncMovieAPICoalescingTest(unittest.IsolatedAsyncioTestCase):
+    """同键并发请求的合并，不需要数据库"""
+
+    async def asyncSetUp(self):
+        self.api = AsyncMovieAPI(pool=None)
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def compute(self, rank_min, rank_max):
+        self.calls += 1
+        await self.release.wait()
+        return [{'calls': self.calls}]
+
+    async def test_waiters_share_result(self):
+        tasks = [asyncio.create_task(self.api.cached('t', 1, 100, self.compute)) for _ in range(5)]
+        await asyncio.sleep(0)
+        self.release.set()
+        results = await asyncio.gather(*tasks)
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(result == [{'calls': 1}] for result in results))
+        self.assertEqual(self.api._inflight, {})
+
+    async def test_cancelled_leader_does_not_hang_waiters(self):
+        leader = asyncio.create_task(self.api.cached('t', 1, 100, self.compute))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(self.api.cached('t', 1, 100, self.compute)) for _ in range(3)]
+        await asyncio.sleep(0)
+        leader.cancel()
+        for _ in range(3):  # 领头请求结束、等待者重新合并到新的计算上
+            await asyncio.sleep(0)
+        self.release.set()
+        results = await asyncio.wait_for(asyncio.gather(*waiters), timeout=1)
+        with self.assertRaises(asyncio.CancelledError):
+            await leader
+        # 一个等待者重新计算，其余等待者共享它的结果
+        self.assertEqual(self.calls, 2)
+        self.assertTrue(all(result == [{'calls': 2}] for result in results))
+        self.assertEqual(self.api._inflight, {})
+
+    async def test_cancelled_waiter_does_not_cancel_leader(self):
+        leader = asyncio.create_task(self.api.cached('t', 1, 100, self.compute))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(self.api.cached('t', 1, 100, self.compute))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+        self.release.set()
+        self.assertEqual(await leader, [{'calls': 1}])
+        self.assertTrue(waiter.cancelled())
+
+    async def test_failure_propagates_to_waiters(self):
+        async def failing(rank_min, rank_max):
+            self.calls += 1
+            await self.release.wait()
+            raise RuntimeError("查询执行失败")
+
+        tasks = [asyncio.create_task(self.api.cached('t', 1, 100, failing)) for _ in range(3)]
+        await asyncio.sleep(0)
+        self.release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+        self.assertEqual(self.api._inflight, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
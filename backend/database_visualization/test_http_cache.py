@@ -0,0 +1,139 @@
+"""HttpCache 的测试：ETag/304 随数据版本和查询参数变化、失败结果不缓存，以及 JSON 响应的压缩
+
+运行: python -m pytest backend/database_visualization/test_http_cache.py
+"""
+import gzip
+import json
+import os
+import sys
+import unittest
+
+from flask import Flask, jsonify, request
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from backend.database_visualization import http_cache
+from backend.database_visualization.http_cache import HttpCache
+
+
+class HttpCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.version = 1
+        self.calls = []
+        app = Flask(__name__)
+
+        @app.route('/api/chart', methods=['GET', 'POST'])
+        def chart():
+            self.calls.append(request.full_path)
+            size = int(request.args.get('size', 3))
+            return jsonify({'data': ['电影'] * size, 'success': True})
+
+        @app.route('/api/failing')
+        def failing():
+            self.calls.append(request.full_path)
+            return jsonify({'message': '查询失败', 'success': False})
+
+        @app.route('/api/other')
+        def other():
+            return jsonify({'data': [], 'success': True})
+
+        HttpCache(self.get_version, endpoints=['chart', 'failing'], max_age=60, min_size=1024).init_app(app)
+        self.client = app.test_client()
+
+    def get_version(self):
+        if isinstance(self.version, Exception):
+            raise self.version
+        return self.version
+
+    def get(self, path, etag=None, encoding=None):
+        headers = {}
+        if etag is not None:
+            headers['If-None-Match'] = etag
+        if encoding is not None:
+            headers['Accept-Encoding'] = encoding
+        return self.client.get(path, headers=headers)
+
+    def test_not_modified_skips_handler(self):
+        first = self.get('/api/chart')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.headers['Cache-Control'], 'public, max-age=60')
+        etag = first.headers['ETag']
+        second = self.get('/api/chart', etag)
+        self.assertEqual((second.status_code, second.data), (304, b''))
+        self.assertEqual(second.headers['ETag'], etag)
+        self.assertEqual(len(self.calls), 1)
+        # 列表中任一 ETag 或 * 命中都返回 304
+        self.assertEqual(self.get('/api/chart', f'"stale", {etag}').status_code, 304)
+        self.assertEqual(self.get('/api/chart', '*').status_code, 304)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_new_version_changes_etag(self):
+        etag = self.get('/api/chart').headers['ETag']
+        self.version = 2
+        response = self.get('/api/chart', etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_etag_depends_on_query(self):
+        etag = self.get('/api/chart?rank_min=1&rank_max=50').headers['ETag']
+        self.assertEqual(self.get('/api/chart?rank_max=50&rank_min=1').headers['ETag'], etag)
+        self.assertEqual(self.get('/api/chart?rank_max=50&rank_min=1', etag).status_code, 304)
+        self.assertNotEqual(self.get('/api/chart?rank_min=1&rank_max=60').headers['ETag'], etag)
+        self.assertEqual(self.get('/api/chart?rank_min=1&rank_max=60', etag).status_code, 200)
+
+    def test_failed_result_not_cached(self):
+        response = self.get('/api/failing')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response.headers)
+        self.assertNotIn('Cache-Control', response.headers)
+
+    def test_unknown_version_has_no_etag(self):
+        for version in (None, RuntimeError('数据库不可用')):
+            with self.subTest(version=version):
+                self.version = version
+                response = self.get('/api/chart', '*')
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn('ETag', response.headers)
+
+    def test_only_configured_get_endpoints(self):
+        self.assertNotIn('ETag', self.get('/api/other').headers)
+        etag = self.get('/api/chart').headers['ETag']
+        response = self.client.post('/api/chart', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response.headers)
+
+    def test_gzip_large_response(self):
+        plain = self.get('/api/chart?size=500')
+        self.assertNotIn('Content-Encoding', plain.headers)
+        compressed = self.get('/api/chart?size=500', encoding='gzip, deflate')
+        self.assertEqual(compressed.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', compressed.headers['Vary'])
+        self.assertEqual(gzip.decompress(compressed.data), plain.data)
+        self.assertLess(len(compressed.data), len(plain.data))
+        self.assertEqual(json.loads(plain.data)['data'], ['电影'] * 500)
+        # 压缩后的 ETag 带编码后缀，两种表示都能命中同一版本
+        self.assertEqual(compressed.headers['ETag'], plain.headers['ETag'][:-1] + '-gzip"')
+        self.assertEqual(self.get('/api/chart?size=500', compressed.headers['ETag']).status_code, 304)
+
+    def test_small_response_not_compressed(self):
+        response = self.get('/api/chart', encoding='gzip')
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertNotIn('-gzip', response.headers['ETag'])
+
+    def test_unsupported_encoding(self):
+        response = self.get('/api/chart?size=500', encoding='identity' if http_cache.brotli else 'br')
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(json.loads(response.data)['data'], ['电影'] * 500)
+
+    @unittest.skipIf(http_cache.brotli is None, "需要安装 brotli")
+    def test_brotli_preferred(self):
+        plain = self.get('/api/chart?size=500')
+        response = self.get('/api/chart?size=500', encoding='gzip, br')
+        self.assertEqual(response.headers['Content-Encoding'], 'br')
+        self.assertEqual(http_cache.brotli.decompress(response.data), plain.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
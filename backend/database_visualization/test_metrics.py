@@ -0,0 +1,64 @@
+"""RequestMetrics 的测试：多次创建应用时查询监听器只注册一次，查询只计入当前应用的指标
+
+运行: python -m pytest backend/database_visualization/test_metrics.py
+"""
+import os
+import sys
+import unittest
+
+from flask import Flask
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from backend.database_visualization.metrics import RequestMetrics, _dispatch_query
+from Utils.MySqlHelper import MySqlHelper
+
+
+def notify(event, sql, rows=1, seconds=0.01):
+    """不连接数据库，直接按 MySqlHelper 的方式通知监听器"""
+    MySqlHelper.__new__(MySqlHelper)._notify(event, sql, rows, seconds)
+
+
+class RequestMetricsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.listeners = list(MySqlHelper.listeners)
+        self.apps, self.metrics = [], []
+        for _ in range(3):
+            app = Flask(__name__)
+            metrics = RequestMetrics()
+            metrics.init_app(app)
+            self.apps.append(app)
+            self.metrics.append(metrics)
+
+    def tearDown(self):
+        MySqlHelper.listeners[:] = self.listeners
+
+    def test_listener_registered_once(self):
+        self.assertEqual(MySqlHelper.listeners.count(_dispatch_query), 1)
+        self.assertFalse([cb for cb in MySqlHelper.listeners if getattr(cb, '__self__', None) in self.metrics])
+
+    def test_query_counted_for_current_app_only(self):
+        with self.apps[1].app_context():
+            notify('query', 'SELECT * FROM douban_hot100_list WHERE id = 1')
+        notify('query', 'SELECT 2')  # 应用上下文之外不计入
+
+        rendered = [metrics.render() for metrics in self.metrics]
+        self.assertIn('SELECT * FROM douban_hot100_list WHERE id = ?', rendered[1])
+        self.assertEqual(rendered[1].count('db_query_rows_count{'), 1)
+        for index in (0, 2):
+            self.assertNotIn('db_query_rows_count{', rendered[index])
+
+    def test_request_phase_recorded(self):
+        app, metrics = self.apps[0], self.metrics[0]
+
+        @app.route('/query')
+        def query():
+            notify('query', 'SELECT 1', seconds=0.5)
+            return {'ok': True}
+
+        self.assertEqual(app.test_client().get('/query').status_code, 200)
+        self.assertIn('http_request_phase_seconds_sum{endpoint="query",phase="query"} 0.5', metrics.render())
+
+
+if __name__ == '__main__':
+    unittest.main()
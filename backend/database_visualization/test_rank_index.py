@@ -0,0 +1,237 @@
+"""RankPrefixIndex 的测试：前缀和矩阵扩容后的区间计数、refresh 的原地追加与各种重建条件，结果都与逐行扫描比较
+
+refresh 的测试对本地 MySQL 协议桩服务器（Utils/MySqlStubServer）读取，需要 mysql-mimic，未安装时跳过。
+运行: python -m pytest backend/database_visualization/test_rank_index.py
+"""
+import os
+import random
+import sys
+import unittest
+from collections import Counter
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from backend.database_visualization.rank_index import RankPrefixIndex, _PrefixCounts
+from Utils.MySqlHelper import MySqlHelper
+from Utils.MySqlStubServer import MySqlStubServer, MysqlServer
+from Utils.TextUtils import split_values
+
+# 没有快照记录的历史行（snapshot_id 为空）
+SCHEMA = """
+CREATE TABLE douban_hot100_list (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    `rank` INTEGER, `type` TEXT, regions TEXT, title TEXT, release_date TEXT, actors TEXT,
+    score_value REAL, release_year INTEGER, snapshot_id INTEGER
+);
+CREATE TABLE scrape_snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, source TEXT NOT NULL, row_count INTEGER DEFAULT 0,
+    inserted_rows INTEGER DEFAULT 0, updated_rows INTEGER DEFAULT 0, removed_rows INTEGER DEFAULT 0
+);
+INSERT INTO douban_hot100_list (`rank`, `type`, regions, title, release_date, actors, score_value, release_year) VALUES
+    (1, '剧情, 犯罪', '美国', '肖申克的救赎', '1994-09-10', '蒂姆·罗宾斯, 摩根·弗里曼', 9.7, 1994),
+    (2, '剧情, 爱情', '中国大陆, 中国香港', '霸王别姬', '1993-07-26', '张国荣, 张丰毅, 巩俐', 9.6, 1993),
+    (3, '剧情, 喜剧', '美国', '阿甘正传', '1994-06-23', '汤姆·汉克斯', 9.5, 1994),
+    (4, '动画, 奇幻', '日本', '千与千寻', '未知', '柊瑠美, 入野自由', NULL, NULL);
+"""
+
+# 增量模式的快照 1：新增 3 行（排名超出已加载的最大排名，并带来多个新取值），row_count 为榜单总行数
+INCREMENTAL_SNAPSHOT = """
+INSERT INTO scrape_snapshots (source, row_count, inserted_rows) VALUES ('douban', 7, 3);
+INSERT INTO douban_hot100_list (`rank`, `type`, regions, title, release_date, actors, score_value, release_year,
+                                snapshot_id) VALUES
+    (5, '剧情, 战争', '美国', '辛德勒的名单', '1993-11-30', '连姆·尼森', 9.5, 1993, 1),
+    (40, '科幻, 冒险', '英国, 美国', '星际穿越', '2014-11-12', '马修·麦康纳, 安妮·海瑟薇', 9.4, 2014, 1),
+    (250, '悬疑', '印度', '调音师', '2018-10-05', '阿尤斯曼·库拉纳, 张国荣', 8.3, 2018, 1);
+"""
+
+# 追加模式的整榜快照：带该编号的行数等于 row_count
+FULL_SNAPSHOT = """
+INSERT INTO scrape_snapshots (source, row_count, inserted_rows) VALUES ('douban', 3, 3);
+INSERT INTO douban_hot100_list (`rank`, `type`, regions, title, release_date, actors, score_value, release_year,
+                                snapshot_id) VALUES
+    (1, '剧情', '美国', '肖申克的救赎', '1994-09-10', '蒂姆·罗宾斯', 9.7, 1994, {snapshot}),
+    (2, '动画', '日本', '千与千寻', '2001-07-20', '柊瑠美', 9.4, 2001, {snapshot}),
+    (3, '剧情, 爱情', '中国大陆', '霸王别姬', '1993-07-26', '张国荣', 9.6, 1993, {snapshot});
+"""
+
+RANK_RANGES = [(1, 1), (1, 3), (2, 5), (4, 40), (6, 39), (41, 300), (1, 1000), (0, 0), (5, 2)]
+
+
+def naive_counts(rows, column, rank_min, rank_max):
+    """逐行扫描统计 [rank_min, rank_max] 内某一列各取值的出现次数"""
+    counter = Counter()
+    for row in rows:
+        if rank_min <= row['rank'] <= rank_max:
+            counter.update(split_values(row[column]))
+    return counter
+
+
+class PrefixCountsTest(unittest.TestCase):
+
+    def test_incremental_add_matches_naive(self):
+        rng = random.Random(7)
+        labels = [f'取值{i}' for i in range(60)]
+        counts = _PrefixCounts()
+        items, max_rank = [], 0
+        # 每批的取值数与最大排名逐步增长，触发行、列的倍增扩容
+        for batch in range(12):
+            max_rank += rng.randint(1, 30)
+            new_items = [(rng.randint(1, max_rank), rng.choice(labels[:5 * (batch + 1)])) for _ in range(40)]
+            counts.add(new_items, max_rank)
+            items.extend(new_items)
+            for _ in range(20):
+                lo, hi = sorted(rng.randint(0, max_rank + 10) for _ in range(2))
+                expected = Counter(label for rank, label in items if lo <= rank <= hi)
+                vector = counts.range_counts(lo, hi)
+                self.assertEqual(len(vector), len(counts.labels))
+                self.assertEqual({counts.labels[i]: int(c) for i, c in enumerate(vector) if c}, dict(expected),
+                                 (batch, lo, hi))
+
+    def test_empty_range(self):
+        counts = _PrefixCounts()
+        counts.add([(3, '甲'), (5, '乙')], 5)
+        self.assertEqual(counts.range_counts(4, 3).tolist(), [0, 0])
+        self.assertEqual(counts.range_counts(6, 100).tolist(), [0, 0])
+        self.assertEqual(counts.range_counts(-5, 3).tolist(), [1, 0])
+
+
+@unittest.skipIf(MysqlServer is None, "需要安装 mysql-mimic")
+class RankPrefixIndexRefreshTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MySqlStubServer()
+        self.server.execute_script(SCHEMA)
+        self.server.start()
+        self.db = MySqlHelper(**self.server.db_config)
+        self.index = RankPrefixIndex()
+        self.assertEqual(self.index.refresh(self.db), 4)
+
+    def tearDown(self):
+        self.db.close()
+        self.server.stop()
+
+    def current_rows(self, predicate):
+        rows = self.db.query("SELECT id, `rank`, `type`, regions, actors, score_value AS score, release_year, "
+                             "snapshot_id FROM douban_hot100_list ORDER BY id")
+        return [row for row in rows if predicate(row)]
+
+    def assert_matches_scan(self, rows):
+        """每个排名区间的各维度统计与逐行扫描一致"""
+        index = self.index
+        for rank_min, rank_max in RANK_RANGES:
+            with self.subTest(rank_min=rank_min, rank_max=rank_max):
+                types = {d['type']: d['count'] for d in index.type_distribution(rank_min, rank_max)}
+                self.assertEqual(types, dict(naive_counts(rows, 'type', rank_min, rank_max)))
+                regions = {d['region']: d['count'] for d in index.region_distribution(rank_min, rank_max)}
+                self.assertEqual(regions, dict(naive_counts(rows, 'regions', rank_min, rank_max)))
+                actors = {d['actor']: d['count'] for d in index.actor_popularity(rank_min, rank_max, limit=1000)}
+                self.assertEqual(actors, dict(naive_counts(rows, 'actors', rank_min, rank_max)))
+                periods = Counter(RankPrefixIndex._period(row['release_year']) for row in rows
+                                  if rank_min <= row['rank'] <= rank_max and row['release_year'] is not None)
+                self.assertEqual({d['period']: d['count'] for d in index.release_date_distribution(rank_min, rank_max)},
+                                 dict(periods))
+                scored = sorted((row['rank'], row['id']) for row in rows
+                                if rank_min <= row['rank'] <= rank_max and row['score'] is not None)
+                self.assertEqual([(row['rank'], row['id']) for row in index.score_rows(rank_min, rank_max)], scored)
+
+    def test_incremental_snapshot_appends_in_place(self):
+        types, actors = self.index.types, self.index.actors
+        self.server.execute_script(INCREMENTAL_SNAPSHOT)
+        self.assertEqual(self.index.refresh(self.db), 3)
+        # 只有新增行时原地累加，不换新的矩阵对象
+        self.assertIs(self.index.types, types)
+        self.assertIs(self.index.actors, actors)
+        self.assertEqual((self.index.last_snapshot, self.index.scope, self.index.max_rank), (1, (1, False), 250))
+        self.assert_matches_scan(self.current_rows(lambda row: True))
+        # 没有新快照时什么也不加载
+        self.assertEqual(self.index.refresh(self.db), 0)
+        self.assertIs(self.index.types, types)
+
+    def test_updated_rows_trigger_rebuild(self):
+        types = self.index.types
+        self.server.execute_script("""
+            INSERT INTO scrape_snapshots (source, row_count, updated_rows) VALUES ('douban', 4, 1);
+            UPDATE douban_hot100_list SET `type` = '剧情, 传记', actors = '摩根·弗里曼', snapshot_id = 1 WHERE id = 1;
+        """)
+        self.assertEqual(self.index.refresh(self.db), 4)
+        self.assertIsNot(self.index.types, types)
+        self.assert_matches_scan(self.current_rows(lambda row: True))
+
+    def test_removed_rows_trigger_rebuild(self):
+        types = self.index.types
+        self.server.execute_script("""
+            INSERT INTO scrape_snapshots (source, row_count, removed_rows) VALUES ('douban', 3, 1);
+            DELETE FROM douban_hot100_list WHERE id = 2;
+        """)
+        self.assertEqual(self.index.refresh(self.db), 3)
+        self.assertIsNot(self.index.types, types)
+        self.assert_matches_scan(self.current_rows(lambda row: True))
+
+    def test_deleted_loaded_rows_trigger_rebuild(self):
+        self.server.execute_script(INCREMENTAL_SNAPSHOT)
+        self.index.refresh(self.db)
+        types = self.index.types
+        # 已加载的行在没有新快照的情况下消失（被撤销），已加载行数对不上
+        self.server.execute_script("DELETE FROM douban_hot100_list WHERE id = 6;")
+        self.assertEqual(self.index.refresh(self.db), 6)
+        self.assertIsNot(self.index.types, types)
+        self.assert_matches_scan(self.current_rows(lambda row: row['id'] != 6))
+
+    def test_unfinished_snapshot_not_loaded(self):
+        self.server.execute_script(INCREMENTAL_SNAPSHOT)
+        self.index.refresh(self.db)
+        types = self.index.types
+        # 正在入库的快照（row_count 仍为 0）的行不计入
+        self.server.execute_script("""
+            INSERT INTO scrape_snapshots (source, row_count) VALUES ('douban', 0);
+            INSERT INTO douban_hot100_list (`rank`, `type`, regions, title, release_date, actors, score_value,
+                                            release_year, snapshot_id) VALUES
+                (8, '剧情', '法国', '触不可及', '2011-11-02', '弗朗索瓦·克鲁塞', 9.3, 2011, 2);
+        """)
+        self.assertEqual(self.index.refresh(self.db), 0)
+        self.assertIs(self.index.types, types)
+        self.assert_matches_scan(self.current_rows(lambda row: row['snapshot_id'] != 2))
+
+    def test_full_snapshot_rebuilds_with_latest_rows_only(self):
+        self.server.execute_script(INCREMENTAL_SNAPSHOT)
+        self.index.refresh(self.db)
+        types = self.index.types
+        self.server.execute_script(FULL_SNAPSHOT.format(snapshot=2))
+        self.assertEqual(self.index.refresh(self.db), 3)
+        self.assertIsNot(self.index.types, types)
+        self.assertEqual(self.index.scope, (2, True))
+        self.assert_matches_scan(self.current_rows(lambda row: row['snapshot_id'] == 2))
+
+        # 下一个整榜快照同样重建，不与上一个快照累加
+        types = self.index.types
+        self.server.execute_script(FULL_SNAPSHOT.format(snapshot=3))
+        self.assertEqual(self.index.refresh(self.db), 3)
+        self.assertIsNot(self.index.types, types)
+        self.assert_matches_scan(self.current_rows(lambda row: row['snapshot_id'] == 3))
+
+    def test_incremental_after_full_snapshot_rebuilds(self):
+        self.server.execute_script(FULL_SNAPSHOT.format(snapshot=1))
+        self.index.refresh(self.db)
+        types = self.index.types
+        # 增量快照的当前榜单是编号不晚于它的全部行，包括此前整榜快照之外的历史行
+        self.server.execute_script("""
+            INSERT INTO scrape_snapshots (source, row_count, inserted_rows) VALUES ('douban', 8, 1);
+            INSERT INTO douban_hot100_list (`rank`, `type`, regions, title, release_date, actors, score_value,
+                                            release_year, snapshot_id) VALUES
+                (9, '剧情', '法国', '触不可及', '2011-11-02', '弗朗索瓦·克鲁塞', 9.3, 2011, 2);
+        """)
+        self.assertEqual(self.index.refresh(self.db), 8)
+        self.assertIsNot(self.index.types, types)
+        self.assertEqual(self.index.scope, (2, False))
+        self.assert_matches_scan(self.current_rows(lambda row: True))
+
+    def test_rebuild_keeps_results(self):
+        self.server.execute_script(INCREMENTAL_SNAPSHOT)
+        self.index.refresh(self.db)
+        types = self.index.types
+        self.assertEqual(self.index.rebuild(self.db), 7)
+        self.assertIsNot(self.index.types, types)
+        self.assert_matches_scan(self.current_rows(lambda row: True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+import bcrypt
+
+
+class HasherBusyError(Exception):
+    """密码计算队列已满"""
+
+
+class HasherTimeoutError(HasherBusyError):
+    """等待密码计算结果超时"""
+
+
+def _hash_password(password, rounds):
+    """在子进程中计算 bcrypt 哈希"""
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _check_password(password, hashed):
+    """在子进程中校验 bcrypt 哈希"""
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+
+class PasswordHasher:
+    """在独立进程池中执行 bcrypt 计算
+
+    bcrypt 每次耗时 100~300ms，放到进程池中执行可避免占满 Web 线程、拖慢同进程的其他接口。
+    排队（含执行中）的任务数超过 max_pending 时立即抛出 HasherBusyError，由接口快速返回繁忙。
+    等待超过 timeout 时抛出 HasherTimeoutError 并取消尚未开始的任务；已在子进程中执行的任务无法中断，
+    执行完之前继续占用一个排队名额。
+    进程池在第一次使用时才创建。
+    """
+
+    def __init__(self, max_workers=2, max_pending=16, rounds=12, timeout=5.0, start_method='spawn'):
+        """
+        Args:
+            max_workers: 进程数
+            max_pending: 最多允许排队（含执行中）的任务数
+            rounds: bcrypt 成本因子（log2 轮数），只影响新生成的哈希
+            timeout: 等待单个任务结果的最长秒数
+            start_method: 子进程启动方式，默认 spawn，避免在多线程的 Web 进程中 fork
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self.timeout = timeout
+        self.start_method = start_method
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        """按需创建进程池"""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    context = multiprocessing.get_context(self.start_method) if self.start_method else None
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+        return self._executor
+
+    def _run(self, fn, *args):
+        """提交任务并等待结果，队列已满时立即失败，等待超时时取消任务"""
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusyError("密码计算繁忙，请稍后再试")
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise HasherTimeoutError(f"密码计算超时（超过 {self.timeout} 秒），请稍后再试") from None
+
+    def hash(self, password):
+        """生成密码哈希"""
+        return self._run(_hash_password, password, self.rounds)
+
+    def check(self, password, hashed):
+        """校验密码"""
+        return self._run(_check_password, password, hashed)
+
+    def reset_after_fork(self):
+        """fork 后在子进程中调用：丢弃从父进程继承的进程池和锁"""
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def shutdown(self):
+        """关闭进程池"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
@@ -1,23 +1,48 @@
 from flask import request, jsonify
 import bcrypt
 import jwt
+import time
 import datetime
 from functools import wraps
 from Utils.MySqlHelper import MySqlHelper
+from backend.register_login.password_hasher import HasherBusyError
 
 
 class UserAPI:
-    def __init__(self, db_config, jwt_secret='your-secret-key'):
+    def __init__(self, db_config, jwt_secret='your-secret-key', pool=None, hasher=None, bcrypt_rounds=12,
+                 token_cache=None, user_cache=None, router=None):
         """
         初始化用户API
         
         Args:
             db_config: 数据库配置字典
             jwt_secret: JWT密钥
+            pool: 共享的数据库连接池（MySqlPool），为空时每次请求单独建立连接
+            hasher: 密码计算进程池（PasswordHasher），为空时在请求线程中直接计算
+            bcrypt_rounds: 未配置进程池时使用的 bcrypt 成本因子
+            token_cache: 已验证 token 的缓存（TTLCache），条目在 token 的 exp 时刻过期，为空时每次都解码
+            user_cache: 用户信息缓存（TTLCache），按用户 id 缓存 users 表查询结果，宜设置较短的 ttl
+            router: 主从路由（ReplicaRouter），配置后查询走从库、写入走主库，忽略 pool
         """
         self.db_config = db_config
         self.jwt_secret = jwt_secret
         self.jwt_algorithm = 'HS256'
+        self.pool = pool
+        self.router = router
+        self.hasher = hasher
+        self.bcrypt_rounds = bcrypt_rounds
+        self.token_cache = token_cache
+        self.user_cache = user_cache
+
+    def get_db(self, read_your_writes=False):
+        """获取数据库操作对象，配置了连接池时从池中借用连接
+
+        Args:
+            read_your_writes: 配置了主从路由时强制读主库
+        """
+        if self.router is not None:
+            return MySqlHelper(router=self.router, read_your_writes=read_your_writes)
+        return MySqlHelper(**self.db_config, pool=self.pool)
 
     def success(self, data, msg="ok"):
         """成功响应"""
@@ -28,11 +53,15 @@ class UserAPI:
         return jsonify({"success": False, "msg": msg, "data": data})
 
     def hash_password(self, password):
-        """密码加密"""
-        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        """密码加密，配置了进程池时在进程池中计算"""
+        if self.hasher is not None:
+            return self.hasher.hash(password)
+        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(self.bcrypt_rounds)).decode('utf-8')
 
     def check_password(self, password, hashed):
-        """密码验证"""
+        """密码验证，配置了进程池时在进程池中计算"""
+        if self.hasher is not None:
+            return self.hasher.check(password, hashed)
         return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
 
     def generate_token(self, user_id, username):
@@ -45,9 +74,15 @@ class UserAPI:
         return jwt.encode(payload, self.jwt_secret, algorithm=self.jwt_algorithm)
 
     def verify_token(self, token):
-        """验证JWT token"""
+        """验证JWT token，验证通过的结果缓存到 token 过期为止"""
+        if self.token_cache is not None:
+            payload = self.token_cache.get(token)
+            if payload is not None:
+                return payload
         try:
             payload = jwt.decode(token, self.jwt_secret, algorithms=[self.jwt_algorithm])
+            if self.token_cache is not None:
+                self.token_cache.set(token, payload, ttl=payload['exp'] - time.time() if 'exp' in payload else None)
             return payload
         except jwt.ExpiredSignatureError:
             return None
@@ -73,23 +108,26 @@ class UserAPI:
             if len(password) < 6:
                 return self.fail("密码长度不能少于6个字符")
 
-            # 检查用户名是否已存在
-            with MySqlHelper(**self.db_config) as db:
+            # 检查用户名是否已存在（读主库，避免从库延迟导致重复注册）
+            with self.get_db(read_your_writes=True) as db:
                 check_sql = "SELECT id FROM users WHERE username = %s"
                 existing_user = db.query_one(check_sql, (username,))
-                if existing_user:
-                    return self.fail("用户名已存在")
+            if existing_user:
+                return self.fail("用户名已存在")
 
-                # 密码加密
-                hashed_password = self.hash_password(password)
+            # 密码加密（耗时较长，不占用数据库连接；并发注册同名用户由 username 唯一约束兜底）
+            hashed_password = self.hash_password(password)
 
-                # 插入新用户
+            # 插入新用户
+            with self.get_db() as db:
                 insert_sql = "INSERT INTO users (username, password, email, phone) VALUES (%s, %s, %s, %s)"
                 if db.insert(insert_sql, (username, hashed_password, email, phone)):
                     return self.success(None, "注册成功")
                 else:
                     return self.fail("注册失败")
 
+        except HasherBusyError as e:
+            return self.fail(str(e)), 503
         except Exception as e:
             return self.fail(str(e))
 
@@ -104,58 +142,70 @@ class UserAPI:
                 return self.fail("用户名和密码不能为空")
 
             # 查询用户
-            with MySqlHelper(**self.db_config) as db:
+            with self.get_db() as db:
                 sql = "SELECT id, username, password FROM users WHERE username = %s"
                 user = db.query_one(sql, (username,))
 
-                if not user:
-                    return self.fail("用户名或密码错误")
+            if not user:
+                return self.fail("用户名或密码错误")
 
-                # 验证密码
-                if not self.check_password(password, user['password']):
-                    return self.fail("用户名或密码错误")
+            # 验证密码（耗时较长，先归还数据库连接）
+            if not self.check_password(password, user['password']):
+                return self.fail("用户名或密码错误")
 
-                # 生成token
-                token = self.generate_token(user['id'], user['username'])
+            # 生成token
+            token = self.generate_token(user['id'], user['username'])
 
-                return self.success({
-                    'token': token,
-                    'user_id': user['id'],
-                    'username': user['username']
-                }, "登录成功")
+            return self.success({
+                'token': token,
+                'user_id': user['id'],
+                'username': user['username']
+            }, "登录成功")
 
+        except HasherBusyError as e:
+            return self.fail(str(e)), 503
         except Exception as e:
             return self.fail(str(e))
 
     def get_user_info(self):
         """获取用户信息"""
         try:
-            # 从请求头获取token
-            auth_header = request.headers.get('Authorization')
-            if not auth_header or not auth_header.startswith('Bearer '):
-                return self.fail("未提供有效的认证token")
-
-            token = auth_header.split(' ')[1]
-            payload = self.verify_token(token)
-
-            if not payload:
-                return self.fail("token已过期或无效")
-
-            # 查询用户信息
-            with MySqlHelper(**self.db_config) as db:
-                sql = "SELECT id, username, email, phone, created_at FROM users WHERE id = %s"
-                user = db.query_one(sql, (payload['user_id'],))
+            # 优先使用认证装饰器已验证的结果，避免重复解码
+            payload = getattr(request, 'user', None)
+            if payload is None:
+                # 从请求头获取token
+                auth_header = request.headers.get('Authorization')
+                if not auth_header or not auth_header.startswith('Bearer '):
+                    return self.fail("未提供有效的认证token")
+
+                token = auth_header.split(' ')[1]
+                payload = self.verify_token(token)
+
+                if not payload:
+                    return self.fail("token已过期或无效")
+
+            user_id = payload['user_id']
+            info = self.user_cache.get(user_id) if self.user_cache is not None else None
+            if info is None:
+                # 查询用户信息
+                with self.get_db() as db:
+                    sql = "SELECT id, username, email, phone, created_at FROM users WHERE id = %s"
+                    user = db.query_one(sql, (user_id,))
 
                 if not user:
                     return self.fail("用户不存在")
 
-                return self.success({
+                info = {
                     'user_id': user['id'],
                     'username': user['username'],
                     'email': user['email'],
                     'phone': user['phone'],
                     'created_at': user['created_at'].strftime('%Y-%m-%d %H:%M:%S') if user['created_at'] else None
-                })
+                }
+                if self.user_cache is not None:
+                    self.user_cache.set(user_id, info)
+
+            return self.success(info)
 
         except Exception as e:
             return self.fail(str(e))
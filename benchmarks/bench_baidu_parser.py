@@ -0,0 +1,113 @@
+"""百度热搜页面解析后端对比：检查各后端结果一致并测量单页解析耗时
+
+用法:
+    python benchmarks/bench_baidu_parser.py [页面文件 ...] [--repeat N]
+    python benchmarks/bench_baidu_parser.py --save benchmarks/fixtures/baidu_realtime.html   # 保存当前线上页面作为样本
+    python benchmarks/bench_baidu_parser.py --synthetic   # 没有样本时使用合成页面
+
+未指定页面文件时读取 benchmarks/fixtures/*.html。合成页面只模仿了热搜项的结构和页面体积，
+耗时和一致性结论应以保存的线上页面为准，因此目录为空时需显式指定 --synthetic。
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../Utils')))
+from BaiduHotParser import PARSERS, available_parsers, ITEM_CLASS, TITLE_CLASS, HOT_CLASS
+from HttpClient import HttpClient
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def synthetic_page(items=50, padding_kb=400):
+    """按线上页面结构生成样本：热搜项前后有大段内联脚本和样式，与真实页面体积相近"""
+    padding = '<script>window.__data = "' + 'x' * 1024 + '";</script>\n'
+    blocks = []
+    for i in range(1, items + 1):
+        blocks.append(f"""
+<div class="{ITEM_CLASS} horizontal_1eKyQ">
+  <a href="https://www.baidu.com/s?wd=%E7%83%AD%E6%90%9C{i}" class="img-wrapper_29V76" target="_blank">
+    <div class="index_1Ew5p c-index-bg{i}"> {i} </div>
+    <img src="https://fyb-2.cdn.bcebos.com/hotboard_image/{i}.jpg" alt="">
+  </a>
+  <div class="trend_2RttY hide-icon">
+    <div class="{HOT_CLASS}"> {5000000 - i * 1234} </div>
+    <div class="text_1lUwZ">热搜指数</div>
+  </div>
+  <div class="content_1YWBm">
+    <a href="https://www.baidu.com/s?wd=%E7%83%AD%E6%90%9C{i}" class="title_dIF3B" target="_blank">
+      <div class="{TITLE_CLASS}"> 第{i}条热搜标题 &amp; 说明 </div>
+    </a>
+    <div class="hot-desc_1m_jR large_nSuFU">热搜摘要内容{i}，<a href="#">查看更多&gt;</a></div>
+  </div>
+</div>""")
+    head = '<!DOCTYPE html><html><head><meta charset="utf-8"><title>百度热搜</title>'
+    return (head + padding * (padding_kb // 2) + '</head><body><div id="sanRoot"><main>'
+            + ''.join(blocks) + '</main></div>' + padding * (padding_kb // 2) + '</body></html>')
+
+
+def load_fixtures(paths, synthetic=False):
+    """读取样本页面，返回 [(名称, html), ...]；没有样本且未指定 synthetic 时返回空列表"""
+    if synthetic:
+        return [('synthetic', synthetic_page())]
+    paths = paths or sorted(glob.glob(os.path.join(FIXTURE_DIR, '*.html')))
+    if not paths:
+        return []
+    pages = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            pages.append((os.path.basename(path), f.read()))
+    return pages
+
+
+def save_live_page(path):
+    """下载当前线上热搜页面保存为样本"""
+    response = HttpClient(timeout=10, conditional=False).get(
+        "https://top.baidu.com/board?tab=realtime",
+        headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                               '(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'},
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(response.text())
+    print(f"已保存 {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='百度热搜解析后端对比')
+    parser.add_argument('pages', nargs='*', help='页面文件')
+    parser.add_argument('--repeat', type=int, default=20, help='每个后端解析次数')
+    parser.add_argument('--save', help='下载线上页面保存到该路径后退出')
+    parser.add_argument('--synthetic', action='store_true', help='使用合成页面（没有保存的线上页面时）')
+    args = parser.parse_args()
+
+    if args.save:
+        save_live_page(args.save)
+        return
+
+    backends = available_parsers()
+    print(f"可用后端: {', '.join(backends)}（未安装: {', '.join(n for n in PARSERS if n not in backends) or '无'}）")
+    pages = load_fixtures(args.pages, args.synthetic)
+    if not pages:
+        parser.error(f"{FIXTURE_DIR} 中没有样本页面：先用 --save 保存线上页面，或指定 --synthetic 使用合成页面")
+    for name, html in pages:
+        print(f"\n{name}  {len(html.encode('utf-8')) / 1024:.0f}KB")
+        expected = PARSERS['bs4'][0](html, 100)
+        timings, counts = {}, {}
+        for backend in backends:
+            parse = PARSERS[backend][0]
+            result = parse(html, 100)
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                parse(html, 100)
+            timings[backend] = (time.perf_counter() - started) / args.repeat * 1000
+            counts[backend] = (len(result), '一致' if result == expected else '不一致')
+        for backend in backends:
+            print(f"  {backend:<11} {counts[backend][0]:>3}条 {counts[backend][1]}  {timings[backend]:8.2f}ms/页  "
+                  f"相对 bs4 {timings['bs4'] / timings[backend]:5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""MySqlHelper 字典行（DictCursor + summarize_rows）与列式（query_columns + summarize_columns）读取统计的对比
+
+对看板查询（全部图表所需的列）分别测量耗时和峰值内存（tracemalloc），折算为每 10 万行，并检查两种方式结果一致。
+
+用法:
+    python benchmarks/bench_columnar.py --rows 100000                # 导入合成数据到基准库后对比（需要 MySQL）
+    python benchmarks/bench_columnar.py --rows 100000 --synthetic    # 不连数据库，只对比客户端的行转换与统计
+数据库连接参数与 bench_suite.py 相同（--host/--port/... 或环境变量 BENCH_DB_HOST 等），基准库会被清空重建。
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from pymysql.constants import FIELD_TYPE
+from Utils.MySqlHelper import ColumnBatch, MySqlHelper
+from Utils.SchemaMigrator import typed_columns
+from backend.database_visualization.movie_api import MovieAPI
+from bench_suite import db_config_from_args, ensure_database, generate_rows, load_dataset
+
+CHARTS = list(MovieAPI.DASHBOARD_CHARTS)
+FIELD_TYPES = {
+    'type': FIELD_TYPE.BLOB, 'regions': FIELD_TYPE.BLOB, 'actors': FIELD_TYPE.BLOB,
+    'title': FIELD_TYPE.VAR_STRING, 'release_date': FIELD_TYPE.VAR_STRING,
+    'release_year': FIELD_TYPE.SHORT, 'score_value': FIELD_TYPE.NEWDECIMAL,
+}
+
+
+def synthetic_rows(count):
+    """按看板查询的列顺序生成与 pymysql 返回值类型相同的元组行及对应的 description"""
+    names = []
+    for chart in CHARTS:
+        names.extend(c for c in MovieAPI.DASHBOARD_CHARTS[chart] if c not in names)
+    rows = []
+    for rank, types, regions, title, release_date, score, actors, _ in generate_rows(count):
+        score_value, _, release_year = typed_columns(score, release_date)
+        values = {'type': types, 'regions': regions, 'title': title, 'release_date': release_date,
+                  'release_year': release_year, 'score_value': score_value, 'actors': actors}
+        rows.append(tuple(values[name] for name in names))
+    description = [(name, FIELD_TYPES[name], None, None, None, None, True) for name in names]
+    return rows, description
+
+
+def measure(fn, repeat):
+    """返回 (最短耗时秒数, 峰值内存字节数, 结果)；峰值内存单独运行一次测量，避免 tracemalloc 影响计时"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        seconds = time.perf_counter() - started
+        best = seconds if best is None else min(best, seconds)
+        del result
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='字典行与列式读取对比')
+    parser.add_argument('--rows', type=int, default=100000, help='数据行数')
+    parser.add_argument('--repeat', type=int, default=5, help='计时重复次数（取最短）')
+    parser.add_argument('--synthetic', action='store_true', help='不连数据库，只对比客户端转换与统计')
+    parser.add_argument('--output', help='结果 JSON 路径')
+    parser.add_argument('--host', default=os.environ.get('BENCH_DB_HOST', 'localhost'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('BENCH_DB_PORT', 3306)))
+    parser.add_argument('--user', default=os.environ.get('BENCH_DB_USER', 'root'))
+    parser.add_argument('--password', default=os.environ.get('BENCH_DB_PASSWORD', '123456'))
+    parser.add_argument('--database', default=os.environ.get('BENCH_DB_NAME', 'intershipproject_bench'))
+    args = parser.parse_args()
+
+    if args.synthetic:
+        rows, description = synthetic_rows(args.rows)
+        names = [column[0] for column in description]
+        cases = {
+            'dict': lambda: MovieAPI.summarize_rows([dict(zip(names, row)) for row in rows], CHARTS),
+            'columnar': lambda: MovieAPI.summarize_columns(ColumnBatch.from_rows(rows, description), CHARTS),
+        }
+    else:
+        db_config = db_config_from_args(args)
+        ensure_database(db_config)
+        print(f"导入 {args.rows} 行...")
+        load_dataset(db_config, args.rows)
+        sql = MovieAPI.dashboard_sql(CHARTS)
+
+        def dict_path():
+            with MySqlHelper(**db_config) as db:
+                return MovieAPI.summarize_rows(db.query(sql, (1, 100)), CHARTS)
+
+        def columnar_path():
+            with MySqlHelper(**db_config) as db:
+                return MovieAPI.summarize_columns(db.query_columns(sql, (1, 100)), CHARTS)
+
+        cases = {'dict': dict_path, 'columnar': columnar_path}
+
+    scale = 100000 / args.rows
+    results, outputs = [], {}
+    for name, fn in cases.items():
+        seconds, peak, outputs[name] = measure(fn, args.repeat)
+        results.append({
+            'name': name, 'rows': args.rows, 'synthetic': args.synthetic,
+            'ms_per_100k': round(seconds * 1000 * scale, 2), 'peak_mb_per_100k': round(peak / 2 ** 20 * scale, 2),
+        })
+        print(f"  {name:<9} {results[-1]['ms_per_100k']:10.1f}ms/10万行  峰值内存 {results[-1]['peak_mb_per_100k']:8.1f}MB/10万行")
+    dict_result, columnar_result = results
+    print(f"列式 / 字典: 耗时 {columnar_result['ms_per_100k'] / dict_result['ms_per_100k']:.2f}x，"
+          f"内存 {columnar_result['peak_mb_per_100k'] / dict_result['peak_mb_per_100k']:.2f}x，"
+          f"结果{'一致' if outputs['dict'] == outputs['columnar'] else '不一致'}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""登录密码校验并发压测：对比请求线程内直接计算与 PasswordHasher 进程池的 p50/p99 延迟
+
+用法: python benchmarks/bench_password_hashing.py [并发数] [请求数] [bcrypt成本因子]
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import bcrypt
+from backend.register_login.password_hasher import PasswordHasher, HasherBusyError
+
+
+def percentile(values, p):
+    """计算百分位数（最近秩法）"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def run(check, concurrency, requests):
+    """以 concurrency 个线程并发执行 requests 次 check，返回延迟列表（毫秒）和繁忙拒绝次数"""
+    latencies, rejected = [], 0
+
+    def one(_):
+        started = time.perf_counter()
+        try:
+            check()
+            return (time.perf_counter() - started) * 1000, False
+        except HasherBusyError:
+            return (time.perf_counter() - started) * 1000, True
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for latency, busy in executor.map(one, range(requests)):
+            if busy:
+                rejected += 1
+            else:
+                latencies.append(latency)
+    return latencies, rejected
+
+
+def report(name, latencies, rejected, seconds):
+    """打印一组结果"""
+    print(f"{name:<10} 完成 {len(latencies):>4}  拒绝 {rejected:>4}  "
+          f"p50 {percentile(latencies, 50):8.1f}ms  p99 {percentile(latencies, 99):8.1f}ms  "
+          f"吞吐 {len(latencies) / seconds:6.1f}/s")
+
+
+def main():
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    rounds = int(sys.argv[3]) if len(sys.argv) > 3 else 12
+    password = 'benchmark-password'
+    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+    print(f"并发 {concurrency}，请求 {requests}，成本因子 {rounds}，CPU {os.cpu_count()}")
+
+    started = time.perf_counter()
+    latencies, rejected = run(lambda: bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8')),
+                              concurrency, requests)
+    report('inline', latencies, rejected, time.perf_counter() - started)
+
+    hasher = PasswordHasher(max_workers=os.cpu_count() or 2, max_pending=concurrency, rounds=rounds)
+    hasher.check(password, hashed)  # 预热，启动子进程
+    started = time.perf_counter()
+    latencies, rejected = run(lambda: hasher.check(password, hashed), concurrency, requests)
+    report('pool', latencies, rejected, time.perf_counter() - started)
+
+    # 队列上限小于并发数时，超出部分立即失败而不是排队
+    limited = PasswordHasher(max_workers=2, max_pending=4, rounds=rounds)
+    limited.check(password, hashed)
+    started = time.perf_counter()
+    latencies, rejected = run(lambda: limited.check(password, hashed), concurrency, requests)
+    report('pool(4)', latencies, rejected, time.perf_counter() - started)
+
+    hasher.shutdown()
+    limited.shutdown()
+
+
+if __name__ == '__main__':
+    main()
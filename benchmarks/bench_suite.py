@@ -0,0 +1,306 @@
+"""MySqlHelper / MovieAPI 基准测试
+
+按固定随机种子生成 100 / 1万 / 100万 行 douban_hot100_list 合成数据，导入本地 MySQL 兼容实例
+（默认库 intershipproject_bench，会被清空重建，不要指向生产库），然后测量:
+    - MovieAPI 各统计方法的吞吐与 p50/p99 延迟（scan: 直接查库；columnar: 列式读取 + NumPy；index: RankPrefixIndex）
+    - MySqlHelper.insert_many 与 bulk_insert 在不同批大小下的写入速率
+    - 导入后 SchemaMigrator 加类型化列、分块回填、建索引的耗时
+结果写成 JSON，可与上一次提交的结果比较，性能下降超过阈值时退出码为1。
+
+用法:
+    python benchmarks/bench_suite.py --sizes 100,10000 --output bench.json
+    python benchmarks/bench_suite.py --output new.json --compare bench.json --threshold 0.2
+数据库连接可用 --host/--port/--user/--password/--database 或环境变量 BENCH_DB_HOST 等指定。
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pymysql
+from Utils.MySqlHelper import MySqlHelper, MySqlPool
+from Utils.SchemaMigrator import SchemaMigrator
+from Utils.SnapshotStore import SnapshotStore
+from backend.database_visualization.movie_api import MovieAPI
+from backend.database_visualization.rank_index import RankPrefixIndex
+
+TYPES = ['剧情', '喜剧', '动作', '爱情', '科幻', '动画', '悬疑', '惊悚', '恐怖', '犯罪', '奇幻', '冒险', '战争', '传记']
+REGIONS = ['中国大陆', '美国', '日本', '香港', '韩国', '英国', '法国', '台湾', '德国', '意大利', '印度']
+ACTORS = [f'演员{i:04d}' for i in range(3000)]
+ROWS_PER_SNAPSHOT = 100  # 与真实爬取一致，每个快照 rank 为 1~100
+
+# 迁移前的旧表结构，导入后由 SchemaMigrator 加类型化列、分块回填并建索引
+CREATE_TABLE_SQL = """
+CREATE TABLE douban_hot100_list (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    `rank` INT,
+    `type` TEXT,
+    regions TEXT,
+    title VARCHAR(100),
+    release_date VARCHAR(20),
+    score VARCHAR(5),
+    actors TEXT,
+    snapshot_id INT,
+    content_hash CHAR(32)
+)
+"""
+INSERT_SQL = """
+INSERT INTO douban_hot100_list (`rank`, `type`, regions, title, release_date, score, actors, snapshot_id)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+ENDPOINTS = [
+    'compute_type_distribution',
+    'compute_region_distribution',
+    'compute_release_date_distribution',
+    'compute_score_distribution',
+    'compute_actor_popularity',
+]
+
+
+def db_config_from_args(args):
+    """命令行参数 / 环境变量中的数据库配置"""
+    return {
+        'host': args.host,
+        'user': args.user,
+        'password': args.password,
+        'database': args.database,
+        'port': args.port,
+        'charset': 'utf8mb4',
+    }
+
+
+def generate_rows(count, seed=20240601):
+    """生成 count 行合成电影数据（固定种子，多次运行结果相同）"""
+    rnd = random.Random(seed)
+    # 演员热度近似长尾分布：少数演员出现次数远多于其他演员
+    actor_weights = [1.0 / (i + 1) ** 0.8 for i in range(len(ACTORS))]
+    for i in range(count):
+        yield (
+            i % ROWS_PER_SNAPSHOT + 1,
+            ', '.join(rnd.sample(TYPES, rnd.randint(1, 3))),
+            ', '.join(rnd.sample(REGIONS, rnd.randint(1, 2))),
+            f'电影{i:07d}',
+            f'{rnd.randint(1930, 2024)}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}',
+            f'{rnd.uniform(6.0, 9.8):.1f}',
+            ', '.join(rnd.choices(ACTORS, weights=actor_weights, k=rnd.randint(2, 6))),
+            i // ROWS_PER_SNAPSHOT + 1,
+        )
+
+
+def ensure_database(db_config):
+    """创建基准测试库（不存在时）"""
+    connection = pymysql.connect(**{k: v for k, v in db_config.items() if k != 'database'})
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{db_config['database']}` DEFAULT CHARSET utf8mb4")
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def load_dataset(db_config, count):
+    """清空并导入 count 行合成数据及对应快照记录，返回导入统计"""
+    with MySqlHelper(**db_config) as db:
+        db.execute("DROP TABLE IF EXISTS douban_hot100_list")
+        db.execute("DROP TABLE IF EXISTS scrape_snapshots")
+        db.execute("DROP TABLE IF EXISTS schema_migrations")
+        db.execute(CREATE_TABLE_SQL)
+        db.execute(SnapshotStore.CREATE_TABLE_SQL)
+        # 按增量入库记录快照：每个快照新增 ROWS_PER_SNAPSHOT 行，row_count 为累计行数，
+        # 当前榜单即全部行（MovieAPI.row_scope），各统计方法扫描整张表
+        snapshots = (count + ROWS_PER_SNAPSHOT - 1) // ROWS_PER_SNAPSHOT
+        db.bulk_insert(
+            "INSERT INTO scrape_snapshots (id, source, row_count, inserted_rows) VALUES (%s, %s, %s, %s)",
+            ((i + 1, 'douban', min((i + 1) * ROWS_PER_SNAPSHOT, count), ROWS_PER_SNAPSHOT) for i in range(snapshots)),
+        )
+        stats = db.bulk_insert(INSERT_SQL, generate_rows(count), chunk_size=5000)
+        started = time.perf_counter()
+        SchemaMigrator(db, chunk_size=20000).migrate()
+        stats['migrate_seconds'] = time.perf_counter() - started
+        db.execute("ANALYZE TABLE douban_hot100_list")
+    return stats
+
+
+def percentile(values, p):
+    """计算百分位数（最近秩法）"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def measure(fn, repeat, max_seconds):
+    """重复调用 fn，最多 repeat 次或 max_seconds 秒（至少3次），返回延迟统计"""
+    latencies = []
+    started = time.perf_counter()
+    while len(latencies) < repeat:
+        call_started = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - call_started) * 1000)
+        if len(latencies) >= 3 and time.perf_counter() - started > max_seconds:
+            break
+    total = time.perf_counter() - started
+    return {
+        'iterations': len(latencies),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'ops_per_sec': round(len(latencies) / total, 3) if total else 0.0,
+    }
+
+
+def bench_endpoints(db_config, rows, repeat, max_seconds):
+    """测量 MovieAPI 各统计方法（默认 rank 范围 1~100，即扫描全部数据）"""
+    results = []
+    pool = MySqlPool(**db_config, max_size=2)
+    try:
+        scan_api = MovieAPI(db_config, pool=pool)
+        columnar_api = MovieAPI(db_config, pool=pool, columnar=True)
+        index_api = MovieAPI(db_config, pool=pool, rank_index=RankPrefixIndex())
+        load_started = time.perf_counter()
+        index_api.refresh_rank_index()
+        results.append({
+            'name': 'rank_index_load', 'mode': 'index', 'rows': rows,
+            'seconds': round(time.perf_counter() - load_started, 3),
+        })
+
+        charts = list(MovieAPI.DASHBOARD_CHARTS)
+        for mode, api in (('scan', scan_api), ('columnar', columnar_api), ('index', index_api)):
+            cases = [(name, getattr(api, name)) for name in ENDPOINTS]
+            cases.append(('compute_dashboard', lambda lo, hi, api=api: api.compute_dashboard(lo, hi, charts)))
+            for name, fn in cases:
+                stats = measure(lambda: fn(1, 100), repeat, max_seconds)
+                results.append({'name': f'endpoint/{name}', 'mode': mode, 'rows': rows, **stats})
+                print(f"  {mode:<8} {name:<36} p50 {stats['p50_ms']:10.2f}ms  p99 {stats['p99_ms']:10.2f}ms")
+    finally:
+        pool.close()
+    return results
+
+
+def bench_inserts(db_config, rows, batch_sizes):
+    """测量 insert_many（executemany）与 bulk_insert 在不同批大小下的写入速率"""
+    results = []
+    data = list(generate_rows(rows, seed=7))
+    target = INSERT_SQL.replace('douban_hot100_list', 'bench_insert_target')
+    with MySqlHelper(**db_config) as db:
+        for method in ('insert_many', 'bulk_insert'):
+            for batch_size in batch_sizes:
+                db.execute("DROP TABLE IF EXISTS bench_insert_target")
+                db.execute(CREATE_TABLE_SQL.replace('douban_hot100_list', 'bench_insert_target'))
+                started = time.perf_counter()
+                if method == 'insert_many':
+                    for offset in range(0, len(data), batch_size):
+                        db.insert_many(target, data[offset:offset + batch_size])
+                else:
+                    db.bulk_insert(target, data, chunk_size=batch_size)
+                seconds = time.perf_counter() - started
+                results.append({
+                    'name': method, 'mode': 'write', 'rows': rows, 'batch_size': batch_size,
+                    'seconds': round(seconds, 3), 'rows_per_sec': round(rows / seconds, 1) if seconds else 0.0,
+                })
+                print(f"  {method:<12} batch {batch_size:>6}  {rows / seconds:12.0f} rows/s")
+        db.execute("DROP TABLE IF EXISTS bench_insert_target")
+    return results
+
+
+def environment_info(db_config):
+    """运行环境信息，便于比较不同机器/提交的结果"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except Exception:
+        commit = None
+    with MySqlHelper(**db_config) as db:
+        row = db.query_one("SELECT VERSION() AS version")
+    return {
+        'commit': commit,
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'server_version': row['version'] if row else None,
+    }
+
+
+def result_key(result):
+    return result['name'], result['mode'], result['rows'], result.get('batch_size')
+
+
+def compare(baseline, current, threshold):
+    """与基线结果比较，返回性能下降超过 threshold 的条目描述"""
+    previous = {result_key(r): r for r in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        old = previous.get(result_key(result))
+        if old is None:
+            continue
+        if 'p50_ms' in result and old.get('p50_ms'):
+            change = result['p50_ms'] / old['p50_ms'] - 1
+        elif 'rows_per_sec' in result and result['rows_per_sec']:
+            change = old['rows_per_sec'] / result['rows_per_sec'] - 1
+        elif 'seconds' in result and old.get('seconds'):
+            change = result['seconds'] / old['seconds'] - 1
+        else:
+            continue
+        if change > threshold:
+            regressions.append(f"{'/'.join(str(k) for k in result_key(result) if k is not None)}: 慢了 {change:.0%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MySqlHelper / MovieAPI 基准测试')
+    parser.add_argument('--sizes', default='100,10000,1000000', help='数据行数，逗号分隔')
+    parser.add_argument('--repeat', type=int, default=50, help='每个接口最多调用次数')
+    parser.add_argument('--max-seconds', type=float, default=30.0, help='每个接口最长测量秒数')
+    parser.add_argument('--insert-rows', type=int, default=20000, help='写入测试的行数')
+    parser.add_argument('--batch-sizes', default='100,1000,5000', help='写入批大小，逗号分隔')
+    parser.add_argument('--output', default='bench_results.json', help='结果 JSON 路径')
+    parser.add_argument('--compare', help='基线结果 JSON，性能下降超过阈值时退出码为1')
+    parser.add_argument('--threshold', type=float, default=0.2, help='允许的性能下降比例')
+    parser.add_argument('--host', default=os.environ.get('BENCH_DB_HOST', 'localhost'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('BENCH_DB_PORT', 3306)))
+    parser.add_argument('--user', default=os.environ.get('BENCH_DB_USER', 'root'))
+    parser.add_argument('--password', default=os.environ.get('BENCH_DB_PASSWORD', '123456'))
+    parser.add_argument('--database', default=os.environ.get('BENCH_DB_NAME', 'intershipproject_bench'))
+    args = parser.parse_args()
+
+    db_config = db_config_from_args(args)
+    ensure_database(db_config)
+    report = {'environment': environment_info(db_config), 'results': []}
+
+    for rows in (int(size) for size in args.sizes.split(',')):
+        print(f"导入 {rows} 行...")
+        stats = load_dataset(db_config, rows)
+        report['results'].append({
+            'name': 'load_dataset', 'mode': 'write', 'rows': rows,
+            'seconds': round(stats['seconds'], 3), 'rows_per_sec': round(stats['rows_per_sec'], 1),
+        })
+        report['results'].append({
+            'name': 'migrate_schema', 'mode': 'write', 'rows': rows,
+            'seconds': round(stats['migrate_seconds'], 3), 'rows_per_sec': round(rows / stats['migrate_seconds'], 1),
+        })
+        report['results'].extend(bench_endpoints(db_config, rows, args.repeat, args.max_seconds))
+
+    print(f"写入测试 {args.insert_rows} 行...")
+    batch_sizes = [int(size) for size in args.batch_sizes.split(',')]
+    report['results'].extend(bench_inserts(db_config, args.insert_rows, batch_sizes))
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入 {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        for line in regressions:
+            print(f"性能下降: {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
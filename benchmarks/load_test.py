@@ -0,0 +1,90 @@
+"""接口压测：固定并发持续请求一段时间，输出吞吐与 p50/p99 延迟
+
+对比开发服务器与 gunicorn 多进程部署（在仓库根目录执行）:
+    # 1. Werkzeug 开发服务器
+    python backend/database_visualization/api.py
+    python benchmarks/load_test.py http://127.0.0.1:5000/api/type-distribution 32 20
+
+    # 2. gunicorn，多 worker 多线程
+    gunicorn -c backend/database_visualization/gunicorn.conf.py "api:create_app()"
+    python benchmarks/load_test.py http://127.0.0.1:5000/api/type-distribution 32 20
+
+用法: python benchmarks/load_test.py URL [并发数] [持续秒数]
+"""
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../Utils')))
+from HttpClient import HttpClient
+
+
+def percentile(values, p):
+    """计算百分位数（最近秩法）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def load_test(url, concurrency=32, duration=20.0):
+    """以 concurrency 个线程在 duration 秒内持续请求 url
+
+    Returns:
+        统计结果字典：请求数、错误数、吞吐、p50/p99/最大延迟（毫秒）
+    """
+    client = HttpClient(timeout=30, conditional=False)
+    deadline = time.perf_counter() + duration
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+
+    def worker():
+        local, failed = [], 0
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                client.get(url)
+                local.append((time.perf_counter() - started) * 1000)
+            except Exception:
+                failed += 1
+        client.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        'url': url,
+        'concurrency': concurrency,
+        'seconds': round(elapsed, 2),
+        'requests': len(latencies),
+        'errors': errors[0],
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'max_ms': round(max(latencies), 2) if latencies else 0.0,
+    }
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    url = sys.argv[1]
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    duration = float(sys.argv[3]) if len(sys.argv) > 3 else 20.0
+    print(json.dumps(load_test(url, concurrency, duration), ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""启动带合成数据的本地 MySQL 桩服务器（Utils/MySqlStubServer，需要 mysql-mimic），没有 MySQL 时用于接口压测
+
+主表和快照表按 SchemaMigrator 迁移后的列建在内存 SQLite 中，数据与 bench_suite.generate_rows 相同；
+schema_migrations 记录全部迁移已执行，create_app 启动时的表结构检查直接通过（桩服务器不支持迁移锁）。
+桩服务器只适合压测走排名索引和缓存的图表接口，不代表真实 MySQL 的查询性能。
+
+用法:
+    python benchmarks/stub_db.py --port 3307 --rows 5000
+    gunicorn -c backend/database_visualization/gunicorn.conf.py \\
+        "api:create_app(db_config={'host': '127.0.0.1', 'port': 3307, 'user': 'test', 'password': '', 'database': 'stub'})"
+"""
+import argparse
+import os
+import signal
+import sys
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from Utils.MySqlStubServer import MySqlStubServer
+from Utils.SchemaMigrator import MIGRATIONS, typed_columns
+from bench_suite import ROWS_PER_SNAPSHOT, generate_rows
+
+SCHEMA = """
+CREATE TABLE douban_hot100_list (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    `rank` INTEGER, `type` TEXT, regions TEXT, title TEXT, release_date TEXT, score TEXT, actors TEXT,
+    snapshot_id INTEGER, content_hash TEXT, score_value REAL, release_on TEXT, release_year INTEGER
+);
+CREATE INDEX idx_rank ON douban_hot100_list (`rank`);
+CREATE TABLE scrape_snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, source TEXT NOT NULL, created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    row_count INTEGER DEFAULT 0, inserted_rows INTEGER DEFAULT 0, updated_rows INTEGER DEFAULT 0,
+    removed_rows INTEGER DEFAULT 0, content_hash TEXT
+);
+CREATE TABLE hot_search_01 (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, `rank` INTEGER, title TEXT, hot_score TEXT, link TEXT,
+    snapshot_id INTEGER, content_hash TEXT, hot_score_value INTEGER
+);
+CREATE TABLE schema_migrations (
+    version INTEGER PRIMARY KEY, name TEXT NOT NULL, applied_at TEXT DEFAULT CURRENT_TIMESTAMP, seconds REAL
+);
+"""
+
+
+def seed(server, count):
+    """写入 count 行合成电影数据及对应的快照记录"""
+    server.execute_script(SCHEMA)
+    server.sqlite.executemany("INSERT INTO schema_migrations (version, name) VALUES (?, ?)",
+                              [(m.version, m.name) for m in MIGRATIONS])
+    rows = []
+    for rank, types, regions, title, release_date, score, actors, snapshot_id in generate_rows(count):
+        score_value, release_on, release_year = typed_columns(score, release_date)
+        rows.append((rank, types, regions, title, release_date, score, actors, snapshot_id,
+                     float(score_value) if score_value is not None else None,
+                     release_on.isoformat() if release_on else None, release_year))
+    server.sqlite.executemany(
+        "INSERT INTO douban_hot100_list (`rank`, `type`, regions, title, release_date, score, actors, snapshot_id, "
+        "score_value, release_on, release_year) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        rows
+    )
+    snapshots = (count + ROWS_PER_SNAPSHOT - 1) // ROWS_PER_SNAPSHOT
+    server.sqlite.executemany(
+        "INSERT INTO scrape_snapshots (source, row_count, inserted_rows) VALUES ('douban', ?, ?)",
+        [(min(ROWS_PER_SNAPSHOT, count - i * ROWS_PER_SNAPSHOT),) * 2 for i in range(snapshots)]
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='带合成数据的 MySQL 桩服务器')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=3307)
+    parser.add_argument('--rows', type=int, default=5000)
+    args = parser.parse_args()
+
+    server = MySqlStubServer(host=args.host, port=args.port)
+    seed(server, args.rows)
+    server.start()
+    print(f"MySQL 桩服务器已启动: {args.host}:{server.port}，{args.rows} 行", flush=True)
+
+    stopped = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stopped.set())
+    stopped.wait()
+    server.stop()
+
+
+if __name__ == '__main__':
+    main()